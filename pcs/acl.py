@@ -6,6 +6,7 @@ from __future__ import (
 )
 
 import sys
+from xml.dom.minidom import parseString
 
 from pcs import (
     prop,
@@ -53,7 +54,7 @@ def acl_cmd(argv):
         sys.exit(1)
 
 def acl_show(argv):
-    dom = utils.get_cib_dom()
+    dom = parseString(utils.get_cib_section_xml("acls") or "<acls/>")
 
     properties = prop.get_set_properties(defaults=prop.get_default_properties())
     acl_enabled = properties.get("enable-acl", "").lower()
@@ -129,6 +130,7 @@ def acl_target(argv,group=False):
         element.setAttribute("id", tug_id)
 
         acls.appendChild(element)
+        utils.dom_id_index_add(element)
         for role in argv:
             if not utils.dom_get_element_with_id(acls, "acl_role", role):
                 utils.err("cannot find acl role: %s" % role)
@@ -5,43 +5,76 @@ from __future__ import (
     unicode_literals,
 )
 
-import getopt
+import importlib
 import os
 import sys
 import logging
 logging.basicConfig()
 
 from pcs import (
-    acl,
-    cluster,
-    config,
-    constraint,
-    node,
-    pcsd,
-    prop,
-    qdevice,
-    quorum,
-    resource,
     settings,
-    status,
-    stonith,
     usage,
-    utils,
 )
 
 from pcs.cli.common import completion
 
 
+# Modules of commands are imported only when their command is run so running
+# a command does not pay for loading all the others.
+COMMAND_MAP = {
+    "resource": ("pcs.resource", "resource_cmd"),
+    "cluster": ("pcs.cluster", "cluster_cmd"),
+    "stonith": ("pcs.stonith", "stonith_cmd"),
+    "property": ("pcs.prop", "property_cmd"),
+    "constraint": ("pcs.constraint", "constraint_cmd"),
+    "acl": ("pcs.acl", "acl_cmd"),
+    "status": ("pcs.status", "status_cmd"),
+    "config": ("pcs.config", "config_cmd"),
+    "pcsd": ("pcs.pcsd", "pcsd_cmd"),
+    "node": ("pcs.node", "node_cmd"),
+    "quorum": ("pcs.quorum", "quorum_cmd"),
+    "qdevice": ("pcs.qdevice", "qdevice_cmd"),
+}
+# commands using the library wrapper
+LIBRARY_COMMAND_LIST = ["quorum", "qdevice"]
+
 usefile = False
 filename = ""
+
+def import_command_modules():
+    """
+    Import modules of all commands
+    """
+    for module_name, dummy_function_name in COMMAND_MAP.values():
+        importlib.import_module(module_name)
+
+def run_command(command, argv):
+    from pcs import utils
+    module_name, function_name = COMMAND_MAP[command]
+    command_function = getattr(
+        importlib.import_module(module_name), function_name
+    )
+    if command in LIBRARY_COMMAND_LIST:
+        command_function(
+            utils.get_library_wrapper(), argv, utils.get_modificators()
+        )
+    else:
+        command_function(argv)
+
 def main(argv=None):
     if completion.has_applicable_environment(os.environ):
         print(completion.make_suggestions(
             os.environ,
-            usage.generate_completion_tree_from_usage()
+            completion.get_suggestion_tree()
         ))
         sys.exit()
 
+    # Completion runs on each TAB press and it does not need any of these
+    # modules, so they are only imported when a command is run.
+    import getopt
+    from pcs import utils
+    from pcs.lib import metadata_cache
+
     argv = argv if argv else sys.argv[1:]
     utils.subprocess_setup()
     global filename, usefile
@@ -85,9 +118,9 @@ def main(argv=None):
             "all", "full", "groups", "local", "wait", "config",
             "start", "enable", "disabled", "off",
             "pacemaker", "corosync",
-            "no-default-ops", "defaults", "nodesc",
+            "no-default-ops", "defaults", "nodesc", "refresh",
             "clone", "master", "name=", "group=", "node=",
-            "from=", "to=", "after=", "before=",
+            "from=", "to=", "after=", "before=", "rc-code=", "json",
             "transport=", "rrpmode=", "ipv6",
             "addr0=", "bcast0=", "mcast0=", "mcastport0=", "ttl0=", "broadcast0",
             "addr1=", "bcast1=", "mcast1=", "mcastport1=", "ttl1=", "broadcast1",
@@ -157,6 +190,8 @@ def main(argv=None):
             sys.exit()
         elif o == "--wait":
             utils.pcs_options[o] = waitsecs
+        elif o == "--refresh":
+            metadata_cache.refresh = True
 
     if len(argv) == 0:
         usage.main()
@@ -172,35 +207,13 @@ def main(argv=None):
     if (command == "-h" or command == "help"):
         usage.main()
         return
-    cmd_map = {
-        "resource": resource.resource_cmd,
-        "cluster": cluster.cluster_cmd,
-        "stonith": stonith.stonith_cmd,
-        "property": prop.property_cmd,
-        "constraint": constraint.constraint_cmd,
-        "acl": acl.acl_cmd,
-        "status": status.status_cmd,
-        "config": config.config_cmd,
-        "pcsd": pcsd.pcsd_cmd,
-        "node": node.node_cmd,
-        "quorum": lambda argv: quorum.quorum_cmd(
-            utils.get_library_wrapper(),
-            argv,
-            utils.get_modificators()
-        ),
-        "qdevice": lambda argv: qdevice.qdevice_cmd(
-            utils.get_library_wrapper(),
-            argv,
-            utils.get_modificators()
-        ),
-    }
-    if command not in cmd_map:
+    if command not in COMMAND_MAP:
         usage.main()
         sys.exit(1)
     # root can run everything directly, also help can be displayed,
     # working on a local file also do not need to run under root
     if (os.getuid() == 0) or (argv and argv[0] == "help") or usefile:
-        cmd_map[command](argv)
+        run_command(command, argv)
         return
     # specific commands need to be run under root account, pass them to pcsd
     # don't forget to allow each command in pcsd.rb in "post /run_pcs do"
@@ -257,4 +270,4 @@ def main(argv=None):
                 sys.stderr.write(std_err)
             sys.exit(exitcode)
             return
-    cmd_map[command](argv)
+    run_command(command, argv)
@@ -5,6 +5,22 @@ from __future__ import (
     unicode_literals,
 )
 
+import json
+import os.path
+
+from pcs import settings
+
+
+# Generated when building pcs (see setup.py) so completion does not need to
+# parse usage.
+SUGGESTION_TREE_FILE = os.path.join(
+    os.path.dirname(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    ),
+    "completion_tree.json"
+)
+SUGGESTION_TREE_CACHE = "completion"
+
 def has_applicable_environment(environment):
     """
     dict environment - very likely os.environ
@@ -99,3 +115,70 @@ def _get_subcommands(suggestion_tree, previous_subcommand_list):
             return []
         subcommand_tree = subcommand_tree[subcommand]
     return sorted(list(subcommand_tree.keys()))
+
+def get_suggestion_tree():
+    """
+    Return the tree of pcs commands used for suggestions
+
+    The tree is loaded from the file generated at install time. If the file
+    is missing or it has been generated by another pcs version, the tree is
+    generated from usage and cached.
+    """
+    tree = load_suggestion_tree(SUGGESTION_TREE_FILE)
+    if tree is not None:
+        return tree
+
+    # usage and the cache are only needed when there is no valid tree file
+    from pcs import usage
+    from pcs.lib import metadata_cache
+    source_file_list = [_get_source_path(usage.__file__)]
+    tree = metadata_cache.get(
+        SUGGESTION_TREE_CACHE, settings.pcs_version, source_file_list
+    )
+    if tree is None:
+        tree = usage.generate_completion_tree_from_usage()
+        metadata_cache.store(
+            SUGGESTION_TREE_CACHE, settings.pcs_version, source_file_list, tree
+        )
+    return tree
+
+def load_suggestion_tree(path):
+    """
+    Return the tree stored in the file, None if it is not usable
+    """
+    try:
+        with open(path) as tree_file:
+            data = json.load(tree_file)
+    except (EnvironmentError, ValueError):
+        return None
+    if (
+        not isinstance(data, dict)
+        or
+        data.get("pcs_version") != settings.pcs_version
+        or
+        not isinstance(data.get("tree"), dict)
+    ):
+        return None
+    return data["tree"]
+
+def write_suggestion_tree(path):
+    """
+    Generate the tree from usage and store it in the file
+    """
+    from pcs import usage
+    with open(path, "w") as tree_file:
+        json.dump(
+            {
+                "pcs_version": settings.pcs_version,
+                "tree": usage.generate_completion_tree_from_usage(),
+            },
+            tree_file,
+            separators=(",", ":"),
+            sort_keys=True
+        )
+
+def _get_source_path(module_path):
+    # the source file changes when usage changes, compiled files may not exist
+    if module_path.endswith((".pyc", ".pyo")):
+        return module_path[:-1]
+    return module_path
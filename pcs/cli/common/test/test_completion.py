@@ -6,7 +6,15 @@ from __future__ import (
 )
 
 from unittest import TestCase
+import json
+import os.path
+import shutil
+import tempfile
 
+from pcs.test.tools.pcs_mock import mock
+
+from pcs import settings, usage
+from pcs.cli.common import completion
 from pcs.cli.common.completion import (
     _find_suggestions,
     has_applicable_environment,
@@ -164,3 +172,52 @@ class SplitWordsTest(TestCase):
             EnvironmentError,
             lambda: _split_words("pcs resource op a ", ["3", "8", "2", "1"])
         )
+
+class SuggestionTreeTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.tree_file = os.path.join(self.tmp_dir, "completion_tree.json")
+        for patcher in [
+            mock.patch.object(
+                completion, "SUGGESTION_TREE_FILE", self.tree_file
+            ),
+            mock.patch.object(settings, "pcs_cache_dir", None),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def write_tree_file(self, data):
+        with open(self.tree_file, "w") as tree_file:
+            json.dump(data, tree_file)
+
+    def test_write_and_load(self):
+        completion.write_suggestion_tree(self.tree_file)
+        self.assertEqual(
+            usage.generate_completion_tree_from_usage(),
+            completion.load_suggestion_tree(self.tree_file)
+        )
+
+    def test_load_missing_file(self):
+        self.assertEqual(None, completion.load_suggestion_tree(self.tree_file))
+
+    def test_load_invalid_file(self):
+        with open(self.tree_file, "w") as tree_file:
+            tree_file.write("not json")
+        self.assertEqual(None, completion.load_suggestion_tree(self.tree_file))
+
+    def test_load_other_version(self):
+        self.write_tree_file({"pcs_version": "0.0.1", "tree": tree})
+        self.assertEqual(None, completion.load_suggestion_tree(self.tree_file))
+
+    @mock.patch("pcs.usage.generate_completion_tree_from_usage")
+    def test_get_tree_from_file(self, mock_generate):
+        self.write_tree_file({"pcs_version": settings.pcs_version, "tree": tree})
+        self.assertEqual(tree, completion.get_suggestion_tree())
+        mock_generate.assert_not_called()
+
+    @mock.patch("pcs.usage.generate_completion_tree_from_usage")
+    def test_get_tree_from_usage(self, mock_generate):
+        mock_generate.return_value = tree
+        self.assertEqual(tree, completion.get_suggestion_tree())
+        mock_generate.assert_called_once_with()
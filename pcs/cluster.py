@@ -8,12 +8,13 @@ from __future__ import (
 import os
 import subprocess
 import re
+import shlex
+import shutil
 import sys
 import socket
 import tempfile
 import datetime
 import json
-import time
 import xml.dom.minidom
 try:
     # python2
@@ -35,7 +36,8 @@ from pcs import (
     utils,
 )
 from pcs.utils import parallel_for_nodes
-from pcs.common import report_codes
+from pcs.cli.common.errors import CmdLineInputError
+from pcs.common import report_codes, tools as common_tools
 from pcs.lib import (
     pacemaker as lib_pacemaker,
     sbd as lib_sbd,
@@ -119,6 +121,8 @@ def cluster_cmd(argv):
         utils.cluster_upgrade()
     elif (sub_cmd == "edit"):
         cluster_edit(argv)
+    elif (sub_cmd == "batch"):
+        cluster_batch(argv)
     elif (sub_cmd == "node"):
         cluster_node(argv)
     elif (sub_cmd == "localnode"):
@@ -146,8 +150,7 @@ def cluster_cmd(argv):
         sys.exit(1)
 
 def sync_nodes(nodes,config):
-    for node in nodes:
-        utils.setCorosyncConfig(node,config)
+    utils.call_for_nodes(utils.setCorosyncConfig, nodes, config)
 
 def cluster_auth(argv):
     if len(argv) == 0:
@@ -351,8 +354,12 @@ def cluster_setup(argv):
         # checks that nodes are authenticated as well
         if "--force" not in utils.pcs_options:
             all_nodes_available = True
-            for node in primary_addr_list:
-                available, message = utils.canAddNodeToCluster(node)
+            availability_list = utils.call_for_nodes(
+                utils.canAddNodeToCluster, primary_addr_list
+            )
+            for node, (available, message) in zip(
+                primary_addr_list, availability_list
+            ):
                 if not available:
                     all_nodes_available = False
                     utils.err("{0}: {1}".format(node, message), False)
@@ -397,8 +404,7 @@ def cluster_setup(argv):
             print("Warning: {0}".format(err_msg))
 
         # send the cluster config
-        for node in primary_addr_list:
-            utils.setCorosyncConfig(node, config)
+        utils.call_for_nodes(utils.setCorosyncConfig, primary_addr_list, config)
 
         # start and enable the cluster if requested
         if "--start" in utils.pcs_options:
@@ -918,24 +924,30 @@ def is_node_fully_started(node_status):
         node_status["online"] and not node_status["pending"]
     )
 
-def wait_for_local_node_started(stop_at, interval):
+# Pacemaker does not notify about nodes joining the cluster, so the node status
+# is polled.
+NODE_START_CHECK_INTERVAL = 2
+
+def wait_for_local_node_started(deadline):
+    runner = utils.cmd_runner()
     try:
-        while True:
-            node_status = lib_pacemaker.get_local_node_status(
-                utils.cmd_runner()
-            )
-            if is_node_fully_started(node_status):
-                return 0, "Started"
-            if datetime.datetime.now() > stop_at:
-                return 1, "Waiting timeout"
-            time.sleep(interval)
+        started = common_tools.wait_for(
+            lambda: is_node_fully_started(
+                lib_pacemaker.get_local_node_status(runner)
+            ),
+            deadline,
+            NODE_START_CHECK_INTERVAL
+        )
     except LibraryError as e:
         return 1, "Unable to get node status: {0}".format(
             "\n".join([item.message for item in e.args])
         )
+    if started:
+        return 0, "Started"
+    return 1, "Waiting timeout"
 
-def wait_for_remote_node_started(node, stop_at, interval):
-    while True:
+def wait_for_remote_node_started(node, deadline):
+    def get_result():
         code, output = utils.getPacemakerNodeStatus(node)
         # HTTP error, permission denied or unable to auth
         # there is no point in trying again as it won't get magically fixed
@@ -949,25 +961,45 @@ def wait_for_remote_node_started(node, stop_at, interval):
             except (ValueError, KeyError):
                 # this won't get fixed either
                 return 1, "Unable to get node status"
-        if datetime.datetime.now() > stop_at:
-            return 1, "Waiting timeout"
-        time.sleep(interval)
+        return None
+
+    result = common_tools.wait_for(
+        get_result,
+        deadline,
+        NODE_START_CHECK_INTERVAL
+    )
+    if result is None:
+        return 1, "Waiting timeout"
+    return result
 
 def wait_for_nodes_started(node_list, timeout=None):
     timeout = 60 * 15 if timeout is None else timeout
-    interval = 2
-    stop_at = datetime.datetime.now() + datetime.timedelta(seconds=timeout)
+    # all nodes share one deadline
+    deadline = common_tools.Deadline(timeout)
     print("Waiting for node(s) to start...")
     if not node_list:
-        code, output = wait_for_local_node_started(stop_at, interval)
+        code, output = wait_for_local_node_started(deadline)
         if code != 0:
             utils.err(output)
         else:
             print(output)
     else:
-        error_list = parallel_for_nodes(
-            wait_for_remote_node_started, node_list, stop_at, interval
+        # The node status request has no timeout of its own, give the last
+        # check some time to finish before the node is given up on.
+        result_list = utils.map_parallel(
+            wait_for_remote_node_started,
+            [([node, deadline], {}) for node in node_list],
+            call_timeout=timeout + NODE_START_CHECK_INTERVAL
         )
+        error_list = []
+        for node, result in zip(node_list, result_list):
+            if result.done:
+                returncode, output = result.value
+            else:
+                returncode, output = 1, "Waiting timeout"
+            print("{0}: {1}".format(node, output.strip()))
+            if returncode != 0:
+                error_list.append(node)
         if error_list:
             utils.err("unable to verify all nodes have started")
 
@@ -986,8 +1018,10 @@ def stop_cluster_nodes(nodes):
     stopping_all = set(nodes) >= set(all_nodes)
     if "--force" not in utils.pcs_options and not stopping_all:
         error_list = []
-        for node in nodes:
-            retval, data = utils.get_remote_quorumtool_output(node)
+        quorum_output_list = utils.call_for_nodes(
+            utils.get_remote_quorumtool_output, nodes
+        )
+        for node, (retval, data) in zip(nodes, quorum_output_list):
             if retval != 0:
                 error_list.append(node + ": " + data)
                 continue
@@ -1239,6 +1273,175 @@ def cluster_edit(argv):
     else:
         utils.err("$EDITOR environment variable is not set")
 
+# Commands which only work with the CIB and therefore can be run in a batch.
+# Subcommands acting on the live cluster (cleanup, restart, fence...) are left
+# out, they would not honor the CIB copy the batch is run against. A command
+# without a subcommand shows the configuration.
+BATCH_COMMANDS = {
+    "acl": (
+        "disable", "enable", "group", "permission", "role", "show", "target",
+        "user",
+    ),
+    "constraint": (
+        "colocation", "delete", "list", "location", "order", "ref", "remove",
+        "rule", "show", "ticket",
+    ),
+    "property": ("list", "set", "show", "unset"),
+    "resource": (
+        "ban", "clear", "clone", "create", "defaults", "delete", "disable",
+        "enable", "group", "manage", "master", "meta", "move", "op", "show",
+        "unclone", "ungroup", "unmanage", "update", "utilization",
+    ),
+    "stonith": ("create", "delete", "level", "show", "update"),
+}
+
+def parse_batch(lines):
+    """
+    Return a list of (line number, argv) tuples for the commands in lines
+
+    Empty lines and comments are skipped, the commands may be prefixed by
+    "pcs".
+    """
+    command_list = []
+    for line_number, line in enumerate(lines, 1):
+        try:
+            argv = shlex.split(line, comments=True)
+        except ValueError as e:
+            raise CmdLineInputError(
+                "line {0}: unable to parse command: {1}".format(line_number, e)
+            )
+        if argv and argv[0] == "pcs":
+            argv = argv[1:]
+        if not argv:
+            continue
+        if argv[0] not in BATCH_COMMANDS:
+            raise CmdLineInputError(
+                "line {0}: '{1}' cannot be run in a batch, supported commands: "
+                "{2}".format(
+                    line_number, argv[0], ", ".join(sorted(BATCH_COMMANDS))
+                )
+            )
+        if [arg for arg in argv if arg.split("=", 1)[0] == "--wait"]:
+            # waiting needs the live cluster, the batch runs on a CIB copy
+            raise CmdLineInputError(
+                "line {0}: --wait cannot be used in a batch".format(line_number)
+            )
+        sub_command = _get_batch_sub_command(argv)
+        if (
+            sub_command is not None
+            and
+            sub_command not in BATCH_COMMANDS[argv[0]]
+        ):
+            raise CmdLineInputError(
+                "line {0}: '{1} {2}' cannot be run in a batch, supported "
+                "subcommands: {3}".format(
+                    line_number, argv[0], sub_command,
+                    ", ".join(BATCH_COMMANDS[argv[0]])
+                )
+            )
+        command_list.append((line_number, argv))
+    return command_list
+
+def _get_batch_sub_command(argv):
+    # options may be placed anywhere on the command line
+    for arg in argv[1:]:
+        if not arg.startswith("-"):
+            return arg
+    return None
+
+def cluster_batch(argv):
+    if len(argv) > 1:
+        usage.cluster(["batch"])
+        sys.exit(1)
+
+    batch_file_name = argv[0] if argv and argv[0] != "-" else None
+    try:
+        if batch_file_name:
+            with open(batch_file_name) as batch_file:
+                lines = batch_file.readlines()
+        else:
+            lines = sys.stdin.readlines()
+    except EnvironmentError as e:
+        utils.err("Unable to read {0}: {1}".format(batch_file_name, e.strerror))
+    try:
+        command_list = parse_batch(lines)
+    except CmdLineInputError as e:
+        utils.err(e.message)
+    if not command_list:
+        print("CIB not updated, no commands to run")
+        return
+
+    # All commands are run against a copy of the CIB. Changes done to the copy
+    # are pushed only if all of them succeed.
+    original_cib_xml = utils.get_cib()
+    fd, batch_cib_file_name = tempfile.mkstemp(suffix=".pcs")
+    try:
+        with os.fdopen(fd, "w") as batch_cib_file:
+            batch_cib_file.write(original_cib_xml)
+        failed_line_number = _run_batch(command_list, batch_cib_file_name)
+        if failed_line_number is not None:
+            utils.err(
+                "Command on line {0} failed, CIB not updated".format(
+                    failed_line_number
+                )
+            )
+        if utils.usefile:
+            try:
+                shutil.copyfile(batch_cib_file_name, utils.filename)
+            except EnvironmentError as e:
+                utils.err("Unable to write to file: {0}: {1}".format(
+                    utils.filename, e.strerror
+                ))
+        else:
+            with open(batch_cib_file_name) as batch_cib_file:
+                batch_cib_xml = batch_cib_file.read()
+            # push only the changes done by the batch so changes done by
+            # others while the batch was running are kept
+            try:
+                lib_pacemaker.push_cib_configuration_xml(
+                    utils.cmd_runner(), batch_cib_xml, original_cib_xml
+                )
+            except LibraryError as e:
+                utils.process_library_reports(e.args)
+        print("CIB updated")
+    finally:
+        os.remove(batch_cib_file_name)
+
+def _run_batch(command_list, cib_file_name):
+    """
+    Run commands on the CIB in the specified file, stop on the first failure
+    and return its line number, return None if all commands succeeded
+    """
+    # avoid circular import, app imports cluster
+    from pcs import app
+
+    common_options = ["-f", cib_file_name]
+    for option in ("--corosync_conf", "--cluster_conf"):
+        if option in utils.pcs_options:
+            common_options.append(
+                "{0}={1}".format(option, utils.pcs_options[option])
+            )
+    if "--debug" in utils.pcs_options:
+        common_options.append("--debug")
+
+    # app.main sets these according to options of each command
+    saved_state = (utils.usefile, utils.filename, utils.pcs_options)
+    try:
+        for line_number, command_argv in command_list:
+            try:
+                app.main(common_options + command_argv)
+            except SystemExit as e:
+                if e.code:
+                    return line_number
+            finally:
+                # library commands write the file directly, do not let the
+                # next command read the CIB loaded by this one
+                utils.invalidate_cib_snapshot()
+        return None
+    finally:
+        utils.usefile, utils.filename, utils.pcs_options = saved_state
+        utils.invalidate_cib_snapshot()
+
 def get_cib(argv):
     if len(argv) > 2:
         usage.cluster(["cib"])
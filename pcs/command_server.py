@@ -0,0 +1,241 @@
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import errno
+import json
+import os
+import select
+import signal
+import socket
+import sys
+import tempfile
+import time
+import traceback
+
+
+# Commands are run in forked children of a process which has already loaded
+# python and all pcs modules. Every child starts with pristine module globals
+# and runs exactly one command, so commands cannot affect each other.
+
+def serve(socket_path, max_workers, request_timeout):
+    """
+    Run pcs commands received on a unix socket until terminated
+
+    A request is one line of json: {"argv": [...], "env": {...}, "stdin": ""}
+    where env holds environment variables to be set for the command (a None
+    value unsets the variable) and env and stdin are optional. The response
+    is one line of json: {"stdout": "", "stderr": "", "exit_code": 0}.
+
+    socket_path -- where to create the socket, accessible by the owner only
+    max_workers -- maximal number of commands running at once
+    request_timeout -- number of seconds after which a command is killed
+    """
+    # load all pcs modules now so the children do not have to
+    from pcs import app
+    app.import_command_modules()
+
+    listener = _create_listener(socket_path)
+    socket_inode = os.stat(socket_path).st_ino
+    children = {}
+
+    def _terminate(signum, frame):
+        raise SystemExit(0)
+    signal.signal(signal.SIGTERM, _terminate)
+
+    try:
+        while True:
+            _reap_children(children)
+            _kill_timed_out_children(children, request_timeout)
+            if len(children) >= max_workers:
+                time.sleep(0.1)
+                continue
+            try:
+                ready = select.select([listener], [], [], 0.5)[0]
+            except select.error as e:
+                if e.args[0] == errno.EINTR:
+                    continue
+                raise
+            if not ready:
+                continue
+            connection, dummy_address = listener.accept()
+            pid = os.fork()
+            if pid == 0:
+                listener.close()
+                _child_main(connection)
+            try:
+                # also done in the child, whichever comes first wins
+                os.setpgid(pid, pid)
+            except OSError:
+                pass
+            children[pid] = (time.time(), connection)
+    finally:
+        listener.close()
+        try:
+            # do not remove a socket created by another server meanwhile
+            if os.stat(socket_path).st_ino == socket_inode:
+                os.remove(socket_path)
+        except OSError:
+            pass
+        for pid in children:
+            _kill_child(pid)
+
+
+def _create_listener(socket_path):
+    try:
+        os.remove(socket_path)
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            raise
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o077)
+    try:
+        listener.bind(socket_path)
+    finally:
+        os.umask(old_umask)
+    listener.listen(64)
+    return listener
+
+
+def _reap_children(children):
+    while children:
+        try:
+            pid, dummy_status = os.waitpid(-1, os.WNOHANG)
+        except OSError as e:
+            if e.errno == errno.ECHILD:
+                return
+            raise
+        if pid == 0:
+            return
+        if pid in children:
+            children.pop(pid)[1].close()
+
+
+def _kill_timed_out_children(children, request_timeout):
+    now = time.time()
+    for pid, (started, connection) in list(children.items()):
+        if started is None or now - started < request_timeout:
+            continue
+        _kill_child(pid)
+        _send_response(connection, {
+            "stdout": "",
+            "stderr": "Error: command timed out after {0} seconds\n".format(
+                request_timeout
+            ),
+            "exit_code": 1,
+        })
+        # keep the child until it is reaped, do not kill it again
+        children[pid] = (None, connection)
+
+
+def _kill_child(pid):
+    # kill processes run by the command as well
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+
+def _child_main(connection):
+    exit_code = 1
+    try:
+        os.setpgid(0, 0)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        request = _read_request(connection)
+        if request is None:
+            response = {
+                "stdout": "",
+                "stderr": "Error: invalid request\n",
+                "exit_code": 1,
+            }
+        else:
+            response = _run_command(
+                request["argv"], request.get("env", {}),
+                request.get("stdin", "")
+            )
+        _send_response(connection, response)
+        # the server holds a copy of the connection, make sure the client
+        # gets the end of the response right away
+        connection.shutdown(socket.SHUT_RDWR)
+        exit_code = 0
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        # never return to the server loop
+        os._exit(exit_code)
+
+
+def _read_request(connection):
+    line = connection.makefile("rb").readline()
+    try:
+        request = json.loads(line.decode("utf-8"))
+    except ValueError:
+        return None
+    if (
+        not isinstance(request, dict)
+        or
+        not isinstance(request.get("argv"), list)
+        or
+        not isinstance(request.get("env", {}), dict)
+    ):
+        return None
+    return request
+
+
+def _send_response(connection, response):
+    try:
+        connection.sendall(json.dumps(response).encode("utf-8") + b"\n")
+    except socket.error:
+        pass
+
+
+def _run_command(argv, env, stdin):
+    for name, value in env.items():
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value
+
+    # Redirect file descriptors so the output of the command is captured
+    # including anything printed by processes it runs.
+    stdin_file = tempfile.TemporaryFile()
+    stdin_file.write(stdin.encode("utf-8"))
+    stdin_file.seek(0)
+    os.dup2(stdin_file.fileno(), 0)
+    stdout_file = tempfile.TemporaryFile()
+    os.dup2(stdout_file.fileno(), 1)
+    stderr_file = tempfile.TemporaryFile()
+    os.dup2(stderr_file.fileno(), 2)
+
+    from pcs import app
+    sys.argv = sys.argv[:1] + argv
+    exit_code = 0
+    try:
+        app.main(argv)
+    except SystemExit as e:
+        if e.code is None:
+            exit_code = 0
+        elif isinstance(e.code, int):
+            exit_code = e.code
+        else:
+            sys.stderr.write("{0}\n".format(e.code))
+            exit_code = 1
+    except Exception:
+        traceback.print_exc()
+        exit_code = 1
+    sys.stdout.flush()
+    sys.stderr.flush()
+
+    return {
+        "stdout": _read_output(stdout_file),
+        "stderr": _read_output(stderr_file),
+        "exit_code": exit_code,
+    }
+
+
+def _read_output(output_file):
+    output_file.seek(0)
+    return output_file.read().decode("utf-8", "replace")
@@ -5,7 +5,10 @@ from __future__ import (
     unicode_literals,
 )
 
+from collections import namedtuple
 import threading
+import time
+import traceback
 
 
 def simple_cache(func):
@@ -23,13 +26,161 @@ def simple_cache(func):
     return wrapper
 
 
-def run_parallel(worker, data_list):
-    thread_list = []
-    for args, kwargs in data_list:
-        thread = threading.Thread(target=worker, args=args, kwargs=kwargs)
-        thread.daemon = True
-        thread_list.append(thread)
-        thread.start()
+TaskResult = namedtuple("TaskResult", ["done", "value", "error"])
 
-    for thread in thread_list:
-        thread.join()
+
+class ParallelExecutor(object):
+    """
+    Runs calls in a limited number of threads and collects their results
+    """
+    def __init__(self, max_workers):
+        """
+        max_workers -- maximal number of threads running at once
+        """
+        self._max_workers = max(max_workers, 1)
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """
+        Do not start any more calls, calls already running are not interrupted
+        """
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def map(self, worker, data_list, call_timeout=None):
+        """
+        Run worker for each item of data_list, return list of TaskResult in
+        the order of data_list
+
+        Return once all calls are finished or given up on. Each call has
+        call_timeout seconds since its own start. A call running past its
+        deadline is given up on and its result has done set to False. Its
+        thread still counts to max_workers until it exits, so the calls
+        waiting for a free thread may wait for it. Once the executor is
+        cancelled, calls which have not been started yet are skipped and
+        their results have done set to False as well. An exception raised by
+        a call is stored in its result as error.
+
+        worker -- callable to be run
+        data_list -- list of tuples: (args, kwargs) for each worker call
+        call_timeout -- number of seconds each call is given, None = no limit
+        """
+        data_list = list(data_list)
+        result_list = [TaskResult(False, None, None)] * len(data_list)
+        lock = threading.Lock()
+        call_finished = threading.Event()
+        # index of a call with its thread running -> deadline of the call
+        running = {}
+        given_up = set()
+
+        def _call(index):
+            args, kwargs = data_list[index]
+            try:
+                result = TaskResult(True, worker(*args, **kwargs), None)
+            except BaseException as e:
+                result = TaskResult(True, None, e)
+            with lock:
+                if index not in given_up:
+                    result_list[index] = result
+                del running[index]
+            call_finished.set()
+
+        next_index = 0
+        while True:
+            with lock:
+                for index, deadline in running.items():
+                    if deadline.expired():
+                        given_up.add(index)
+                while (
+                    len(running) < self._max_workers
+                    and
+                    next_index < len(data_list)
+                    and
+                    not self.cancelled
+                ):
+                    running[next_index] = Deadline(call_timeout)
+                    thread = threading.Thread(target=_call, args=(next_index,))
+                    thread.daemon = True
+                    thread.start()
+                    next_index += 1
+                all_started = self.cancelled or next_index >= len(data_list)
+                waited_for = set(running) - given_up
+                if all_started and not waited_for:
+                    break
+                remaining_list = [
+                    running[index].remaining() for index in waited_for
+                    if running[index].remaining() is not None
+                ]
+                call_finished.clear()
+            # Wait in short steps. Waiting without a timeout cannot be
+            # interrupted by ctrl+c in python2.
+            call_finished.wait(min([1] + remaining_list))
+        # calls given up on must not change the returned list
+        return list(result_list)
+
+
+def run_parallel(worker, data_list, max_workers):
+    """
+    Run worker for each item of data_list in separate threads, wait for all
+    of them to finish
+
+    An exception raised by a call is printed, it does not affect other calls.
+
+    worker -- callable to be run
+    data_list -- list of tuples: (args, kwargs) for each worker call
+    max_workers -- maximal number of threads running at once
+    """
+    def _worker(*args, **kwargs):
+        try:
+            worker(*args, **kwargs)
+        except Exception:
+            # an exception in one call must not affect the other calls
+            traceback.print_exc()
+
+    ParallelExecutor(max_workers).map(_worker, data_list)
+
+
+class Deadline(object):
+    """
+    Time budget shared by all steps of a waiting operation
+    """
+    def __init__(self, timeout):
+        """
+        timeout -- number of seconds till the deadline, None means no deadline
+        """
+        self._stop_at = None if timeout is None else time.time() + timeout
+
+    def remaining(self):
+        """
+        Return number of seconds till the deadline, None if there is no deadline
+        """
+        if self._stop_at is None:
+            return None
+        return max(0, self._stop_at - time.time())
+
+    def expired(self):
+        return self._stop_at is not None and time.time() >= self._stop_at
+
+
+def wait_for(condition, deadline, interval):
+    """
+    Call condition until it returns a true value or the deadline expires,
+    return the last value returned by condition
+
+    The condition is checked right away and then every interval seconds. The
+    last check is done when the deadline expires. Use this only if there is no
+    way to get notified about the awaited state.
+
+    callable condition -- returns a true value when the waiting is done
+    Deadline deadline -- when to give up
+    number interval -- seconds to wait between checks
+    """
+    while True:
+        result = condition()
+        if result or deadline.expired():
+            return result
+        remaining = deadline.remaining()
+        time.sleep(interval if remaining is None else min(interval, remaining))
@@ -19,14 +19,6 @@ import pwd
 import grp
 import time
 
-try:
-    import clufter.format_manager
-    import clufter.filter_manager
-    import clufter.command_manager
-    no_clufter = False
-except ImportError:
-    no_clufter = True
-
 from pcs import (
     cluster,
     constraint,
@@ -249,9 +241,9 @@ def config_restore_remote(infile_name, infile_obj):
         utils.err("no nodes found in the tarball")
 
     err_msgs = []
-    for node in node_list:
+    status_list = utils.call_for_nodes(utils.checkStatus, node_list)
+    for node, (retval, output) in zip(node_list, status_list):
         try:
-            retval, output = utils.checkStatus(node)
             if retval != 0:
                 err_msgs.append(output)
                 continue
@@ -273,8 +265,10 @@ def config_restore_remote(infile_name, infile_obj):
     # Temporarily disable config files syncing thread in pcsd so it will not
     # rewrite restored files. 10 minutes should be enough time to restore.
     # If node returns HTTP 404 it does not support config syncing at all.
-    for node in node_list:
-        retval, output = utils.pauseConfigSyncing(node, 10 * 60)
+    pause_list = utils.call_for_nodes(
+        utils.pauseConfigSyncing, node_list, 10 * 60
+    )
+    for retval, output in pause_list:
         if not (retval == 0 or output.endswith("(HTTP error: 404)")):
             utils.err(output)
 
@@ -286,8 +280,10 @@ def config_restore_remote(infile_name, infile_obj):
             tarball_data = tarball.read()
 
     error_list = []
-    for node in node_list:
-        retval, error = utils.restoreConfig(node, tarball_data)
+    restore_list = utils.call_for_nodes(
+        utils.restoreConfig, node_list, tarball_data
+    )
+    for retval, error in restore_list:
         if retval != 0:
             error_list.append(error)
     if error_list:
@@ -519,7 +515,7 @@ def config_checkpoint_restore(argv):
     utils.replace_cib_configuration(snapshot_dom)
 
 def config_import_cman(argv):
-    if no_clufter:
+    if not _import_clufter():
         utils.err("Unable to perform a CMAN cluster conversion due to missing python-clufter package")
     # prepare convertor options
     cluster_conf = settings.cluster_conf_file
@@ -696,7 +692,7 @@ def config_import_cman(argv):
     tar_data.close()
 
 def config_export_pcs_commands(argv, verbose=False):
-    if no_clufter:
+    if not _import_clufter():
         utils.err(
             "Unable to perform export due to missing python-clufter package"
         )
@@ -769,6 +765,17 @@ def config_export_pcs_commands(argv, verbose=False):
     if not ok:
         utils.err(message)
 
+def _import_clufter():
+    # clufter takes long to load and it is only needed for cluster conversions
+    global clufter
+    try:
+        import clufter.format_manager
+        import clufter.filter_manager
+        import clufter.command_manager
+    except ImportError:
+        return False
+    return True
+
 def run_clufter(cmd_name, cmd_args, debug, force, err_prefix):
     try:
         result = None
@@ -6,10 +6,13 @@ from __future__ import (
 )
 
 import sys
+import weakref
 import xml.dom.minidom
 from collections import defaultdict
 from xml.dom.minidom import parseString
 
+from lxml import etree
+
 import pcs.cli.constraint_colocation.command as colocation_command
 import pcs.cli.constraint_order.command as order_command
 from pcs import (
@@ -24,6 +27,7 @@ from pcs.cli import (
 from pcs.cli.constraint_ticket import command as ticket_command
 from pcs.cli.common.errors import CmdLineInputError
 from pcs.lib.cib.constraint import resource_set
+from pcs.lib.cib.constraint.constraint import SignatureIndex
 from pcs.lib.cib.constraint.order import ATTRIB as order_attrib
 from pcs.lib.errors import LibraryError
 
@@ -156,10 +160,10 @@ def colocation_rm(argv):
 
     for co_loc in constraintsElement.getElementsByTagName('rsc_colocation')[:]:
         if co_loc.getAttribute("rsc") == resource1 and co_loc.getAttribute("with-rsc") == resource2:
-            constraintsElement.removeChild(co_loc)
+            remove_constraint_element(co_loc)
             elementFound = True
         if co_loc.getAttribute("rsc") == resource2 and co_loc.getAttribute("with-rsc") == resource1:
-            constraintsElement.removeChild(co_loc)
+            remove_constraint_element(co_loc)
             elementFound = True
 
     if elementFound == True:
@@ -290,26 +294,22 @@ def colocation_add(argv):
                     for dup in duplicates
                 ])
             )
-    constraintsElement.appendChild(element)
+    add_constraint_element(constraintsElement, element)
     utils.replace_cib_configuration(dom)
 
 def colocation_find_duplicates(dom, constraint_el):
-    def normalize(const_el):
-        return (
-            const_el.getAttribute("rsc"),
-            const_el.getAttribute("with-rsc"),
-            const_el.getAttribute("rsc-role").capitalize() or DEFAULT_ROLE,
-            const_el.getAttribute("with-rsc-role").capitalize() or DEFAULT_ROLE,
-        )
-
-    normalized_el = normalize(constraint_el)
-    return [
-        other_el
-        for other_el in dom.getElementsByTagName("rsc_colocation")
-        if not other_el.getElementsByTagName("resource_set")
-            and constraint_el is not other_el
-            and normalized_el == normalize(other_el)
-    ]
+    return _find_duplicates(dom, constraint_el, _colocation_signature)
+
+def _colocation_signature(constraint_el):
+    if constraint_el.getElementsByTagName("resource_set"):
+        return None
+    return (
+        constraint_el.getAttribute("rsc"),
+        constraint_el.getAttribute("with-rsc"),
+        constraint_el.getAttribute("rsc-role").capitalize() or DEFAULT_ROLE,
+        constraint_el.getAttribute("with-rsc-role").capitalize()
+            or DEFAULT_ROLE,
+    )
 
 def order_rm(argv):
     if len(argv) == 0:
@@ -322,7 +322,7 @@ def order_rm(argv):
     for resource in argv:
         for ord_loc in constraintsElement.getElementsByTagName('rsc_order')[:]:
             if ord_loc.getAttribute("first") == resource or ord_loc.getAttribute("then") == resource:
-                constraintsElement.removeChild(ord_loc)
+                remove_constraint_element(ord_loc)
                 elementFound = True
 
         resource_refs_to_remove = []
@@ -331,6 +331,8 @@ def order_rm(argv):
                 resource_refs_to_remove.append(ord_set)
                 elementFound = True
 
+        if resource_refs_to_remove:
+            drop_constraint_index(dom)
         for res_ref in resource_refs_to_remove:
             res_set = res_ref.parentNode
             res_order = res_set.parentNode
@@ -472,7 +474,7 @@ def order_add(argv,returnElementOnly=False):
     element.setAttribute("then",resource2)
     for order_opt in order_options:
         element.setAttribute(order_opt[0], order_opt[1])
-    constraintsElement.appendChild(element)
+    add_constraint_element(constraintsElement, element)
     if "--force" not in utils.pcs_options:
         duplicates = order_find_duplicates(constraintsElement, element)
         if duplicates:
@@ -495,22 +497,17 @@ def order_add(argv,returnElementOnly=False):
         return element.toxml()
 
 def order_find_duplicates(dom, constraint_el):
-    def normalize(constraint_el):
-        return (
-            constraint_el.getAttribute("first"),
-            constraint_el.getAttribute("then"),
-            constraint_el.getAttribute("first-action").lower() or DEFAULT_ACTION,
-            constraint_el.getAttribute("then-action").lower() or DEFAULT_ACTION,
-        )
-
-    normalized_el = normalize(constraint_el)
-    return [
-        other_el
-        for other_el in dom.getElementsByTagName("rsc_order")
-        if not other_el.getElementsByTagName("resource_set")
-            and constraint_el is not other_el
-            and normalized_el == normalize(other_el)
-    ]
+    return _find_duplicates(dom, constraint_el, _order_signature)
+
+def _order_signature(constraint_el):
+    if constraint_el.getElementsByTagName("resource_set"):
+        return None
+    return (
+        constraint_el.getAttribute("first"),
+        constraint_el.getAttribute("then"),
+        constraint_el.getAttribute("first-action").lower() or DEFAULT_ACTION,
+        constraint_el.getAttribute("then-action").lower() or DEFAULT_ACTION,
+    )
 
 # Show the currently configured location constraints by node or resource
 def location_show(argv):
@@ -762,7 +759,7 @@ def location_add(argv,rm=False):
             elementsToRemove.append(rsc_loc)
 
     for etr in elementsToRemove:
-        constraintsElement.removeChild(etr)
+        remove_constraint_element(etr)
 
     if (rm == True and len(elementsToRemove) == 0):
         utils.err("resource location id: " + constraint_id + " not found.")
@@ -775,7 +772,7 @@ def location_add(argv,rm=False):
         element.setAttribute("score",score)
         for option in options:
             element.setAttribute(option[0], option[1])
-        constraintsElement.appendChild(element)
+        add_constraint_element(constraintsElement, element)
 
     utils.replace_cib_configuration(dom)
 
@@ -807,8 +804,6 @@ def location_rule(argv):
         cib, constraints = getCurrentConstraints(utils.get_cib_dom())
         lc = cib.createElement("rsc_location")
 
-
-    constraints.appendChild(lc)
     if options.get("constraint-id"):
         id_valid, id_error = utils.validate_xml_id(
             options["constraint-id"], 'constraint id'
@@ -825,8 +820,12 @@ def location_rule(argv):
     else:
         lc.setAttribute("id", utils.find_unique_id(cib, "location-" + res_name))
     lc.setAttribute("rsc", res_name)
+    # rule ids are generated unique in the whole cib, lc must be in it already
+    add_constraint_element(constraints, lc)
 
     rule_utils.dom_rule_add(lc, options, rule_argv)
+    # the signature of lc has been changed by adding its rules
+    drop_constraint_index(cib)
     location_rule_check_duplicates(constraints, lc)
     utils.replace_cib_configuration(cib)
 
@@ -847,30 +846,34 @@ def location_rule_check_duplicates(dom, constraint_el):
             )
 
 def location_rule_find_duplicates(dom, constraint_el):
-    def normalize(constraint_el):
-        return (
-            constraint_el.getAttribute("rsc"),
-            [
-                rule_utils.ExportAsExpression().get_string(rule_el, True)
-                for rule_el in constraint_el.getElementsByTagName("rule")
-            ]
-        )
+    return _find_duplicates(dom, constraint_el, _location_rule_signature)
+
+def _location_rule_signature(constraint_el):
+    rule_list = constraint_el.getElementsByTagName("rule")
+    if not rule_list:
+        return None
+    return (
+        constraint_el.getAttribute("rsc"),
+        tuple([
+            rule_utils.ExportAsExpression().get_string(rule_el, True)
+            for rule_el in rule_list
+        ])
+    )
 
-    normalized_el = normalize(constraint_el)
-    return [
-        other_el
-        for other_el in dom.getElementsByTagName("rsc_location")
-        if other_el.getElementsByTagName("rule")
-            and constraint_el is not other_el
-            and normalized_el == normalize(other_el)
-    ]
+def _find_duplicates(dom, constraint_el, get_signature):
+    # Signatures of constraints are computed once for each dom and updated as
+    # constraints are added. Constraints with no signature are never
+    # duplicates.
+    return _get_signature_index(
+        dom, constraint_el.tagName, get_signature
+    ).find_duplicates(constraint_el)
 
 # Grabs the current constraints and returns the dom and constraint element
 def getCurrentConstraints(passed_dom=None):
     if passed_dom:
         dom = passed_dom
     else:
-        current_constraints_xml = utils.get_cib_xpath('//constraints')
+        current_constraints_xml = utils.get_cib_section_xml("constraints")
         if current_constraints_xml == "":
             utils.err("unable to process cib")
         # Verify current constraint doesn't already exist
@@ -910,7 +913,7 @@ def constraint_rm(argv,returnStatus=False, constraintsElement=None, passed_dom=N
         if co.nodeType != xml.dom.Node.ELEMENT_NODE:
             continue
         if co.getAttribute("id") == c_id:
-            constraintsElement.removeChild(co)
+            remove_constraint_element(co)
             elementFound = True
 
     if not elementFound:
@@ -918,9 +921,10 @@ def constraint_rm(argv,returnStatus=False, constraintsElement=None, passed_dom=N
             if rule.getAttribute("id") == c_id:
                 elementFound = True
                 parent = rule.parentNode
+                drop_constraint_index(parent)
                 parent.removeChild(rule)
                 if len(parent.getElementsByTagName("rule")) == 0:
-                    parent.parentNode.removeChild(parent)
+                    remove_constraint_element(parent)
 
     if elementFound == True:
         if passed_dom:
@@ -941,9 +945,13 @@ def constraint_ref(argv):
         usage.constraint()
         sys.exit(1)
 
+    # all resources are looked up in one dom so constraints are indexed once
+    dom = parseString(etree.tostring(
+        utils.get_cib_sections(["resources", "constraints"])
+    ).decode())
     for arg in argv:
         print("Resource: %s" % arg)
-        constraints,set_constraints = find_constraints_containing(arg)
+        constraints,set_constraints = find_constraints_containing(arg, dom)
         if len(constraints) == 0 and len(set_constraints) == 0:
             print("  No Matches.")
         else:
@@ -953,87 +961,210 @@ def constraint_ref(argv):
                 print("  " + constraint)
 
 def remove_constraints_containing(resource_id,output=False,constraints_element = None, passed_dom=None):
-    constraints,set_constraints = find_constraints_containing(resource_id, passed_dom)
-    for c in constraints:
+    dom = passed_dom if passed_dom else utils.get_cib_dom()
+    index = _get_constraint_index(dom)
+    constraint_list = _find_constraint_elements(index, resource_id)
+    for constraint_el in constraint_list:
+        if constraint_el.parentNode is None:
+            # listed for both the resource and its clone
+            continue
         if output == True:
-            print("Removing Constraint - " + c)
-        if constraints_element != None:
-            constraint_rm([c], True, constraints_element, passed_dom=passed_dom)
-        else:
-            constraint_rm([c], passed_dom=passed_dom)
-
-    if len(set_constraints) != 0:
-        (dom, constraintsElement) = getCurrentConstraints(passed_dom)
-        for c in constraintsElement.getElementsByTagName("resource_ref")[:]:
-            # If resource id is in a set, remove it from the set, if the set
-            # is empty, then we remove the set, if the parent of the set
-            # is empty then we remove it
-            if c.getAttribute("id") == resource_id:
-                pn = c.parentNode
-                pn.removeChild(c)
-                if output == True:
-                    print("Removing %s from set %s" % (resource_id,pn.getAttribute("id")))
-                if pn.getElementsByTagName("resource_ref").length == 0:
-                    print("Removing set %s" % pn.getAttribute("id"))
-                    pn2 = pn.parentNode
-                    pn2.removeChild(pn)
-                    if pn2.getElementsByTagName("resource_set").length == 0:
-                        pn2.parentNode.removeChild(pn2)
-                        print("Removing constraint %s" % pn2.getAttribute("id"))
-        if passed_dom:
-            return dom
-        utils.replace_cib_configuration(dom)
+            print("Removing Constraint - " + constraint_el.getAttribute("id"))
+        remove_constraint_element(constraint_el)
+
+    # If resource id is in a set, remove it from the set, if the set is empty,
+    # then we remove the set, if the parent of the set is empty then we remove
+    # it
+    for c in _get_indexed_resource_refs(index, resource_id):
+        pn = c.parentNode
+        _unindex_resource_ref(index, c)
+        pn.removeChild(c)
+        if output == True:
+            print("Removing %s from set %s" % (resource_id,pn.getAttribute("id")))
+        if pn.getElementsByTagName("resource_ref").length == 0:
+            print("Removing set %s" % pn.getAttribute("id"))
+            pn2 = pn.parentNode
+            pn2.removeChild(pn)
+            if pn2.getElementsByTagName("resource_set").length == 0:
+                remove_constraint_element(pn2)
+                print("Removing constraint %s" % pn2.getAttribute("id"))
+    if passed_dom:
+        return dom
+    utils.replace_cib_configuration(dom)
 
 def find_constraints_containing(resource_id, passed_dom=None):
     if passed_dom:
         dom = passed_dom
     else:
         dom = utils.get_cib_dom()
-    constraints_found = []
-    set_constraints = []
-
-    resources = dom.getElementsByTagName("primitive")
-    resource_match = None
-    for res in resources:
-        if res.getAttribute("id") == resource_id:
-            resource_match = res
-            break
-
-    if resource_match:
-        if resource_match.parentNode.tagName == "master" or resource_match.parentNode.tagName == "clone":
-            constraints_found,set_constraints = find_constraints_containing(resource_match.parentNode.getAttribute("id"), dom)
-
-    constraints = dom.getElementsByTagName("constraints")
-    if len(constraints) == 0:
+    index = _get_constraint_index(dom)
+    if index["constraints"] is None:
         return [],[]
-    else:
-        constraints = constraints[0]
-
-    myConstraints = constraints.getElementsByTagName("rsc_colocation")
-    myConstraints += constraints.getElementsByTagName("rsc_location")
-    myConstraints += constraints.getElementsByTagName("rsc_order")
-    myConstraints += constraints.getElementsByTagName("rsc_ticket")
-    attr_to_match = ["rsc", "first", "then", "with-rsc", "first", "then"]
-    for c in myConstraints:
-        for attr in attr_to_match:
-            if c.getAttribute(attr) == resource_id:
-                constraints_found.append(c.getAttribute("id"))
-                break
 
-    setConstraints = constraints.getElementsByTagName("resource_ref")
-    for c in setConstraints:
-        if c.getAttribute("id") == resource_id:
-            set_constraints.append(c.parentNode.parentNode.getAttribute("id"))
+    constraints_found = [
+        constraint_el.getAttribute("id")
+        for constraint_el in _find_constraint_elements(index, resource_id)
+    ]
+    set_constraints = [
+        resource_ref.parentNode.parentNode.getAttribute("id")
+        for resource_ref in _get_indexed_resource_refs(index, resource_id)
+    ]
+    parent_id = _get_indexed_clone_ms_parent_id(index, resource_id)
+    if parent_id:
+        set_constraints.extend([
+            resource_ref.parentNode.parentNode.getAttribute("id")
+            for resource_ref in _get_indexed_resource_refs(index, parent_id)
+        ])
 
     # Remove duplicates
     set_constraints = list(set(set_constraints))
     return constraints_found,set_constraints
 
+# Indexes of constraints by the resources they reference and by their
+# signatures, one for each dom searched for them. Removing many resources from
+# one dom does not scan all constraints for each of them and added constraints
+# are checked for duplicates without normalizing all constraints again. An
+# index is kept in sync with its dom by add_constraint_element and
+# remove_constraint_element. Any other change of constraints in the dom must
+# drop the index using drop_constraint_index.
+_constraint_index_cache = weakref.WeakKeyDictionary()
+
+_CONSTRAINT_TAGS = ("rsc_colocation", "rsc_location", "rsc_order", "rsc_ticket")
+_CONSTRAINT_RESOURCE_ATTRS = ("rsc", "first", "then", "with-rsc")
+
+def _get_document(dom):
+    return dom if dom.ownerDocument is None else dom.ownerDocument
+
+def _get_constraint_index(dom):
+    document = _get_document(dom)
+    index = _constraint_index_cache.get(document)
+    if index is not None:
+        return index
+
+    primitives = {}
+    for primitive in document.getElementsByTagName("primitive"):
+        primitives.setdefault(primitive.getAttribute("id"), primitive)
+    constraints_list = document.getElementsByTagName("constraints")
+    index = {
+        "dom": document,
+        "constraints": constraints_list[0] if constraints_list else None,
+        "primitives": primitives,
+        "plain": defaultdict(list),
+        "resource_refs": defaultdict(list),
+        # built on demand for each constraint tag by _get_signature_index
+        "signatures": {},
+    }
+    if index["constraints"] is not None:
+        for tag in _CONSTRAINT_TAGS:
+            for constraint_el in index["constraints"].getElementsByTagName(tag):
+                _index_constraint(index, constraint_el)
+    _constraint_index_cache[document] = index
+    return index
+
+def _index_constraint(index, constraint_el):
+    if constraint_el.tagName in index["signatures"]:
+        index["signatures"][constraint_el.tagName].add(constraint_el)
+    for resource_id in _get_constraint_resource_ids(constraint_el):
+        index["plain"][resource_id].append(constraint_el)
+    for resource_ref in constraint_el.getElementsByTagName("resource_ref"):
+        index["resource_refs"][resource_ref.getAttribute("id")].append(
+            resource_ref
+        )
+
+def _unindex_constraint(index, constraint_el):
+    if constraint_el.tagName in index["signatures"]:
+        index["signatures"][constraint_el.tagName].remove(constraint_el)
+    for resource_id in _get_constraint_resource_ids(constraint_el):
+        index["plain"][resource_id].remove(constraint_el)
+    for resource_ref in constraint_el.getElementsByTagName("resource_ref"):
+        _unindex_resource_ref(index, resource_ref)
+
+def _unindex_resource_ref(index, resource_ref):
+    index["resource_refs"][resource_ref.getAttribute("id")].remove(
+        resource_ref
+    )
+
+def _get_signature_index(dom, tag_name, get_signature):
+    index = _get_constraint_index(dom)
+    if tag_name not in index["signatures"]:
+        index["signatures"][tag_name] = SignatureIndex(
+            get_signature,
+            []
+                if index["constraints"] is None
+                else index["constraints"].getElementsByTagName(tag_name)
+        )
+    return index["signatures"][tag_name]
+
+def drop_constraint_index(dom):
+    _constraint_index_cache.pop(_get_document(dom), None)
+
+def add_constraint_element(constraints_el, constraint_el):
+    constraints_el.appendChild(constraint_el)
+    utils.dom_id_index_add(constraint_el)
+    index = _constraint_index_cache.get(_get_document(constraints_el))
+    if index is None:
+        return
+    if index["constraints"] is constraints_el:
+        _index_constraint(index, constraint_el)
+    else:
+        drop_constraint_index(constraints_el)
+
+def remove_constraint_element(constraint_el):
+    index = _constraint_index_cache.get(_get_document(constraint_el))
+    if index is not None:
+        if index["constraints"] is constraint_el.parentNode:
+            _unindex_constraint(index, constraint_el)
+        else:
+            drop_constraint_index(constraint_el)
+    constraint_el.parentNode.removeChild(constraint_el)
+
+def _get_constraint_resource_ids(constraint_el):
+    resource_id_list = []
+    for attr in _CONSTRAINT_RESOURCE_ATTRS:
+        value = constraint_el.getAttribute(attr)
+        if value and value not in resource_id_list:
+            resource_id_list.append(value)
+    return resource_id_list
+
+def _find_constraint_elements(index, resource_id):
+    # constraints of a clone or master apply to its primitive as well
+    constraint_list = []
+    parent_id = _get_indexed_clone_ms_parent_id(index, resource_id)
+    if parent_id:
+        constraint_list.extend(index["plain"].get(parent_id, []))
+    constraint_list.extend(index["plain"].get(resource_id, []))
+    return constraint_list
+
+def _get_indexed_resource_refs(index, resource_id):
+    return list(index["resource_refs"].get(resource_id, []))
+
+def _get_indexed_clone_ms_parent_id(index, resource_id):
+    # Resources are not changed through the index, a found primitive is checked
+    # to still have the id and to still be in the dom.
+    primitive = index["primitives"].get(resource_id)
+    if (
+        primitive is None
+        or
+        primitive.getAttribute("id") != resource_id
+        or
+        not _is_descendant(primitive, index["dom"])
+    ):
+        return None
+    if primitive.parentNode.tagName in ("clone", "master"):
+        return primitive.parentNode.getAttribute("id")
+    return None
+
+def _is_descendant(element, ancestor):
+    parent = element.parentNode
+    while parent is not None and parent is not ancestor:
+        parent = parent.parentNode
+    return parent is ancestor
+
 def remove_constraints_containing_node(dom, node, output=False):
     for constraint in find_constraints_containing_node(dom, node):
         if output:
             print("Removing Constraint - %s" % constraint.getAttribute("id"))
-        constraint.parentNode.removeChild(constraint)
+        remove_constraint_element(constraint)
     return dom
 
 def find_constraints_containing_node(dom, node):
@@ -1062,6 +1193,8 @@ def constraint_resource_update(old_id, passed_dom=None):
             for attr in attrs_to_update:
                 if constraint.getAttribute(attr) == old_id:
                     constraint.setAttribute(attr, new_id)
+        # constraints have been moved to other resources
+        drop_constraint_index(dom)
 
         if passed_dom is None:
             utils.replace_cib_configuration(dom)
@@ -1092,6 +1225,7 @@ def constraint_rule(argv):
             utils.err("Unable to find constraint: " + constraint_id)
         options, rule_argv = rule_utils.parse_argv(argv)
         rule_utils.dom_rule_add(constraint, options, rule_argv)
+        drop_constraint_index(cib)
         location_rule_check_duplicates(cib, constraint)
         utils.replace_cib_configuration(cib)
 
@@ -14,6 +14,7 @@ from pcs.lib.cib.tools import (
     does_id_exist,
     find_unique_id,
     get_acls,
+    get_id_index,
 )
 
 class AclRoleNotFound(LibraryError):
@@ -59,6 +60,7 @@ def create_role(tree, role_id, description=""):
     role = etree.SubElement(get_acls(tree), "acl_role", id=role_id)
     if description:
         role.set("description", description)
+    get_id_index(tree).add(role)
 
 def provide_role(tree, role_id):
     """
@@ -91,10 +93,12 @@ def add_permissions_to_role(tree, role_id, permission_info_list):
         )
         perm.set("kind", permission)
         perm.set(area_type_attribute_map[scope_type], scope)
+        get_id_index(tree).add(perm)
 
 def remove_permissions_referencing(tree, reference):
     xpath = './/acl_permission[@reference="{0}"]'.format(reference)
     for permission in tree.findall(xpath):
+        get_id_index(tree).remove(permission)
         permission.getparent().remove(permission)
 
 def dom_remove_permissions_referencing(dom, reference):
@@ -12,7 +12,12 @@ from pcs.common import report_codes
 from pcs.lib import reports
 from pcs.lib.cib import resource
 from pcs.lib.cib.constraint import resource_set
-from pcs.lib.cib.tools import export_attributes, find_unique_id, find_parent
+from pcs.lib.cib.tools import (
+    export_attributes,
+    find_parent,
+    find_unique_id,
+    get_id_index,
+)
 from pcs.lib.errors import LibraryError, ReportItemSeverity
 
 
@@ -93,27 +98,76 @@ def create_id(cib, type_prefix, resource_set_list):
     ])
     return find_unique_id(cib, id)
 
-def have_duplicate_resource_sets(element, other_element):
-    get_id_set_list = lambda element: [
-        resource_set.get_resource_id_set_list(resource_set_item)
+def get_resource_sets_signature(element):
+    """
+    Return hashable value which is the same for constraints with the same
+    resources in the same resource sets
+
+    etree element constraint element
+    """
+    return tuple(
+        tuple(resource_set.get_resource_id_set_list(resource_set_item))
         for resource_set_item in element.findall(".//resource_set")
-    ]
-    return get_id_set_list(element) == get_id_set_list(other_element)
+    )
+
+class SignatureIndex(object):
+    """
+    Index of constraints by their signature
+
+    Constraints with the same signature are duplicates. The index is built by
+    one pass through the specified constraints, signatures of constraints
+    created later are computed once when the constraints are added to the
+    index. Constraints with the None signature are not indexed and have no
+    duplicates.
+    """
+    def __init__(self, get_signature, element_list=()):
+        """
+        callable get_signature takes an element and returns its hashable
+            signature
+        iterable element_list constraint elements to index
+        """
+        self.__get_signature = get_signature
+        self.__elements = dict()
+        for element in element_list:
+            self.add(element)
+
+    def add(self, element):
+        signature = self.__get_signature(element)
+        if signature is not None:
+            self.__elements.setdefault(signature, []).append(element)
+
+    def remove(self, element):
+        element_list = self.__elements.get(self.__get_signature(element), [])
+        for i, indexed_element in enumerate(element_list):
+            if indexed_element is element:
+                del element_list[i]
+                return
+
+    def find_duplicates(self, element):
+        """
+        Return indexed constraints with the same signature as element, other
+        than element itself
+        """
+        signature = self.__get_signature(element)
+        if signature is None:
+            return []
+        return [
+            other_element
+            for other_element in self.__elements.get(signature, [])
+            if other_element is not element
+        ]
 
 def check_is_without_duplication(
-    report_processor,
-    constraint_section, element, are_duplicate, export_element,
+    report_processor, signature_index, element, export_element,
     duplication_alowed=False
 ):
-    duplicate_element_list = [
-        duplicate_element
-        for duplicate_element in constraint_section.findall(".//"+element.tag)
-        if(
-            element is not duplicate_element
-            and
-            are_duplicate(element, duplicate_element)
-        )
-    ]
+    """
+    Report constraints which are duplicates of the specified one
+
+    SignatureIndex signature_index index of constraints of the element's kind
+        in the cib the element is being added to
+    """
+    duplicate_element_list = signature_index.find_duplicates(element)
     if not duplicate_element_list:
         return
 
@@ -134,6 +188,7 @@ def create_with_set(constraint_section, tag_name, options, resource_set_list):
         raise LibraryError(reports.empty_resource_set_list())
     element = etree.SubElement(constraint_section, tag_name)
     element.attrib.update(options)
+    get_id_index(constraint_section).add(element)
     for resource_set_item in resource_set_list:
         resource_set.create(element, resource_set_item)
     return element
@@ -11,6 +11,7 @@ from pcs.lib import reports
 from pcs.lib.cib.tools import (
     find_unique_id,
     export_attributes,
+    get_id_index,
 )
 from pcs.lib.errors import LibraryError
 
@@ -58,6 +59,7 @@ def create(parent, resource_set):
 
     for id in resource_set["ids"]:
         etree.SubElement(element, "resource_ref").attrib["id"] = id
+    get_id_index(parent).add(element)
 
     return element
 
@@ -101,17 +101,16 @@ def prepare_options_plain(cib, options, ticket, resource_id):
 def create_plain(constraint_section, options):
     element = etree.SubElement(constraint_section, TAG_NAME)
     element.attrib.update(options)
+    tools.get_id_index(constraint_section).add(element)
     return element
 
-def are_duplicate_plain(element, other_element):
-    return all(
-        element.attrib.get(name, "") == other_element.attrib.get(name, "")
-        for name in ("ticket", "rsc", "rsc-role")
+def get_signature_plain(element):
+    return tuple(
+        element.attrib.get(name, "") for name in ("ticket", "rsc", "rsc-role")
     )
 
-def are_duplicate_with_resource_set(element, other_element):
+def get_signature_with_resource_set(element):
     return (
-        element.attrib["ticket"] == other_element.attrib["ticket"]
-        and
-        constraint.have_duplicate_resource_sets(element, other_element)
+        element.attrib["ticket"],
+        constraint.get_resource_sets_signature(element),
     )
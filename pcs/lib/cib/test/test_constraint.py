@@ -189,11 +189,8 @@ class CreateIdTest(TestCase):
         mock_extract.assert_called_once_with("resource_set_list")
         mock_find_id.assert_called_once_with("cib", "pcs_PREFIX_set_A_B_set_C")
 
-def fixture_constraint_section(return_value):
-    constraint_section = mock.MagicMock()
-    constraint_section.findall = mock.MagicMock()
-    constraint_section.findall.return_value = return_value
-    return constraint_section
+def fixture_signature_index(element_list):
+    return constraint.SignatureIndex(lambda element: "signature", element_list)
 
 @mock.patch("pcs.lib.cib.constraint.constraint.export_with_set")
 class CheckIsWithoutDuplicationTest(TestCase):
@@ -206,8 +203,7 @@ class CheckIsWithoutDuplicationTest(TestCase):
         assert_raise_library_error(
             lambda: constraint.check_is_without_duplication(
                 report_processor,
-                fixture_constraint_section(["duplicate_element"]), element,
-                are_duplicate=lambda e1, e2: True,
+                fixture_signature_index(["duplicate_element"]), element,
                 export_element=constraint.export_with_set,
             ),
             (
@@ -220,6 +216,40 @@ class CheckIsWithoutDuplicationTest(TestCase):
                 report_codes.FORCE_CONSTRAINT_DUPLICATE
             ),
         )
+    def test_only_same_signature_is_duplicate(self, export_with_set):
+        export_with_set.side_effect = lambda element: element.attrib["id"]
+        constraint_section = etree.fromstring("""
+            <constraints>
+                <rsc_order id="o1" first="A" then="B"/>
+                <rsc_order id="o2" first="B" then="A"/>
+                <rsc_order id="o3" first="A" then="B"/>
+            </constraints>
+        """)
+        signature_index = constraint.SignatureIndex(
+            lambda element: (element.attrib["first"], element.attrib["then"]),
+            constraint_section.findall(".//rsc_order")
+        )
+        element = etree.SubElement(
+            constraint_section, "rsc_order", id="new", first="A", then="B"
+        )
+        assert_raise_library_error(
+            lambda: constraint.check_is_without_duplication(
+                MockLibraryReportProcessor(),
+                signature_index,
+                element,
+                export_element=constraint.export_with_set,
+            ),
+            (
+                severities.ERROR,
+                report_codes.DUPLICATE_CONSTRAINTS_EXIST,
+                {
+                    'constraint_info_list': ["o1", "o3"],
+                    'constraint_type': 'rsc_order'
+                },
+                report_codes.FORCE_CONSTRAINT_DUPLICATE
+            ),
+        )
+
     def test_success_when_no_duplication_found(self, export_with_set):
         export_with_set.return_value = "exported_duplicate_element"
         element = mock.MagicMock()
@@ -227,8 +257,7 @@ class CheckIsWithoutDuplicationTest(TestCase):
         #no exception raised
         report_processor = MockLibraryReportProcessor()
         constraint.check_is_without_duplication(
-            report_processor, fixture_constraint_section([]), element,
-            are_duplicate=lambda e1, e2: True,
+            report_processor, fixture_signature_index([]), element,
             export_element=constraint.export_with_set,
         )
     def test_report_when_duplication_allowed(self, export_with_set):
@@ -239,8 +268,7 @@ class CheckIsWithoutDuplicationTest(TestCase):
         report_processor = MockLibraryReportProcessor()
         constraint.check_is_without_duplication(
             report_processor,
-            fixture_constraint_section(["duplicate_element"]), element,
-            are_duplicate=lambda e1, e2: True,
+            fixture_signature_index(["duplicate_element"]), element,
             export_element=constraint.export_with_set,
             duplication_alowed=True,
         )
@@ -259,6 +287,66 @@ class CheckIsWithoutDuplicationTest(TestCase):
         )
 
 
+class GetResourceSetsSignatureTest(TestCase):
+    def fixture(self, *id_set_list):
+        element = etree.Element("rsc_order")
+        for id_set in id_set_list:
+            resource_set = etree.SubElement(element, "resource_set")
+            for resource_id in id_set:
+                etree.SubElement(resource_set, "resource_ref", id=resource_id)
+        return element
+
+    def test_same_sets(self):
+        self.assertEqual(
+            constraint.get_resource_sets_signature(
+                self.fixture(["A", "B"], ["C"])
+            ),
+            constraint.get_resource_sets_signature(
+                self.fixture(["A", "B"], ["C"])
+            )
+        )
+
+    def test_different_sets(self):
+        signature_list = [
+            constraint.get_resource_sets_signature(self.fixture(*id_set_list))
+            for id_set_list in [
+                [["A", "B"], ["C"]],
+                [["A"], ["B", "C"]],
+                [["B", "A"], ["C"]],
+                [["A", "B", "C"]],
+            ]
+        ]
+        self.assertEqual(len(signature_list), len(set(signature_list)))
+
+class SignatureIndexTest(TestCase):
+    def setUp(self):
+        self.element_list = ["a1", "b1", "a2", "x1"]
+        self.index = constraint.SignatureIndex(
+            lambda element: element[0] if element[0] != "x" else None,
+            self.element_list
+        )
+
+    def test_find_duplicates(self):
+        self.assertEqual(["a1", "a2"], self.index.find_duplicates("a3"))
+        self.assertEqual([], self.index.find_duplicates("c1"))
+
+    def test_element_is_not_its_own_duplicate(self):
+        self.assertEqual(
+            ["a2"], self.index.find_duplicates(self.element_list[0])
+        )
+
+    def test_no_signature_no_duplicates(self):
+        self.assertEqual([], self.index.find_duplicates("x2"))
+
+    def test_add(self):
+        self.index.add("c1")
+        self.assertEqual(["c1"], self.index.find_duplicates("c2"))
+
+    def test_remove(self):
+        self.index.remove(self.element_list[0])
+        self.index.remove("c1")
+        self.assertEqual(["a2"], self.index.find_duplicates("a3"))
+
 class CreateWithSetTest(TestCase):
     def test_put_new_constraint_to_constraint_section(self):
         constraint_section = etree.Element("constraints")
@@ -8,6 +8,8 @@ from __future__ import (
 from functools import partial
 from unittest import TestCase
 
+from lxml import etree
+
 from pcs.common import report_codes
 from pcs.lib.cib.constraint import ticket
 from pcs.lib.errors import ReportItemSeverity as severities
@@ -245,7 +247,7 @@ class Element(object):
         return self
 
 
-class AreDuplicatePlain(TestCase):
+class GetSignaturePlain(TestCase):
     def setUp(self):
         self.first = Element({
             "ticket": "ticket_key",
@@ -258,51 +260,61 @@ class AreDuplicatePlain(TestCase):
             "rsc-role": "Master"
         })
 
-    def test_returns_true_for_duplicate_elements(self):
-        self.assertTrue(ticket.are_duplicate_plain(self.first, self.second))
+    def assert_signature_differs(self, attrib):
+        self.assertNotEqual(
+            ticket.get_signature_plain(self.first),
+            ticket.get_signature_plain(self.second.update(attrib))
+        )
 
-    def test_returns_false_for_different_ticket(self):
-        self.assertFalse(ticket.are_duplicate_plain(
-            self.first,
-            self.second.update({"ticket": "X"})
-        ))
+    def test_same_signature(self):
+        self.assertEqual(
+            ticket.get_signature_plain(self.first),
+            ticket.get_signature_plain(self.second)
+        )
 
-    def test_returns_false_for_different_resource(self):
-        self.assertFalse(ticket.are_duplicate_plain(
-            self.first,
-            self.second.update({"rsc": "Y"})
-        ))
+    def test_different_ticket(self):
+        self.assert_signature_differs({"ticket": "X"})
 
-    def test_returns_false_for_different_role(self):
-        self.assertFalse(ticket.are_duplicate_plain(
-            self.first,
-            self.second.update({"rsc-role": "Z"})
-        ))
+    def test_different_resource(self):
+        self.assert_signature_differs({"rsc": "Y"})
 
-    def test_returns_false_for_different_elements(self):
-        self.second.update({
-            "ticket": "X",
-            "rsc": "Y",
-            "rsc-role": "Z"
-        })
-        self.assertFalse(ticket.are_duplicate_plain(self.first, self.second))
-
-@mock.patch("pcs.lib.cib.constraint.ticket.constraint.have_duplicate_resource_sets")
-class AreDuplicateWithResourceSet(TestCase):
-    def test_returns_true_for_duplicate_elements(
-        self, mock_have_duplicate_resource_sets
-    ):
-        mock_have_duplicate_resource_sets.return_value = True
-        self.assertTrue(ticket.are_duplicate_with_resource_set(
-            Element({"ticket": "ticket_key"}),
-            Element({"ticket": "ticket_key"}),
-        ))
+    def test_different_role(self):
+        self.assert_signature_differs({"rsc-role": "Z"})
 
-    def test_returns_false_for_different_elements(
-        self, mock_have_duplicate_resource_sets
-    ):
-        mock_have_duplicate_resource_sets.return_value = True
-        self.assertFalse(ticket.are_duplicate_with_resource_set(
-            Element({"ticket": "ticket_key"}),
-            Element({"ticket": "X"}),
-        ))
+class GetSignatureWithResourceSet(TestCase):
+    def fixture(self, ticket_key, id_set):
+        element = etree.Element("rsc_ticket", ticket=ticket_key)
+        resource_set = etree.SubElement(element, "resource_set")
+        for resource_id in id_set:
+            etree.SubElement(resource_set, "resource_ref", id=resource_id)
+        return element
+
+    def test_same_signature(self):
+        self.assertEqual(
+            ticket.get_signature_with_resource_set(
+                self.fixture("T", ["A", "B"])
+            ),
+            ticket.get_signature_with_resource_set(
+                self.fixture("T", ["A", "B"])
+            )
+        )
+
+    def test_different_ticket(self):
+        self.assertNotEqual(
+            ticket.get_signature_with_resource_set(
+                self.fixture("T", ["A", "B"])
+            ),
+            ticket.get_signature_with_resource_set(
+                self.fixture("X", ["A", "B"])
+            )
+        )
+
+    def test_different_resources(self):
+        self.assertNotEqual(
+            ticket.get_signature_with_resource_set(
+                self.fixture("T", ["A", "B"])
+            ),
+            ticket.get_signature_with_resource_set(
+                self.fixture("T", ["A", "C"])
+            )
+        )
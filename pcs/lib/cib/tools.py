@@ -11,13 +11,98 @@ from pcs.lib import reports
 from pcs.lib.errors import LibraryError
 from pcs.lib.pacemaker_values import validate_id
 
+class IdIndex(object):
+    """
+    Index of elements with an id in a cib
+
+    The index is built by one pass through the whole cib, the cib is never
+    searched again. Elements with an id added to the cib later must be added
+    to the index, removed elements should be removed from it. A found element
+    is checked to still have the id and to still be in the cib, so elements
+    removed or changed by code not maintaining the index are not reported.
+    """
+    def __init__(self, root):
+        """
+        root root element of a cib
+        """
+        self.__root = root
+        self.__elements = dict()
+        self.add(root)
+
+    @property
+    def root(self):
+        return self.__root
+
+    def add(self, element):
+        """
+        Add element and all its descendants with an id to the index
+        """
+        for descendant in element.xpath("descendant-or-self::*[@id]"):
+            self.__add(descendant)
+
+    def remove(self, element):
+        """
+        Remove element and all its descendants from the index
+        """
+        for descendant in element.xpath("descendant-or-self::*[@id]"):
+            element_id = descendant.get("id")
+            if self.__elements.get(element_id) is descendant:
+                del self.__elements[element_id]
+
+    def get(self, element_id):
+        """
+        Return element with the specified id or None if there is no such element
+        """
+        element = self.__elements.get(element_id)
+        if element is None:
+            return None
+        if element.get("id") == element_id and self.__is_in_cib(element):
+            return element
+        del self.__elements[element_id]
+        return None
+
+    def __add(self, element):
+        element_id = element.get("id")
+        if self.get(element_id) is None:
+            self.__elements[element_id] = element
+
+    def __is_in_cib(self, element):
+        while element is not None:
+            if element is self.__root:
+                return True
+            element = element.getparent()
+        return False
+
+# The index of the last used cib. It holds the root element of the cib, so lxml
+# keeps returning the same object for the root and the cib is recognized by
+# its identity.
+_id_index_cache = {
+    "index": None,
+}
+
+def get_id_index(tree):
+    """
+    Return IdIndex of the cib the tree belongs to, reuse the last one if it
+    has been built for the same cib
+    tree cib etree node or etree document
+    """
+    root = (
+        tree.getroot() if isinstance(tree, etree._ElementTree)
+        else tree.getroottree().getroot()
+    )
+    index = _id_index_cache["index"]
+    if index is None or index.root is not root:
+        index = IdIndex(root)
+        _id_index_cache["index"] = index
+    return index
+
 def does_id_exist(tree, check_id):
     """
     Checks to see if id exists in the xml dom passed
     tree cib etree node
     check_id id to check
     """
-    return tree.find('.//*[@id="{0}"]'.format(check_id)) is not None
+    return get_id_index(tree).get(check_id) is not None
 
 def validate_id_does_not_exist(tree, id):
     """
@@ -33,9 +118,10 @@ def find_unique_id(tree, check_id):
     tree cib etree node
     check_id id to check
     """
+    id_index = get_id_index(tree)
     counter = 1
     temp_id = check_id
-    while does_id_exist(tree, temp_id):
+    while id_index.get(temp_id) is not None:
         temp_id = "{0}-{1}".format(check_id, counter)
         counter += 1
     return temp_id
@@ -21,7 +21,7 @@ def create_with_set(
     can_repair_to_clone=False,
     resource_in_clone_alowed=False,
     duplication_alowed=False,
-    duplicate_check=None,
+    get_signature=None,
 ):
     """
     string tag_name is constraint tag name
@@ -35,8 +35,8 @@ def create_with_set(
     bool resource_in_clone_alowed flag for allowing to reference id which is
         in tag clone or master
     bool duplication_alowed flag for allowing create duplicate element
-    callable duplicate_check takes two elements and decide if they are
-        duplicates
+    callable get_signature takes an element and returns its hashable
+        signature, elements with the same signature are duplicates
     """
     cib = env.get_cib()
 
@@ -45,7 +45,13 @@ def create_with_set(
         env.report_processor, cib, can_repair_to_clone, resource_in_clone_alowed
     )
 
+    if not get_signature:
+        get_signature = constraint.get_resource_sets_signature
+
     constraint_section = get_constraints(cib)
+    signature_index = constraint.SignatureIndex(
+        get_signature, constraint_section.findall(".//"+tag_name)
+    )
     constraint_element = constraint.create_with_set(
         constraint_section,
         tag_name,
@@ -56,17 +62,14 @@ def create_with_set(
         ]
     )
 
-    if not duplicate_check:
-        duplicate_check = constraint.have_duplicate_resource_sets
-
     constraint.check_is_without_duplication(
         env.report_processor,
-        constraint_section,
+        signature_index,
         constraint_element,
-        are_duplicate=duplicate_check,
         export_element=constraint.export_with_set,
         duplication_alowed=duplication_alowed,
     )
+    signature_index.add(constraint_element)
 
     env.push_cib(cib)
 
@@ -78,7 +81,8 @@ def show(tag_name, is_plain, env):
     env is library environment
     """
     constraints_info = {"plain": [], "with_resource_sets": []}
-    for element in get_constraints(env.get_cib()).findall(".//"+tag_name):
+    cib = env.get_cib_sections(["constraints"])
+    for element in get_constraints(cib).findall(".//"+tag_name):
         if is_plain(element):
             constraints_info["plain"].append(constraint.export_plain(element))
         else:
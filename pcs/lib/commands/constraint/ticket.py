@@ -24,7 +24,7 @@ create_with_set = partial(
     pcs.lib.commands.constraint.common.create_with_set,
     ticket.TAG_NAME,
     ticket.prepare_options_with_set,
-    duplicate_check=ticket.are_duplicate_with_resource_set,
+    get_signature=ticket.get_signature_with_resource_set,
 )
 
 def create(
@@ -40,8 +40,6 @@ def create(
     bool resource_in_clone_alowed flag for allowing to reference id which is
         in tag clone or master
     bool duplication_alowed flag for allowing create duplicate element
-    callable duplicate_check takes two elements and decide if they are
-        duplicates
     """
     cib = env.get_cib()
 
@@ -56,15 +54,19 @@ def create(
     )
 
     constraint_section = get_constraints(cib)
+    signature_index = constraint.SignatureIndex(
+        ticket.get_signature_plain,
+        constraint_section.findall(".//"+ticket.TAG_NAME)
+    )
     constraint_element = ticket.create_plain(constraint_section, options)
 
     constraint.check_is_without_duplication(
         env.report_processor,
-        constraint_section,
+        signature_index,
         constraint_element,
-        are_duplicate=ticket.are_duplicate_plain,
         export_element=constraint.export_plain,
         duplication_alowed=duplication_alowed,
     )
+    signature_index.add(constraint_element)
 
     env.push_cib(cib)
@@ -219,7 +219,11 @@ def _get_online_nodes(lib_env, node_list, ignore_offline_nodes=False):
         except NodeCommunicationException as e:
             to_raise.append(node_communicator_exception_to_report_item(e))
 
-    tools.run_parallel(is_node_online, [([node], {}) for node in node_list])
+    tools.run_parallel(
+        is_node_online,
+        [([node], {}) for node in node_list],
+        settings.node_communication_max_parallel
+    )
 
     lib_env.report_processor.process_list(to_raise)
     return online_node_list
@@ -265,7 +269,11 @@ def get_cluster_sbd_status(lib_env):
                 node.label, str(e)
             ))
 
-    tools.run_parallel(get_sbd_status, [([node], {}) for node in node_list])
+    tools.run_parallel(
+        get_sbd_status,
+        [([node], {}) for node in node_list],
+        settings.node_communication_max_parallel
+    )
     lib_env.report_processor.process_list(report_item_list)
 
     for node in node_list:
@@ -326,7 +334,11 @@ def get_cluster_sbd_config(lib_env):
                 Severities.WARNING
             ))
 
-    tools.run_parallel(get_sbd_config, [([node], {}) for node in node_list])
+    tools.run_parallel(
+        get_sbd_config,
+        [([node], {}) for node in node_list],
+        settings.node_communication_max_parallel
+    )
     lib_env.report_processor.process_list(report_item_list)
 
     if not len(config_list):
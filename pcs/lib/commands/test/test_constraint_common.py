@@ -35,6 +35,8 @@ def fixture_env(cib):
     env = mock.MagicMock()
     env.get_cib = mock.Mock()
     env.get_cib.return_value = cib
+    env.get_cib_sections = mock.Mock()
+    env.get_cib_sections.return_value = cib
     env.push_cib = mock.Mock()
     env.report_processor = MockLibraryReportProcessor()
     return env
@@ -191,3 +193,7 @@ class ShowTest(TestCase):
                 }
             ]
         })
+
+    def test_loads_constraints_only(self):
+        constraint.show("rsc_some", lambda element: True, self.env)
+        self.env.get_cib_sections.assert_called_once_with(["constraints"])
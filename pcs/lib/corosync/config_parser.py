@@ -28,26 +28,31 @@ class Section(object):
 
     def export(self, indent="    "):
         lines = []
-        for attr in self._attr_list:
-            lines.append("{0}: {1}".format(*attr))
-        if self._attr_list and self._section_list:
-            lines.append("")
-        section_count = len(self._section_list)
-        for index, section in enumerate(self._section_list, 1):
-            lines.extend(str(section).split("\n"))
-            if not lines[-1].strip():
-                del lines[-1]
-            if index < section_count:
-                lines.append("")
         if self.parent:
-            lines = [indent + x if x else x for x in lines]
-            lines.insert(0, self.name + " {")
+            lines.append(self.name + " {")
+            self._export_content(lines, indent, indent)
             lines.append("}")
+        else:
+            self._export_content(lines, indent, "")
         final = "\n".join(lines)
         if final:
             final += "\n"
         return final
 
+    def _export_content(self, lines, indent, prefix):
+        # All lines are collected in one list so each line is built only once
+        # no matter how deep its section is nested.
+        for attr in self._attr_list:
+            lines.append("{0}{1}: {2}".format(prefix, *attr))
+        if self._attr_list and self._section_list:
+            lines.append("")
+        for index, section in enumerate(self._section_list):
+            if index:
+                lines.append("")
+            lines.append(prefix + section.name + " {")
+            section._export_content(lines, indent, prefix + indent)
+            lines.append(prefix + "}")
+
     def get_root(self):
         parent = self
         while parent.parent:
@@ -121,31 +126,34 @@ class Section(object):
 
 
 def parse_string(conf_text):
-    root = Section("")
-    _parse_section(conf_text.split("\n"), root)
-    return root
-
-def _parse_section(lines, section):
     # parser is trying to work the same way as an original corosync parser
-    while lines:
-        current_line = lines.pop(0).strip()
+    root = Section("")
+    section = root
+    # Lines are processed in one pass, the currently open section is tracked
+    # instead of recursing into nested sections.
+    for line in conf_text.split("\n"):
+        current_line = line.strip()
         if not current_line or current_line[0] == "#":
             continue
         if "{" in current_line:
             section_name, dummy_junk = current_line.rsplit("{", 1)
             new_section = Section(section_name.strip())
-            section.add_section(new_section)
-            _parse_section(lines, new_section)
+            # the section has just been created, it cannot be an ancestor of
+            # the current section nor have a parent already
+            new_section._parent = section
+            section._section_list.append(new_section)
+            section = new_section
         elif "}" in current_line:
             if not section.parent:
                 raise UnexpectedClosingBraceException()
-            return
+            section = section.parent
         elif ":" in current_line:
             section.add_attribute(
                 *[x.strip() for x in current_line.split(":", 1)]
             )
     if section.parent:
         raise MissingClosingBraceException()
+    return root
 
 
 class CorosyncConfParserException(Exception):
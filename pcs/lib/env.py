@@ -24,8 +24,9 @@ from pcs.lib.nodes_task import (
 )
 from pcs.lib.pacemaker import (
     get_cib,
+    get_cib_sections,
     get_cib_xml,
-    replace_cib_configuration_xml,
+    push_cib_configuration_xml,
 )
 
 
@@ -47,6 +48,8 @@ class LibraryEnvironment(object):
         self._user_login = user_login
         self._user_groups = [] if user_groups is None else user_groups
         self._cib_data = cib_data
+        # the live CIB as it was loaded, new CIBs are pushed as a diff to it
+        self._live_cib_data = None
         self._corosync_conf_data = corosync_conf_data
         self._is_cman_cluster = None
         # TODO tokens probably should not be inserted from outside, but we're
@@ -79,16 +82,30 @@ class LibraryEnvironment(object):
 
     def get_cib_xml(self):
         if self.is_cib_live:
-            return get_cib_xml(self.cmd_runner())
+            self._live_cib_data = get_cib_xml(self.cmd_runner())
+            return self._live_cib_data
         else:
             return self._cib_data
 
     def get_cib(self):
         return get_cib(self.get_cib_xml())
 
+    def get_cib_sections(self, scope_list):
+        """
+        Return cib etree containing only the specified sections, for reading
+
+        iterable scope_list names of CIB sections, see cibadmin --scope
+        """
+        if self.is_cib_live:
+            return get_cib_sections(self.cmd_runner(), scope_list)
+        return self.get_cib()
+
     def push_cib_xml(self, cib_data):
         if self.is_cib_live:
-            replace_cib_configuration_xml(self.cmd_runner(), cib_data)
+            push_cib_configuration_xml(
+                self.cmd_runner(), cib_data, self._live_cib_data
+            )
+            self._live_cib_data = None
         else:
             self._cib_data = cib_data
 
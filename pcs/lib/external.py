@@ -6,7 +6,6 @@ from __future__ import (
 )
 
 import base64
-import inspect
 import json
 import os
 try:
@@ -17,9 +16,9 @@ except ImportError:
     from shlex import quote as shell_quote
 import re
 import signal
-import ssl
 import subprocess
 import sys
+import threading
 try:
     # python2
     from urllib import urlencode as urllib_urlencode
@@ -29,19 +28,11 @@ except ImportError:
 try:
     # python2
     from urllib2 import (
-        build_opener as urllib_build_opener,
-        HTTPCookieProcessor as urllib_HTTPCookieProcessor,
-        HTTPSHandler as urllib_HTTPSHandler,
         HTTPError as urllib_HTTPError,
         URLError as urllib_URLError
     )
 except ImportError:
     # python3
-    from urllib.request import (
-        build_opener as urllib_build_opener,
-        HTTPCookieProcessor as urllib_HTTPCookieProcessor,
-        HTTPSHandler as urllib_HTTPSHandler
-    )
     from urllib.error import (
         HTTPError as urllib_HTTPError,
         URLError as urllib_URLError
@@ -299,6 +290,25 @@ def is_cman_cluster(runner):
     return match is not None and match.group(1) == "1"
 
 
+def _process_setup(new_session=False):
+    signal.signal(signal.SIGPIPE, signal.SIG_DFL)
+    if new_session:
+        # run the process in its own process group so the process and all its
+        # children can be killed at once
+        os.setsid()
+
+
+def _kill_process_group(process, killed_event):
+    if process.poll() is not None:
+        return
+    killed_event.set()
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        # the process has already finished
+        pass
+
+
 class CommandRunner(object):
     def __init__(self, logger, reporter, env_vars=None):
         self._logger = logger
@@ -308,8 +318,14 @@ class CommandRunner(object):
 
     def run(
         self, args, ignore_stderr=False, stdin_string=None, env_extend=None,
-        binary_output=False
+        binary_output=False, timeout=None
     ):
+        """
+        Run an external process, return its output and exit code
+
+        timeout -- kill the process and raise LibraryError if it does not
+            finish in the specified number of seconds
+        """
         env_vars = dict(env_extend) if env_extend else dict()
         env_vars.update(self._env_vars)
 
@@ -332,7 +348,7 @@ class CommandRunner(object):
                     subprocess.PIPE if ignore_stderr else subprocess.STDOUT
                 ),
                 preexec_fn=(
-                    lambda: signal.signal(signal.SIGPIPE, signal.SIG_DFL)
+                    lambda: _process_setup(new_session=(timeout is not None))
                 ),
                 close_fds=True,
                 shell=False,
@@ -340,12 +356,32 @@ class CommandRunner(object):
                 # decodes newlines and in python3 also converts bytes to str
                 universal_newlines=(not self._python2 and not binary_output)
             )
-            output, dummy_stderror = process.communicate(stdin_string)
+            timed_out = threading.Event()
+            timer = None
+            if timeout is not None:
+                timer = threading.Timer(
+                    timeout, _kill_process_group, [process, timed_out]
+                )
+                timer.start()
+            try:
+                output, dummy_stderror = process.communicate(stdin_string)
+            finally:
+                if timer:
+                    timer.cancel()
             retval = process.returncode
         except OSError as e:
             raise LibraryError(
                 reports.run_external_process_error(log_args, e.strerror)
             )
+        if timed_out.is_set():
+            self._logger.debug(
+                "Killed: {args}\nTimeout: {timeout}".format(
+                    args=log_args, timeout=timeout
+                )
+            )
+            raise LibraryError(
+                reports.run_external_process_timeout(log_args, timeout)
+            )
 
         self._logger.debug(
             (
@@ -548,21 +584,9 @@ class NodeCommunicator(object):
             raise NodeConnectionException(host, request, e.reason)
 
     def __get_opener(self):
-        # enable self-signed certificates
-        # https://www.python.org/dev/peps/pep-0476/
-        # http://bugs.python.org/issue21308
-        if (
-            hasattr(ssl, "_create_unverified_context")
-            and
-            "context" in inspect.getargspec(urllib_HTTPSHandler.__init__).args
-        ):
-            opener = urllib_build_opener(
-                urllib_HTTPSHandler(context=ssl._create_unverified_context()),
-                urllib_HTTPCookieProcessor()
-            )
-        else:
-            opener = urllib_build_opener(urllib_HTTPCookieProcessor())
-        return opener
+        # the network stack takes long to load, load it only when it is needed
+        from pcs.lib import https_pool
+        return https_pool.build_opener()
 
     def __prepare_cookies(self, host):
         # Let's be safe about characters in variables (they can come from env)
@@ -0,0 +1,368 @@
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import errno
+import inspect
+from io import BytesIO
+import select
+import socket
+import ssl
+import threading
+import time
+try:
+    # python2
+    import httplib as http_client
+    from urllib import addinfourl as urllib_addinfourl
+    from urllib2 import (
+        build_opener as urllib_build_opener,
+        HTTPCookieProcessor as urllib_HTTPCookieProcessor,
+        HTTPSHandler as urllib_HTTPSHandler,
+        URLError as urllib_URLError
+    )
+except ImportError:
+    # python3
+    import http.client as http_client
+    from urllib.response import addinfourl as urllib_addinfourl
+    from urllib.request import (
+        build_opener as urllib_build_opener,
+        HTTPCookieProcessor as urllib_HTTPCookieProcessor,
+        HTTPSHandler as urllib_HTTPSHandler
+    )
+    from urllib.error import URLError as urllib_URLError
+
+from pcs import settings
+
+
+# enable self-signed certificates
+# https://www.python.org/dev/peps/pep-0476/
+# http://bugs.python.org/issue21308
+_SSL_CONTEXT_SUPPORTED = (
+    hasattr(ssl, "_create_unverified_context")
+    and
+    "context" in inspect.getargspec(urllib_HTTPSHandler.__init__).args
+)
+# resuming TLS sessions is supported since python 3.6
+_SSL_SESSION_SUPPORTED = hasattr(ssl.SSLSocket, "session")
+
+# Only requests which do not change anything may be sent again. Other
+# requests, which is most of pcsd calls, are never retried: it cannot be told
+# for sure whether the server has processed them.
+_IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# connect errors meaning there is no point in trying the host again soon
+_HOST_UNREACHABLE_ERRNOS = (errno.EHOSTUNREACH, errno.ENETUNREACH)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class HTTPSConnectionPool(object):
+    """
+    Keeps connections to hosts open so they can be reused by next requests
+
+    Connections are held per host. At most max_per_host idle connections are
+    kept for a host, connections idle for more than idle_timeout seconds are
+    closed. TLS sessions are remembered per host and resumed when a new
+    connection is being opened, so even a new connection does not need a full
+    TLS handshake.
+
+    A host which cannot be connected to because connecting timed out or the
+    host is unreachable on the network level is remembered as unreachable for
+    unreachable_ttl seconds. Requests to the host fail right away during that
+    time instead of waiting for another connect timeout. Other errors, e.g.
+    a refused connection while pcsd is restarting or a failed TLS handshake,
+    do not prevent next requests from being tried.
+    """
+    def __init__(
+        self, max_per_host, idle_timeout, connect_timeout=None,
+        unreachable_ttl=0
+    ):
+        self._max_per_host = max_per_host
+        self._idle_timeout = idle_timeout
+        self._connect_timeout = connect_timeout
+        self._unreachable_ttl = unreachable_ttl
+        self._idle = {}
+        self._sessions = {}
+        self._unreachable = {}
+        self._lock = threading.Lock()
+        self._context = (
+            ssl._create_unverified_context() if _SSL_CONTEXT_SUPPORTED
+            else None
+        )
+
+    def request(self, host, method, selector, body, headers, timeout):
+        """
+        Send a request to a host, return (http_client.HTTPResponse, body)
+
+        A request sent over a reused connection is sent again over a new one
+        only if it is idempotent and the server closed the connection without
+        responding.
+
+        host -- host and optionally port in the "host:port" form
+        method -- http method
+        selector -- path and query part of the url
+        body -- request body (bytes) or None
+        headers -- dict of request headers
+        timeout -- socket timeout for reading the response
+        """
+        connection = self._get_idle_connection(host)
+        if connection is not None:
+            try:
+                return self._send(connection, method, selector, body, headers)
+            except Exception as e:
+                connection.close()
+                if not (
+                    method.upper() in _IDEMPOTENT_METHODS
+                    and
+                    _is_closed_before_response(e)
+                ):
+                    raise
+        self._check_reachable(host)
+        connection = self._new_connection(host, timeout)
+        try:
+            connection.connect()
+        except socket.error as e:
+            connection.close()
+            self._mark_unreachable(host, e)
+            raise
+        try:
+            return self._send(connection, method, selector, body, headers)
+        except:
+            connection.close()
+            raise
+
+    def clear(self):
+        """
+        Close all idle connections, forget all TLS sessions and unreachable
+        hosts
+        """
+        with self._lock:
+            idle, self._idle = self._idle, {}
+            self._sessions = {}
+            self._unreachable = {}
+        for connection_list in idle.values():
+            for connection, dummy_last_used in connection_list:
+                connection.close()
+
+    def _check_reachable(self, host):
+        with self._lock:
+            if host not in self._unreachable:
+                return
+            failed_at, error = self._unreachable[host]
+            if time.time() - failed_at < self._unreachable_ttl:
+                raise error
+            del self._unreachable[host]
+
+    def _mark_unreachable(self, host, error):
+        if self._unreachable_ttl > 0 and _is_host_unreachable_error(error):
+            with self._lock:
+                self._unreachable[host] = (time.time(), error)
+
+    def _send(self, connection, method, selector, body, headers):
+        connection.request(method, selector, body, headers)
+        response = connection.getresponse()
+        # Read the whole response so the connection can be used for another
+        # request. Responses from pcsd are small.
+        data = response.read()
+        if response.will_close:
+            connection.close()
+        else:
+            self._release(connection)
+        return response, data
+
+    def _get_idle_connection(self, host):
+        now = time.time()
+        expired_list = []
+        connection = None
+        with self._lock:
+            connection_list = self._idle.get(host, [])
+            while connection_list:
+                candidate, last_used = connection_list.pop()
+                if (
+                    now - last_used > self._idle_timeout
+                    or
+                    _is_connection_dropped(candidate)
+                ):
+                    expired_list.append(candidate)
+                else:
+                    connection = candidate
+                    break
+        for expired in expired_list:
+            expired.close()
+        return connection
+
+    def _release(self, connection):
+        with self._lock:
+            if self._context is not None and _SSL_SESSION_SUPPORTED:
+                self._sessions[connection.host_key] = connection.sock.session
+            connection_list = self._idle.setdefault(connection.host_key, [])
+            if len(connection_list) < self._max_per_host:
+                connection_list.append((connection, time.time()))
+                return
+        connection.close()
+
+    def _new_connection(self, host, timeout):
+        kwargs = {}
+        if self._context is not None:
+            kwargs["context"] = self._context
+            with self._lock:
+                kwargs["session"] = self._sessions.get(host)
+        connection = _HTTPSConnection(
+            host,
+            connect_timeout=self._connect_timeout,
+            timeout=timeout,
+            **kwargs
+        )
+        connection.host_key = host
+        return connection
+
+
+class _HTTPSConnection(http_client.HTTPSConnection):
+    """
+    HTTPSConnection with its own timeout for connecting and able to resume
+    a previously established TLS session
+    """
+    def __init__(self, host, connect_timeout=None, session=None, **kwargs):
+        http_client.HTTPSConnection.__init__(self, host, **kwargs)
+        self._connect_timeout = connect_timeout
+        self._tls_session = session
+
+    def connect(self):
+        read_timeout = self.timeout
+        if self._connect_timeout is not None:
+            self.timeout = self._connect_timeout
+        try:
+            if self._tls_session is None or not _SSL_SESSION_SUPPORTED:
+                http_client.HTTPSConnection.connect(self)
+            else:
+                http_client.HTTPConnection.connect(self)
+                self.sock = self._context.wrap_socket(
+                    self.sock,
+                    server_hostname=(self.host if ssl.HAS_SNI else None),
+                    session=self._tls_session
+                )
+        finally:
+            self.timeout = read_timeout
+        self.sock.settimeout(
+            socket.getdefaulttimeout()
+            if read_timeout is socket._GLOBAL_DEFAULT_TIMEOUT
+            else read_timeout
+        )
+
+
+class KeepAliveHTTPSHandler(urllib_HTTPSHandler):
+    """
+    urllib handler sending https requests over connections from a pool
+    """
+    def __init__(self, pool):
+        if _SSL_CONTEXT_SUPPORTED:
+            urllib_HTTPSHandler.__init__(
+                self, context=ssl._create_unverified_context()
+            )
+        else:
+            urllib_HTTPSHandler.__init__(self)
+        self._pool = pool
+
+    def https_open(self, req):
+        if getattr(req, "_tunnel_host", None):
+            # requests going through a proxy are not pooled
+            return urllib_HTTPSHandler.https_open(self, req)
+
+        headers = dict(req.unredirected_hdrs)
+        headers.update(dict(
+            (name, value) for name, value in req.headers.items()
+            if name not in headers
+        ))
+        headers = dict(
+            (name.title(), value) for name, value in headers.items()
+        )
+        try:
+            response, data = self._pool.request(
+                _get_request_host(req),
+                req.get_method(),
+                _get_request_selector(req),
+                req.data,
+                headers,
+                req.timeout
+            )
+        except socket.error as e:
+            raise urllib_URLError(e)
+
+        result = urllib_addinfourl(
+            BytesIO(data), response.msg, req.get_full_url(), response.status
+        )
+        result.msg = response.reason
+        return result
+
+
+def get_pool():
+    """
+    Return the pool shared by all node communication in the process
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HTTPSConnectionPool(
+                settings.node_connection_pool_max_per_host,
+                settings.node_connection_pool_idle_timeout,
+                settings.node_connect_timeout,
+                settings.node_unreachable_ttl
+            )
+        return _pool
+
+
+def build_opener():
+    """
+    Return an urllib opener sending https requests through the shared pool
+    """
+    return urllib_build_opener(
+        KeepAliveHTTPSHandler(get_pool()),
+        urllib_HTTPCookieProcessor()
+    )
+
+
+def _is_connection_dropped(connection):
+    # An idle connection must not be readable. If it is, the server has closed
+    # it or sent something unexpected. Either way it cannot be used anymore.
+    if connection.sock is None:
+        return True
+    try:
+        return bool(select.select([connection.sock], [], [], 0)[0])
+    except (select.error, ValueError):
+        return True
+
+
+def _is_host_unreachable_error(error):
+    if isinstance(error, ssl.SSLError):
+        return False
+    return (
+        isinstance(error, socket.timeout)
+        or
+        getattr(error, "errno", None) in _HOST_UNREACHABLE_ERRNOS
+    )
+
+
+def _is_closed_before_response(error):
+    # The server closed an idle kept-alive connection and not a single byte of
+    # a response has been received. Errors raised while sending a request,
+    # resets after the request has been sent and timeouts do not qualify.
+    if isinstance(error, getattr(http_client, "RemoteDisconnected", ())):
+        return True
+    return (
+        isinstance(error, http_client.BadStatusLine)
+        and
+        error.line in ("", "''", "u''")
+    )
+
+
+def _get_request_host(req):
+    # python2 sets the host attribute lazily
+    return getattr(req, "host", None) or req.get_host()
+
+
+def _get_request_selector(req):
+    return req.selector if hasattr(req, "selector") else req.get_selector()
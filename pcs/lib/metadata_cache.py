@@ -0,0 +1,108 @@
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import hashlib
+import json
+import os
+import tempfile
+
+from pcs import settings
+
+
+# If True, stored values are ignored and replaced by freshly computed ones.
+# Set by the --refresh command line option.
+refresh = False
+
+
+def get(cache_name, key, source_file_list):
+    """
+    Return value stored for the key or None if there is no valid value
+    A value is valid only while none of its source files has been changed.
+
+    cache_name -- name of the cache, each cache has its own directory
+    key -- string identifying the value in the cache
+    source_file_list -- paths of files the value has been obtained from
+    """
+    if refresh or not settings.pcs_cache_dir:
+        return None
+    sources = _get_sources_signature(source_file_list)
+    if sources is None:
+        return None
+    cache_file_path = _get_cache_file_path(cache_name, key)
+    try:
+        # do not trust files which could have been planted by other users
+        if os.stat(cache_file_path).st_uid not in (0, os.geteuid()):
+            return None
+        with open(cache_file_path) as cache_file:
+            data = json.load(cache_file)
+    except (EnvironmentError, ValueError):
+        return None
+    if (
+        not isinstance(data, dict)
+        or
+        data.get("key") != key
+        or
+        data.get("sources") != sources
+    ):
+        return None
+    return data.get("value")
+
+
+def store(cache_name, key, source_file_list, value):
+    """
+    Store a json serializable value for the key
+    Nothing happens if the value cannot be stored, e.g. when the cache
+    directory is not writable for the current user.
+
+    cache_name -- name of the cache, each cache has its own directory
+    key -- string identifying the value in the cache
+    source_file_list -- paths of files the value has been obtained from
+    value -- value to store
+    """
+    if not settings.pcs_cache_dir:
+        return
+    sources = _get_sources_signature(source_file_list)
+    if sources is None:
+        return
+    cache_dir = os.path.join(settings.pcs_cache_dir, cache_name)
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir, 0o755)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir)
+        try:
+            with os.fdopen(fd, "w") as tmp_file:
+                json.dump(
+                    {"key": key, "sources": sources, "value": value},
+                    tmp_file
+                )
+            os.chmod(tmp_path, 0o644)
+            # rename is atomic, readers never see a partially written file
+            os.rename(tmp_path, _get_cache_file_path(cache_name, key))
+        except:
+            os.remove(tmp_path)
+            raise
+    except (EnvironmentError, TypeError, ValueError):
+        pass
+
+
+def _get_cache_file_path(cache_name, key):
+    return os.path.join(
+        settings.pcs_cache_dir,
+        cache_name,
+        hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json"
+    )
+
+
+def _get_sources_signature(source_file_list):
+    signature = []
+    for path in source_file_list:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        signature.append([path, stat.st_mtime, stat.st_size])
+    return signature
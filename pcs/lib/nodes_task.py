@@ -7,7 +7,8 @@ from __future__ import (
 
 import json
 
-from pcs.common import report_codes
+from pcs import settings
+from pcs.common import report_codes, tools
 from pcs.lib import reports
 from pcs.lib.errors import ReportItemSeverity
 from pcs.lib.external import (
@@ -20,13 +21,14 @@ from pcs.lib.corosync import live as corosync_live
 
 def distribute_corosync_conf(
     node_communicator, reporter, node_addr_list, config_text,
-    skip_offline_nodes=False
+    skip_offline_nodes=False, max_parallel=None
 ):
     """
     Send corosync.conf to several cluster nodes
     node_addr_list nodes to send config to (NodeAddressesList instance)
     config_text text of corosync.conf
     skip_offline_nodes don't raise an error if a node communication error occurs
+    max_parallel maximal number of nodes contacted at once, see settings
     """
     failure_severity = ReportItemSeverity.ERROR
     failure_forceable = report_codes.SKIP_OFFLINE_NODES
@@ -34,43 +36,43 @@ def distribute_corosync_conf(
         failure_severity = ReportItemSeverity.WARNING
         failure_forceable = None
 
-    reporter.process(reports.corosync_config_distribution_started())
-    report_items = []
-    # TODO use parallel communication
-    for node in node_addr_list:
+    def _parallel(node):
         try:
             corosync_live.set_remote_corosync_conf(
                 node_communicator,
                 node,
                 config_text
             )
-            reporter.process(
-                reports.corosync_config_accepted_by_node(node.label)
-            )
+            return [reports.corosync_config_accepted_by_node(node.label)], []
         except NodeCommunicationException as e:
-            report_items.append(
+            return [], [
                 node_communicator_exception_to_report_item(
                     e,
                     failure_severity,
                     failure_forceable
-                )
-            )
-            report_items.append(
+                ),
                 reports.corosync_config_distribution_node_error(
                     node.label,
                     failure_severity,
                     failure_forceable
-                )
-            )
-    reporter.process_list(report_items)
+                ),
+            ]
+
+    reporter.process(reports.corosync_config_distribution_started())
+    _process_node_results(
+        reporter,
+        _run_for_nodes_parallel(_parallel, node_addr_list, max_parallel)
+    )
 
 def check_corosync_offline_on_nodes(
-    node_communicator, reporter, node_addr_list, skip_offline_nodes=False
+    node_communicator, reporter, node_addr_list, skip_offline_nodes=False,
+    max_parallel=None
 ):
     """
     Check corosync is not running on cluster nodes
     node_addr_list nodes to send config to (NodeAddressesList instance)
     skip_offline_nodes don't raise an error if a node communication error occurs
+    max_parallel maximal number of nodes contacted at once, see settings
     """
     failure_severity = ReportItemSeverity.ERROR
     failure_forceable = report_codes.SKIP_OFFLINE_NODES
@@ -78,44 +80,68 @@ def check_corosync_offline_on_nodes(
         failure_severity = ReportItemSeverity.WARNING
         failure_forceable = None
 
-    reporter.process(reports.corosync_not_running_check_started())
-    report_items = []
-    # TODO use parallel communication
-    for node in node_addr_list:
+    def _parallel(node):
         try:
             status = node_communicator.call_node(node, "remote/status", "")
             if not json.loads(status)["corosync"]:
-                reporter.process(
-                    reports.corosync_not_running_on_node_ok(node.label)
-                )
-            else:
-                report_items.append(
-                    reports.corosync_running_on_node_fail(node.label)
-                )
+                return [reports.corosync_not_running_on_node_ok(node.label)], []
+            return [], [reports.corosync_running_on_node_fail(node.label)]
         except NodeCommunicationException as e:
-            report_items.append(
+            return [], [
                 node_communicator_exception_to_report_item(
                     e,
                     failure_severity,
                     failure_forceable
-                )
-            )
-            report_items.append(
+                ),
                 reports.corosync_not_running_check_node_error(
                     node.label,
                     failure_severity,
                     failure_forceable
-                )
-            )
+                ),
+            ]
         except (ValueError, LookupError):
-            report_items.append(
+            return [], [
                 reports.corosync_not_running_check_node_error(
                     node.label,
                     failure_severity,
                     failure_forceable
-                )
-            )
-    reporter.process_list(report_items)
+                ),
+            ]
+
+    reporter.process(reports.corosync_not_running_check_started())
+    _process_node_results(
+        reporter,
+        _run_for_nodes_parallel(_parallel, node_addr_list, max_parallel)
+    )
+
+def _run_for_nodes_parallel(worker, node_addr_list, max_parallel=None):
+    """
+    Run worker for each node, return its results in the order of nodes
+    worker callable taking a node, it runs in a separate thread
+    node_addr_list nodes to run the worker for (NodeAddressesList instance)
+    max_parallel maximal number of workers running at once
+    """
+    if max_parallel is None:
+        max_parallel = settings.node_communication_max_parallel
+    result_list = tools.ParallelExecutor(max_parallel).map(
+        worker, [([node], {}) for node in node_addr_list]
+    )
+    for result in result_list:
+        if result.error is not None:
+            raise result.error
+    return [result.value for result in result_list]
+
+def _process_node_results(reporter, result_list):
+    """
+    Process reports of all nodes, report failures at once at the end
+    result_list list of tuples (success report list, failure report list)
+    """
+    failure_list = []
+    for success_report_list, failure_report_list in result_list:
+        for report_item in success_report_list:
+            reporter.process(report_item)
+        failure_list.extend(failure_report_list)
+    reporter.process_list(failure_list)
 
 
 def node_check_auth(communicator, node):
@@ -6,17 +6,23 @@ from __future__ import (
 )
 
 import os.path
+import re
 from lxml import etree
 
 from pcs import settings
 from pcs.lib import reports
 from pcs.lib.errors import LibraryError
 from pcs.lib.pacemaker_state import ClusterState
+from pcs.lib.tools import iterparse_elements, write_tmpfile
 
 
 __EXITCODE_WAIT_TIMEOUT = 62
 __EXITCODE_CIB_SCOPE_VALID_BUT_NOT_PRESENT = 6
 __RESOURCE_CLEANUP_OPERATION_COUNT_THRESHOLD = 100
+# keep the pattern well below the maximal length of a command line argument
+__ATTRD_PATTERN_MAX_NAMES = 500
+# CIB sections placed directly in the cib element, others are in configuration
+__CIB_TOP_LEVEL_SECTIONS = ("configuration", "status")
 
 class CrmMonErrorException(LibraryError):
     pass
@@ -36,10 +42,7 @@ def get_cluster_status_xml(runner):
     return output
 
 def get_cib_xml(runner, scope=None):
-    command = [__exec("cibadmin"), "--local", "--query"]
-    if scope:
-        command.append("--scope={0}".format(scope))
-    output, retval = runner.run(command)
+    output, retval = _query_cib(runner, scope)
     if retval != 0:
         if retval == __EXITCODE_CIB_SCOPE_VALID_BUT_NOT_PRESENT and scope:
             raise LibraryError(
@@ -49,6 +52,83 @@ def get_cib_xml(runner, scope=None):
             raise LibraryError(reports.cib_load_error(retval, output))
     return output
 
+def get_cib_sections(runner, scope_list):
+    """
+    Return cib etree holding only the specified sections of the CIB
+
+    Only the requested sections are transferred and parsed, which is much
+    cheaper than loading the whole CIB including its status. Sections are
+    placed where they are in the full CIB so the tree can be searched the
+    same way. Sections not present in the CIB are left out. The tree is meant
+    for reading only, it must not be pushed back to the cluster.
+
+    CommandRunner runner
+    iterable scope_list names of CIB sections, see cibadmin --scope
+    """
+    section_list = []
+    for scope in scope_list:
+        output, retval = _query_cib(runner, scope)
+        if retval == __EXITCODE_CIB_SCOPE_VALID_BUT_NOT_PRESENT:
+            continue
+        if retval != 0:
+            raise LibraryError(reports.cib_load_error(retval, output))
+        section_list.append(get_cib(output))
+    return build_cib_from_sections(section_list)
+
+def build_cib_from_sections(section_list):
+    """
+    Return cib etree made of the specified CIB sections
+
+    iterable section_list etree elements of CIB sections
+    """
+    cib = etree.Element("cib")
+    configuration = None
+    # whole configuration goes first so its own sections are not duplicated
+    for section in sorted(
+        section_list, key=lambda section: section.tag != "configuration"
+    ):
+        if section.tag in __CIB_TOP_LEVEL_SECTIONS:
+            if cib.find(section.tag) is None:
+                cib.append(section)
+                if section.tag == "configuration":
+                    configuration = section
+            continue
+        if configuration is None:
+            configuration = etree.SubElement(cib, "configuration")
+        if configuration.find(section.tag) is None:
+            configuration.append(section)
+    if configuration is not None:
+        # keep the order of a full CIB, lxml moves the element
+        cib.insert(0, configuration)
+    return cib
+
+def iter_cib_status_node_states(runner):
+    """
+    Yield node_state elements of the CIB status section one by one
+
+    The status section holds the operation history of the whole cluster and
+    may be very large. It is parsed incrementally and never held in memory as
+    a whole, each element is valid only until the next one is requested.
+
+    CommandRunner runner
+    """
+    output, retval = _query_cib(runner, "status")
+    if retval == __EXITCODE_CIB_SCOPE_VALID_BUT_NOT_PRESENT:
+        return
+    if retval != 0:
+        raise LibraryError(reports.cib_load_error(retval, output))
+    try:
+        for node_state in iterparse_elements(output, "node_state"):
+            yield node_state
+    except etree.XMLSyntaxError:
+        raise LibraryError(reports.cib_load_error_invalid_format())
+
+def _query_cib(runner, scope=None):
+    command = [__exec("cibadmin"), "--local", "--query"]
+    if scope:
+        command.append("--scope={0}".format(scope))
+    return runner.run(command)
+
 def get_cib(xml):
     try:
         return etree.fromstring(xml)
@@ -74,6 +154,101 @@ def replace_cib_configuration(runner, tree):
     xml = etree.tostring(tree).decode()
     return replace_cib_configuration_xml(runner, xml)
 
+def diff_cibs_xml(runner, cib_old_xml, cib_new_xml):
+    """
+    Return xml diff of two CIBs, empty string if the CIBs are the same
+
+    CommandRunner runner
+    string cib_old_xml -- original CIB
+    string cib_new_xml -- modified CIB
+    """
+    try:
+        cib_old_tmp_file = write_tmpfile(cib_old_xml)
+        cib_new_tmp_file = write_tmpfile(cib_new_xml)
+    except EnvironmentError as e:
+        raise LibraryError(
+            reports.cib_diff_error(e.strerror, cib_old_xml, cib_new_xml)
+        )
+    command = [
+        __exec("crm_diff"),
+        "--original", cib_old_tmp_file.name,
+        "--new", cib_new_tmp_file.name,
+        "--no-version",
+    ]
+    try:
+        stdout, retval = runner.run(command, ignore_stderr=True)
+    finally:
+        cib_old_tmp_file.close()
+        cib_new_tmp_file.close()
+    stdout = stdout.strip()
+    # crm_diff exits with 0 if the CIBs are the same and with 1 if they differ
+    # or an error occurred, so the output is what tells them apart
+    if retval == 0 and not stdout:
+        return ""
+    try:
+        if etree.fromstring(stdout).tag == "diff":
+            return stdout
+    except (etree.XMLSyntaxError, ValueError):
+        pass
+    raise LibraryError(reports.cib_diff_error(
+        "crm_diff exited with {0}".format(retval), cib_old_xml, cib_new_xml
+    ))
+
+def push_cib_diff_xml(runner, cib_diff_xml):
+    """
+    Apply a CIB diff created by diff_cibs_xml to the live CIB
+    """
+    output, retval = _patch_cib(runner, cib_diff_xml)
+    if retval != 0:
+        raise LibraryError(reports.cib_push_error(retval, output))
+
+def _patch_cib(runner, cib_diff_xml):
+    return runner.run(
+        [__exec("cibadmin"), "--patch", "--verbose", "--xml-pipe"],
+        stdin_string=cib_diff_xml
+    )
+
+def _is_cib_patch_unsupported(output):
+    # cibadmin without the --patch option or not able to apply diffs in the
+    # format produced by crm_diff
+    return (
+        "unrecognized option" in output
+        or
+        "Protocol not supported" in output
+    )
+
+def push_cib_configuration_xml(runner, cib_new_xml, cib_old_xml=None):
+    """
+    Push the configuration section of a CIB to the live cluster
+
+    Only changes against cib_old_xml are pushed, so the whole configuration
+    does not have to be sent and validated again. The diff does not contain
+    versions of the CIB, so it is applied on top of changes done by others
+    meanwhile. The configuration is replaced if the old CIB is not known, the
+    diff cannot be obtained or pacemaker does not support applying it. If
+    pacemaker rejects the changes, the error is reported and the configuration
+    is not pushed again.
+
+    CommandRunner runner
+    string cib_new_xml -- CIB to be pushed
+    string cib_old_xml -- CIB the new CIB has been created from
+    """
+    if cib_old_xml is not None:
+        try:
+            cib_diff_xml = diff_cibs_xml(runner, cib_old_xml, cib_new_xml)
+        except LibraryError:
+            # e.g. crm_diff of old pacemaker, push the whole configuration
+            cib_diff_xml = None
+        if cib_diff_xml == "":
+            return
+        if cib_diff_xml is not None:
+            output, retval = _patch_cib(runner, cib_diff_xml)
+            if retval == 0:
+                return
+            if not _is_cib_patch_unsupported(output):
+                raise LibraryError(reports.cib_push_error(retval, output))
+    replace_cib_configuration_xml(runner, cib_new_xml)
+
 def get_local_node_status(runner):
     try:
         cluster_status = ClusterState(get_cluster_status_xml(runner))
@@ -125,6 +300,60 @@ def nodes_standby(runner, node_list=None, all_nodes=False):
 def nodes_unstandby(runner, node_list=None, all_nodes=False):
     return __nodes_standby_unstandby(runner, False, node_list, all_nodes)
 
+def reset_failcounts(runner, failcount_list, use_attrd=True):
+    """
+    Remove failcount attributes from the cluster status
+
+    The attributes are removed through attrd so it does not bring them back.
+    If attrd supports patterns, all the attributes of a node are removed by
+    one call.
+
+    CommandRunner runner
+    iterable failcount_list Failcount tuples to be removed
+    bool use_attrd remove the attributes through attrd, use False when working
+        with a CIB file
+    """
+    name_list_by_node = {}
+    for failcount in failcount_list:
+        name_list = name_list_by_node.setdefault(failcount.node, [])
+        if failcount.name not in name_list:
+            name_list.append(failcount.name)
+    if not name_list_by_node:
+        return
+
+    use_pattern = use_attrd and has_attrd_pattern_support(runner)
+    for node, name_list in sorted(name_list_by_node.items()):
+        if use_pattern:
+            command_list = [
+                [
+                    __exec("attrd_updater"), "--delete",
+                    "--pattern", __get_exact_names_pattern(name_chunk),
+                    "--node", node,
+                ]
+                for name_chunk in __split_list(
+                    name_list, __ATTRD_PATTERN_MAX_NAMES
+                )
+            ]
+        else:
+            command_list = [
+                [
+                    __exec("crm_attribute"), "-N", node, "-n", name,
+                    "-t", "status", "-D"
+                ]
+                for name in name_list
+            ]
+        for command in command_list:
+            output, retval = runner.run(command)
+            if retval != 0:
+                raise LibraryError(
+                    reports.failcount_reset_error(retval, output, node)
+                )
+
+def has_attrd_pattern_support(runner):
+    # returns 1 on success so we don't care about retval
+    output, dummy_retval = runner.run([__exec("attrd_updater"), "-?"])
+    return "--pattern" in output
+
 def has_resource_wait_support(runner):
     # returns 1 on success so we don't care about retval
     output, dummy_retval = runner.run([__exec("crm_resource"), "-?"])
@@ -187,6 +416,19 @@ def __nodes_standby_unstandby(
     if report:
         raise LibraryError(*report)
 
+def __get_exact_names_pattern(name_list):
+    # attrd matches names by a posix extended regular expression
+    return "^({0})$".format("|".join([
+        re.sub(r"([.\[\]()*+?{}|^$\\])", r"\\\1", name)
+        for name in name_list
+    ]))
+
+def __split_list(item_list, chunk_size):
+    return [
+        item_list[index:index + chunk_size]
+        for index in range(0, len(item_list), chunk_size)
+    ]
+
 def __get_local_node_name(runner):
     # It would be possible to run "crm_node --name" to get the name in one call,
     # but it returns false names when cluster is not running (or we are on
@@ -0,0 +1,83 @@
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+from collections import namedtuple
+import fnmatch
+
+from pcs.lib.pacemaker_values import SCORE_INFINITY
+
+
+Failcount = namedtuple("Failcount", ["node", "resource", "name", "value"])
+
+FAILCOUNT_PREFIX = "fail-count-"
+
+
+def get_failcounts(
+    node_state_list, resource_pattern_list=None, node_pattern_list=None
+):
+    """
+    Return list of Failcount for failcount attributes in the CIB status
+
+    All attributes are found in one pass over the status section. Pacemaker
+    keeps either one failcount per resource (fail-count-<resource>) or one per
+    resource operation (fail-count-<resource>#<operation>_<interval>).
+
+    iterable node_state_list node_state elements of the CIB status section
+    iterable resource_pattern_list ids or shell-style patterns of resources,
+        all resources if empty
+    iterable node_pattern_list names or shell-style patterns of nodes, all
+        nodes if empty
+    """
+    failcount_list = []
+    for node_state in node_state_list:
+        node = node_state.get("uname", node_state.get("id"))
+        if not _matches(node, node_pattern_list):
+            continue
+        for nvpair in node_state.iterfind("transient_attributes//nvpair"):
+            name = nvpair.get("name", "")
+            if not name.startswith(FAILCOUNT_PREFIX):
+                continue
+            resource = name[len(FAILCOUNT_PREFIX):].split("#", 1)[0]
+            if not _matches(resource, resource_pattern_list):
+                continue
+            failcount_list.append(
+                Failcount(node, resource, name, nvpair.get("value", ""))
+            )
+    return failcount_list
+
+def get_failcount_table(failcount_list):
+    """
+    Return dict {resource: {node: failcount}}, failcounts of operations of
+    a resource are summed
+
+    iterable failcount_list Failcount tuples
+    """
+    table = {}
+    for failcount in failcount_list:
+        node_values = table.setdefault(failcount.resource, {})
+        if failcount.node in node_values:
+            node_values[failcount.node] = _add_failcounts(
+                node_values[failcount.node], failcount.value
+            )
+        else:
+            node_values[failcount.node] = failcount.value
+    return table
+
+def _add_failcounts(value1, value2):
+    if SCORE_INFINITY in (value1, value2):
+        return SCORE_INFINITY
+    try:
+        return str(int(value1) + int(value2))
+    except ValueError:
+        return value1
+
+def _matches(value, pattern_list):
+    if not pattern_list:
+        return True
+    return any(
+        fnmatch.fnmatchcase(value, pattern) for pattern in pattern_list
+    )
@@ -0,0 +1,136 @@
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+from collections import namedtuple
+import time
+
+
+OperationRecord = namedtuple("OperationRecord", [
+    "resource",
+    "node",
+    "operation",
+    "call_id",
+    "rc_code",
+    "op_status",
+    "interval",
+    "last_rc_change",
+    "exec_time",
+])
+
+# the default format of the date utility
+_TIMESTAMP_FORMAT = "%a %b %e %H:%M:%S %Z %Y"
+
+
+def iter_operation_history(
+    node_state_list, resource_id_list=None, node_list=None, time_from=None,
+    time_to=None, rc_code_list=None
+):
+    """
+    Yield OperationRecord for resource operations recorded in the CIB status
+
+    Records are yielded in the order they appear in the status section. Nodes
+    and resources not matching the filters are skipped as a whole. Records
+    hold no references to the elements, so the elements may be discarded
+    while iterating.
+
+    iterable node_state_list node_state elements of the CIB status section
+    iterable resource_id_list yield only operations of these resources, an id
+        matches also instances of an anonymous clone (id:0, id:1...)
+    iterable node_list yield only operations run on these nodes
+    int time_from yield only operations finished at or after this timestamp
+    int time_to yield only operations finished at or before this timestamp
+    iterable rc_code_list yield only operations with one of these rc codes
+    """
+    resource_ids = set(resource_id_list) if resource_id_list else None
+    nodes = set(node_list) if node_list else None
+    rc_codes = set(rc_code_list) if rc_code_list else None
+
+    for node_state in node_state_list:
+        node = node_state.get("uname", node_state.get("id"))
+        if nodes is not None and node not in nodes:
+            continue
+        for lrm_resource in node_state.iterfind(
+            "lrm/lrm_resources/lrm_resource"
+        ):
+            resource_id = lrm_resource.get("id")
+            if (
+                resource_ids is not None
+                and
+                resource_id not in resource_ids
+                and
+                resource_id.split(":", 1)[0] not in resource_ids
+            ):
+                continue
+            for rsc_op in lrm_resource.iterfind("lrm_rsc_op"):
+                record = _get_record(resource_id, node, rsc_op)
+                if rc_codes is not None and record.rc_code not in rc_codes:
+                    continue
+                if not _in_time_window(
+                    record.last_rc_change, time_from, time_to
+                ):
+                    continue
+                yield record
+
+def sort_key(record):
+    """
+    Return a key for sorting records by resource and then chronologically
+    """
+    return (
+        record.resource,
+        record.last_rc_change if record.last_rc_change is not None else -1,
+        record.call_id if record.call_id is not None else -1,
+        record.node,
+    )
+
+def record_to_dict(record):
+    """
+    Return a json serializable dict describing the record
+    """
+    return dict(
+        record._asdict(),
+        last_rc_change_date=format_timestamp(record.last_rc_change)
+    )
+
+def format_timestamp(timestamp):
+    """
+    Return the timestamp as local time in the format of the date utility
+
+    int timestamp seconds since the epoch or None
+    """
+    if timestamp is None:
+        return None
+    return time.strftime(_TIMESTAMP_FORMAT, time.localtime(timestamp))
+
+def _get_record(resource_id, node, rsc_op):
+    return OperationRecord(
+        resource=resource_id,
+        node=node,
+        operation=rsc_op.get("operation"),
+        call_id=_get_int(rsc_op, "call-id"),
+        rc_code=_get_int(rsc_op, "rc-code"),
+        op_status=_get_int(rsc_op, "op-status"),
+        interval=_get_int(rsc_op, "interval"),
+        last_rc_change=_get_int(rsc_op, "last-rc-change"),
+        exec_time=_get_int(rsc_op, "exec-time"),
+    )
+
+def _in_time_window(timestamp, time_from, time_to):
+    if time_from is None and time_to is None:
+        return True
+    return (
+        timestamp is not None
+        and
+        (time_from is None or timestamp >= time_from)
+        and
+        (time_to is None or timestamp <= time_to)
+    )
+
+def _get_int(element, attribute):
+    try:
+        return int(element.get(attribute))
+    except (TypeError, ValueError):
+        return None
@@ -10,6 +10,7 @@ from __future__ import (
     unicode_literals,
 )
 
+from collections import namedtuple
 import os.path
 
 from lxml import etree
@@ -151,3 +152,130 @@ class ClusterState(_Element):
     def __init__(self, xml):
         self.dom = _get_valid_cluster_state_dom(xml)
         super(ClusterState, self).__init__(self.dom)
+        self._resources_state = None
+
+    @property
+    def resources_state(self):
+        if self._resources_state is None:
+            self._resources_state = ResourcesState(self.dom)
+        return self._resources_state
+
+
+ResourceInstance = namedtuple(
+    "ResourceInstance", ["id", "role", "failed", "managed", "nodes"]
+)
+
+def _get_instance_base_id(instance_id):
+    # an instance of a cloned resource or group has an id of '<name>:N'
+    parts = instance_id.rsplit(":", 1)
+    if len(parts) == 2 and parts[1].isdigit():
+        return parts[0]
+    return instance_id
+
+class ResourcesState(object):
+    """
+    Resources in a cluster status indexed by their ids and by nodes. The status
+    is processed only once, queries do not search the status again.
+    """
+    def __init__(self, dom):
+        """
+        dom -- crm_mon xml root element (lxml)
+        """
+        # resource id -> list of ResourceInstance
+        self._instances = {}
+        # node name -> list of ids of resources running on the node
+        self._node_resources = {}
+        # group id -> list of ids of its resources
+        self._group_members = {}
+        # clone id -> id of its resource or group
+        self._clone_members = {}
+        # resource or group id -> id of its group or clone
+        self._parents = {}
+        for resources in dom.iterchildren("resources"):
+            self._index_children(resources, None)
+
+    def _index_children(self, element, parent_id):
+        for child in element.iterchildren("resource", "group", "clone"):
+            child_id = _get_instance_base_id(child.get("id", ""))
+            if parent_id is not None:
+                self._parents.setdefault(child_id, parent_id)
+            if child.tag == "resource":
+                self._index_resource(child, child_id)
+                continue
+            if child.tag == "group":
+                members = [
+                    _get_instance_base_id(resource.get("id", ""))
+                    for resource in child.iterchildren("resource")
+                ]
+                self._group_members.setdefault(child_id, members)
+            elif child.tag == "clone":
+                for member in child.iterchildren("resource", "group"):
+                    self._clone_members.setdefault(
+                        child_id, _get_instance_base_id(member.get("id", ""))
+                    )
+                    break
+            self._index_children(child, child_id)
+
+    def _index_resource(self, element, resource_id):
+        nodes = [node.get("name") for node in element.iterchildren("node")]
+        self._instances.setdefault(resource_id, []).append(ResourceInstance(
+            element.get("id"),
+            element.get("role"),
+            is_true(element.get("failed", "false")),
+            is_true(element.get("managed", "true")),
+            nodes
+        ))
+        for node in nodes:
+            self._node_resources.setdefault(node, []).append(resource_id)
+
+    def get_instances(self, resource_id):
+        """
+        Return list of ResourceInstance of the specified primitive resource
+        """
+        return list(self._instances.get(resource_id, []))
+
+    def get_node_resources(self, node_name):
+        """
+        Return ids of primitive resources running on the specified node
+        """
+        return list(self._node_resources.get(node_name, []))
+
+    def get_group_members(self, group_id):
+        return list(self._group_members.get(group_id, []))
+
+    def get_clone_member(self, clone_id):
+        return self._clone_members.get(clone_id)
+
+    def get_parent(self, resource_id):
+        """
+        Return id of a group or clone the specified resource is in or None
+        """
+        return self._parents.get(resource_id)
+
+    def get_resource_for_running_check(self, resource_id, stopped=False):
+        """
+        Return id of a primitive resource which represents the specified
+        resource when checking if it is running
+
+        resource_id -- id of a primitive, group or clone resource
+        stopped -- check for stopped (True) or started (False) resource
+        """
+        if resource_id in self._clone_members:
+            resource_id = self._clone_members[resource_id]
+        members = self._group_members.get(resource_id)
+        if members:
+            # the first resource of a group is the last one to stop, the last
+            # resource of a group is the last one to start
+            resource_id = members[0] if stopped else members[-1]
+        return resource_id
+
+    def get_running_nodes(self, resource_id):
+        """
+        Return nodes where the specified primitive is running as a dict
+        role -> list of node names, failed instances are skipped
+        """
+        running_nodes = {"Started": [], "Master": [], "Slave": []}
+        for instance in self._instances.get(resource_id, []):
+            if not instance.failed and instance.role in running_nodes:
+                running_nodes[instance.role].extend(instance.nodes)
+        return running_nodes
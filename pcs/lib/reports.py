@@ -295,6 +295,21 @@ def run_external_process_error(command, reason):
         }
     )
 
+def run_external_process_timeout(command, timeout):
+    """
+    an external process has been killed as it has not finished in time
+    command string the external process command
+    timeout number of seconds the process was allowed to run
+    """
+    return ReportItem.error(
+        report_codes.RUN_EXTERNAL_PROCESS_TIMEOUT,
+        "command {command} has not finished in {timeout} seconds",
+        info={
+            "command": command,
+            "timeout": timeout,
+        }
+    )
+
 def node_communication_started(target, data):
     """
     request is about to be sent to a remote node, debug info
@@ -828,6 +843,23 @@ def cib_push_error(retval, stdout):
         }
     )
 
+def cib_diff_error(reason, cib_old, cib_new):
+    """
+    cannot obtain a diff of CIBs
+    string reason -- error description
+    string cib_old -- the CIB to be diffed against
+    string cib_new -- the CIB diffed against the old cib
+    """
+    return ReportItem.error(
+        report_codes.CIB_DIFF_ERROR,
+        "Unable to diff CIB: {reason}\n{cib_new}",
+        info={
+            "reason": reason,
+            "cib_old": cib_old,
+            "cib_new": cib_new,
+        }
+    )
+
 def cluster_state_cannot_load(retval, stdout):
     """
     cannot load cluster status from crm_mon, crm_mon exited with non-zero code
@@ -917,6 +949,23 @@ def resource_cleanup_error(retval, stdout, resource=None, node=None):
         }
     )
 
+def failcount_reset_error(retval, stdout, node):
+    """
+    an error occured when removing failcounts of resources
+    retval external process's return (exit) code
+    stdout string external process's stdout
+    node string node on which failcounts have been removed
+    """
+    return ReportItem.error(
+        report_codes.FAILCOUNT_RESET_ERROR,
+        "Unable to remove failcounts on {node}\n{stdout}",
+        info={
+            "return_value": retval,
+            "stdout": stdout,
+            "node": node,
+        }
+    )
+
 def resource_cleanup_too_time_consuming(threshold):
     """
     resource cleanup will execute more than threshold operations in a cluster
@@ -5,11 +5,12 @@ from __future__ import (
     unicode_literals,
 )
 
+import json
 import os
 from lxml import etree
 
 from pcs import settings
-from pcs.lib import reports
+from pcs.lib import metadata_cache, reports
 from pcs.lib.errors import ReportItemSeverity
 from pcs.lib.pacemaker_values import is_true
 from pcs.lib.external import is_path_runnable
@@ -17,6 +18,9 @@ from pcs.common import report_codes
 from pcs.common.tools import simple_cache
 
 
+AGENT_METADATA_CACHE = "agent-metadata"
+
+
 class ResourceAgentLibError(Exception):
     pass
 
@@ -57,6 +61,37 @@ def __get_text_from_dom_element(element):
         return element.text.strip()
 
 
+def _run_metadata_command(runner, command, timeout=None, **kwargs):
+    """
+    Returns output of a command printing metadata of an agent. The output is
+    cached until the executable of the agent changes.
+
+    runner -- CommandRunner
+    command -- list of command arguments, the first one is the executable path
+    timeout -- number of seconds to wait for the command, None means no limit
+    kwargs -- keyword arguments for CommandRunner.run
+    """
+    cache_key = json.dumps([command, kwargs], sort_keys=True)
+    output = metadata_cache.get(AGENT_METADATA_CACHE, cache_key, command[:1])
+    if output is not None:
+        return output
+
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    output, dummy_retval = runner.run(command, **kwargs)
+    # cache only valid metadata, do not keep failures caused by a temporary
+    # problem
+    try:
+        if output.strip():
+            etree.fromstring(output)
+            metadata_cache.store(
+                AGENT_METADATA_CACHE, cache_key, command[:1], output
+            )
+    except (etree.XMLSyntaxError, ValueError):
+        pass
+    return output
+
+
 def _get_parameter(parameter_dom):
     """
     Returns dictionary that describes parameter.
@@ -125,8 +160,8 @@ def _get_pcmk_advanced_stonith_parameters(runner):
     """
     @simple_cache
     def __get_stonithd_parameters():
-        output, retval = runner.run(
-            [settings.stonithd_binary, "metadata"], ignore_stderr=True
+        output = _run_metadata_command(
+            runner, [settings.stonithd_binary, "metadata"], ignore_stderr=True
         )
         if output.strip() == "":
             raise UnableToGetAgentMetadata("stonithd", output)
@@ -146,16 +181,18 @@ def _get_pcmk_advanced_stonith_parameters(runner):
     return __get_stonithd_parameters()
 
 
-def get_fence_agent_metadata(runner, fence_agent):
+def get_fence_agent_metadata(runner, fence_agent, timeout=None):
     """
     Returns dom of metadata for specified fence agent
     Raises AgentNotFound if fence_agent doesn't starts with fence_ or it is
         relative path or file is not runnable.
     Raises UnableToGetAgentMetadata if there was problem getting or
         parsing metadata.
+    Raises LibraryError if the agent has not finished in timeout.
 
     runner -- CommandRunner
     fence_agent -- fence agent name, should start with 'fence_'
+    timeout -- number of seconds to wait for the agent, None means no limit
     """
     script_path = os.path.join(settings.fence_agent_binaries, fence_agent)
 
@@ -166,8 +203,11 @@ def get_fence_agent_metadata(runner, fence_agent):
     ):
         raise AgentNotFound(fence_agent)
 
-    output, retval = runner.run(
-        [script_path, "-o", "metadata"], ignore_stderr=True
+    output = _run_metadata_command(
+        runner,
+        [script_path, "-o", "metadata"],
+        timeout=timeout,
+        ignore_stderr=True
     )
 
     if output.strip() == "":
@@ -200,17 +240,19 @@ def _get_nagios_resource_agent_metadata(agent):
         raise UnableToGetAgentMetadata(agent_name, str(e))
 
 
-def _get_ocf_resource_agent_metadata(runner, provider, agent):
+def _get_ocf_resource_agent_metadata(runner, provider, agent, timeout=None):
     """
     Returns metadata dom for specified ocf resource agent
     Raises AgentNotFound if specified agent is relative path or file is not
         runnable.
     Raises UnableToGetAgentMetadata if there was problem getting or
     parsing metadata.
+    Raises LibraryError if the agent has not finished in timeout.
 
     runner -- CommandRunner
     provider -- resource agent provider
     agent -- resource agent name
+    timeout -- number of seconds to wait for the agent, None means no limit
     """
     agent_name = "ocf:" + provider + ":" + agent
 
@@ -219,8 +261,10 @@ def _get_ocf_resource_agent_metadata(runner, provider, agent):
     if not __is_path_abs(script_path) or not is_path_runnable(script_path):
         raise AgentNotFound(agent_name)
 
-    output, retval = runner.run(
+    output = _run_metadata_command(
+        runner,
         [script_path, "meta-data"],
+        timeout=timeout,
         env_extend={"OCF_ROOT": settings.ocf_root},
         ignore_stderr=True
     )
@@ -307,7 +351,7 @@ def get_resource_agent_parameters(metadata_dom):
     return _get_agent_parameters(metadata_dom)
 
 
-def get_resource_agent_metadata(runner, agent):
+def get_resource_agent_metadata(runner, agent, timeout=None):
     """
     Returns metadata of specified agent as dom
     Raises UnsupportedResourceAgent if specified agent is not ocf or nagios
@@ -315,13 +359,16 @@ def get_resource_agent_metadata(runner, agent):
 
     runner -- CommandRunner
     agent -- agent name
+    timeout -- number of seconds to wait for the agent, None means no limit
     """
     error = UnsupportedResourceAgent(agent)
     if agent.startswith("ocf:"):
         agent_info = agent.split(":", 2)
         if len(agent_info) != 3:
             raise error
-        return _get_ocf_resource_agent_metadata(runner, *agent_info[1:])
+        return _get_ocf_resource_agent_metadata(
+            runner, agent_info[1], agent_info[2], timeout=timeout
+        )
     elif agent.startswith("nagios:"):
         return _get_nagios_resource_agent_metadata(agent.split("nagios:", 1)[1])
     else:
@@ -40,7 +40,9 @@ def _run_parallel_and_raise_lib_error_on_failure(func, param_list):
         except LibraryError as e:
             report_list.extend(e.args)
 
-    tools.run_parallel(_parallel, param_list)
+    tools.run_parallel(
+        _parallel, param_list, settings.node_communication_max_parallel
+    )
 
     if report_list:
         raise LibraryError(*report_list)
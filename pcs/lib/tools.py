@@ -5,6 +5,11 @@ from __future__ import (
     unicode_literals,
 )
 
+from io import BytesIO
+import tempfile
+
+from lxml import etree
+
 
 def environment_file_to_dict(config):
     """
@@ -47,3 +52,43 @@ def dict_to_environment_file(config_dict):
     for key, val in sorted(config_dict.items()):
         lines.append("{key}={val}\n".format(key=key, val=val))
     return "".join(lines)
+
+
+def write_tmpfile(data, binary=False):
+    """
+    Write data to a new tmp file and return the file; raises EnvironmentError.
+
+    string or bytes data -- data to write to the file
+    bool binary -- treat data as binary?
+    """
+    mode = "w+b" if binary else "w+"
+    tmpfile = tempfile.NamedTemporaryFile(mode=mode, suffix=".pcs")
+    tmpfile.write(data)
+    tmpfile.flush()
+    tmpfile.seek(0)
+    return tmpfile
+
+
+def iterparse_elements(xml, tag):
+    """
+    Yield elements with the specified tag from an xml document one by one
+
+    The document is parsed incrementally. Once the caller is done with an
+    element, the element and its already processed siblings are cleared, so
+    only a small part of the document is kept in memory. The rest of the
+    document is not parsed at all if the caller stops iterating.
+    Raises etree.XMLSyntaxError when the document is not valid xml.
+
+    string xml -- xml document
+    string tag -- name of elements to yield
+    """
+    source = BytesIO(
+        xml if isinstance(xml, bytes) else xml.encode("utf-8")
+    )
+    for dummy_event, element in etree.iterparse(
+        source, events=("end",), tag=tag
+    ):
+        yield element
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
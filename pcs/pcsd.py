@@ -12,6 +12,7 @@ import errno
 from pcs import usage
 from pcs import utils
 from pcs import settings
+from pcs import command_server
 
 
 def pcsd_cmd(argv):
@@ -28,6 +29,8 @@ def pcsd_cmd(argv):
         pcsd_sync_certs(argv)
     elif sub_cmd == "clear-auth":
         pcsd_clear_auth(argv)
+    elif sub_cmd == "command-server":
+        pcsd_command_server(argv)
     else:
         usage.pcsd()
         sys.exit(1)
@@ -147,10 +150,7 @@ def pcsd_sync_certs(argv, exit_after_error=True):
 def pcsd_clear_auth(argv):
     output = []
     files = []
-    if os.geteuid() == 0:
-        pcsd_tokens_file = settings.pcsd_tokens_location
-    else:
-        pcsd_tokens_file = os.path.expanduser("~/.pcs/tokens")
+    pcsd_tokens_file = utils.get_tokens_file_path()
 
     if '--local' in utils.pcs_options:
         files.append(pcsd_tokens_file)
@@ -172,3 +172,13 @@ def pcsd_clear_auth(argv):
         for o in output:
             print("Error: " + o)
         sys.exit(1)
+
+def pcsd_command_server(argv):
+    if len(argv) > 1:
+        usage.pcsd(["command-server"])
+        sys.exit(1)
+    command_server.serve(
+        argv[0] if argv else settings.pcs_command_server_socket,
+        settings.pcs_command_server_max_workers,
+        settings.pcs_command_server_timeout
+    )
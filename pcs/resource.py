@@ -23,9 +23,12 @@ from pcs import (
 )
 import pcs.lib.cib.acl as lib_acl
 import pcs.lib.pacemaker as lib_pacemaker
+import pcs.lib.pacemaker_failcount as lib_failcount
+import pcs.lib.pacemaker_history as lib_history
 from pcs.lib.external import get_systemd_services
 from pcs.cli.common.errors import CmdLineInputError
 from pcs.cli.common.parse_args import prepare_options
+from pcs.common.tools import Deadline, run_parallel, wait_for
 from pcs.lib.errors import LibraryError
 from pcs.lib.pacemaker_values import timeout_to_seconds
 import pcs.lib.resource_agent as lib_ra
@@ -33,6 +36,8 @@ import pcs.lib.resource_agent as lib_ra
 
 PACEMAKER_WAIT_TIMEOUT_STATUS = 62
 RESOURCE_RELOCATE_CONSTRAINT_PREFIX = "pcs-relocate-"
+# used when crm_resource cannot wait for resources to stop
+RESOURCE_STOP_CHECK_INTERVAL = 1
 
 def resource_cmd(argv):
     if len(argv) == 0:
@@ -236,6 +241,31 @@ def parse_resource_options(argv, with_clone=False):
         return ra_values, op_values, meta_values, clone_opts
     return ra_values, op_values, meta_values
 
+def get_agents_shortdesc(get_metadata, agent_list):
+    """
+    Get short descriptions of several agents at once, return a list of tuples
+    (agent, shortdesc, exception) in the order of agent_list
+
+    get_metadata -- callable(runner, agent, timeout) returning agent's metadata
+    agent_list -- list of agent names
+    """
+    result = dict()
+    def _get_shortdesc(agent):
+        try:
+            metadata = get_metadata(
+                utils.cmd_runner(), agent, settings.agent_metadata_timeout
+            )
+            result[agent] = (lib_ra.get_agent_desc(metadata)["shortdesc"], None)
+        except (LibraryError, lib_ra.ResourceAgentLibError) as e:
+            result[agent] = (None, e)
+
+    run_parallel(
+        _get_shortdesc,
+        [([agent], {}) for agent in agent_list],
+        settings.agent_metadata_max_parallel
+    )
+    return [(agent,) + result[agent] for agent in agent_list]
+
 # List available resources
 # TODO make location more easily configurable
 def resource_list_available(argv):
@@ -248,6 +278,18 @@ def resource_list_available(argv):
             )
         return agent_name + sd
 
+    def get_names_and_descs(agent_list):
+        if "--nodesc" in utils.pcs_options:
+            return agent_list
+        # agents with unavailable metadata are not listed
+        return [
+            get_name_and_desc(agent_name, shortdesc)
+            for agent_name, shortdesc, error in get_agents_shortdesc(
+                lib_ra.get_resource_agent_metadata, agent_list
+            )
+            if error is None
+        ]
+
     ret = []
     if len(argv) != 0:
         filter_string = argv[0]
@@ -255,6 +297,7 @@ def resource_list_available(argv):
         filter_string = ""
 
     # ocf agents
+    ocf_agent_list = []
     providers = sorted(os.listdir(settings.ocf_resources))
     for provider in providers:
         resources = sorted(os.listdir(os.path.join(
@@ -266,21 +309,8 @@ def resource_list_available(argv):
             full_res_name = "ocf:" + provider + ":" + resource
             if full_res_name.lower().count(filter_string.lower()) == 0:
                 continue
-
-            if "--nodesc" in utils.pcs_options:
-                ret.append(full_res_name)
-                continue
-
-            try:
-                metadata = lib_ra.get_resource_agent_metadata(
-                    utils.cmd_runner(), full_res_name
-                )
-                ret.append(get_name_and_desc(
-                    full_res_name,
-                    lib_ra.get_agent_desc(metadata)["shortdesc"]
-                ))
-            except (LibraryError, lib_ra.ResourceAgentLibError):
-                pass
+            ocf_agent_list.append(full_res_name)
+    ret.extend(get_names_and_descs(ocf_agent_list))
 
     # lsb agents
     lsb_dir = "/etc/init.d/"
@@ -295,26 +325,15 @@ def resource_list_available(argv):
 
     # nagios metadata
     if os.path.isdir(settings.nagios_metadata_path):
+        nagios_agent_list = []
         for metadata_file in sorted(os.listdir(settings.nagios_metadata_path)):
             if metadata_file.startswith("."):
                 continue
             full_res_name = "nagios:" + metadata_file
             if full_res_name.lower().endswith(".xml"):
                 full_res_name = full_res_name[:-len(".xml")]
-            if "--nodesc" in utils.pcs_options:
-                ret.append(full_res_name)
-                continue
-            try:
-                metadata = lib_ra.get_resource_agent_metadata(
-                    utils.cmd_runner(),
-                    full_res_name
-                )
-                ret.append(get_name_and_desc(
-                    full_res_name,
-                    lib_ra.get_agent_desc(metadata)["shortdesc"]
-                ))
-            except (LibraryError, lib_ra.ResourceAgentLibError):
-                pass
+            nagios_agent_list.append(full_res_name)
+        ret.extend(get_names_and_descs(nagios_agent_list))
 
     # output
     if not ret:
@@ -576,6 +595,7 @@ def resource_create(ra_id, ra_type, ra_values, op_values, meta_values=[], clone_
 
     resource_elem = create_xml_element("primitive", primitive_values, instance_attributes + meta_attributes)
     dom.getElementsByTagName("resources")[0].appendChild(resource_elem)
+    utils.dom_id_index_add(resource_elem)
     # Do not validate default operations defined by a resource agent
     # User did not entered them so we will not confuse him/her with their errors
     for op in op_values_agent:
@@ -883,6 +903,7 @@ def resource_update(res_id,args):
         instance_attributes = dom.createElement("instance_attributes")
         instance_attributes.setAttribute("id", res_id + "-instance_attributes")
         resource.appendChild(instance_attributes)
+        utils.dom_id_index_add(instance_attributes)
     else:
         instance_attributes = instance_attributes[0]
 
@@ -927,12 +948,14 @@ def resource_update(res_id,args):
             ia.setAttribute("name", key)
             ia.setAttribute("value", val)
             instance_attributes.appendChild(ia)
+            utils.dom_id_index_add(ia)
 
     meta_attributes = resource.getElementsByTagName("meta_attributes")
     if len(meta_attributes) == 0:
         meta_attributes = dom.createElement("meta_attributes")
         meta_attributes.setAttribute("id", res_id + "-meta_attributes")
         resource.appendChild(meta_attributes)
+        utils.dom_id_index_add(meta_attributes)
     else:
         meta_attributes = meta_attributes[0]
 
@@ -953,6 +976,7 @@ def resource_update(res_id,args):
             ma.setAttribute("name", key)
             ma.setAttribute("value", val)
             meta_attributes.appendChild(ma)
+            utils.dom_id_index_add(ma)
 
     operations = resource.getElementsByTagName("operations")
     if len(operations) == 0:
@@ -1158,6 +1182,7 @@ def resource_operation_add(
                     ))
 
     operations.insertBefore(op_el, before_op)
+    utils.dom_id_index_add(op_el)
     return dom
 
 def resource_operation_remove(res_id, argv):
@@ -1444,6 +1469,7 @@ def resource_clone_create(cib_dom, argv, update_existing=False):
         clone.setAttribute("id", utils.find_unique_id(cib_dom, name + "-clone"))
         clone.appendChild(element)
         re.appendChild(clone)
+        utils.dom_id_index_add(clone)
 
     generic_values, op_values, meta_values = parse_resource_options(argv)
     if op_values:
@@ -1607,6 +1633,7 @@ def resource_master_create(dom, argv, update=False, master_id=None):
         resource.parentNode.removeChild(resource)
         master_element.appendChild(resource)
         resources.appendChild(master_element)
+        utils.dom_id_index_add(master_element)
 
     if len(argv) > 0:
         generic_values, op_values, meta_values = parse_resource_options(argv)
@@ -1671,20 +1698,24 @@ def resource_remove(resource_id, output = True):
             if retval != 0 and "unrecognized option '--wait'" in output:
                 output = ""
                 retval = 0
-                for res in reversed(
+                primitive_list = list(reversed(
                     group_dom.documentElement.getElementsByTagName("primitive")
-                ):
+                ))
+                # resources in the group share one time budget
+                deadline = Deadline(15 * len(primitive_list))
+                for res in primitive_list:
                     res_id = res.getAttribute("id")
-                    res_stopped = False
-                    for _ in range(15):
-                        time.sleep(1)
-                        if not utils.resource_running_on(res_id)["is_running"]:
-                            res_stopped = True
-                            break
+                    res_stopped = wait_for(
+                        lambda: not utils.resource_running_on(res_id)[
+                            "is_running"
+                        ],
+                        deadline,
+                        RESOURCE_STOP_CHECK_INTERVAL
+                    )
                     if not res_stopped:
                         break
             stopped = True
-            state = utils.getClusterState()
+            state = utils.get_resources_state()
             for res in group_dom.documentElement.getElementsByTagName("primitive"):
                 res_id = res.getAttribute("id")
                 if utils.resource_running_on(res_id, state)["is_running"]:
@@ -1730,10 +1761,13 @@ def resource_remove(resource_id, output = True):
         if retval != 0 and "unrecognized option '--wait'" in output:
             output = ""
             retval = 0
-            for _ in range(15):
-                time.sleep(1)
-                if not utils.resource_running_on(resource_id)["is_running"]:
-                    break
+            wait_for(
+                lambda: not utils.resource_running_on(resource_id)[
+                    "is_running"
+                ],
+                Deadline(15),
+                RESOURCE_STOP_CHECK_INTERVAL
+            )
         if utils.resource_running_on(resource_id)["is_running"]:
             msg = [
                 "Unable to stop: %s before deleting "
@@ -1920,6 +1954,7 @@ def resource_group_add(cib_dom, group_name, resource_ids):
         mygroup = cib_dom.createElement("group")
         mygroup.setAttribute("id", group_name)
         resources_element.appendChild(mygroup)
+        utils.dom_id_index_add(mygroup)
 
     after = before = None
     if "--after" in utils.pcs_options and "--before" in utils.pcs_options:
@@ -2377,48 +2412,62 @@ def resource_failcount(argv):
     else:
         all_nodes = True
 
-    dom = utils.get_cib_dom()
-    output_dict = {}
-    trans_attrs = dom.getElementsByTagName("transient_attributes")
-    fail_counts_removed = 0
-    for ta in trans_attrs:
-        ta_node = ta.parentNode.getAttribute("uname")
-        if not all_nodes and ta_node != node:
-            continue
-        for nvp in ta.getElementsByTagName("nvpair"):
-            if nvp.getAttribute("name") == ("fail-count-" + resource):
-                if resource_command == "reset":
-                    (output, retval) = utils.run(["crm_attribute", "-N",
-                        ta_node, "-n", nvp.getAttribute("name"), "-t",
-                        "status", "-D"])
-                    if retval != 0:
-                        utils.err("Unable to remove failcounts from %s on %s\n" % (resource,ta_node) + output)
-                    fail_counts_removed = fail_counts_removed + 1
-                else:
-                    output_dict[ta_node] = " " + ta_node + ": " + nvp.getAttribute("value")
-                break
+    # both resources and nodes may be specified as comma separated lists of
+    # names or shell-style patterns
+    failcount_list = lib_failcount.get_failcounts(
+        utils.iter_cib_status_node_states(),
+        resource.split(","),
+        None if all_nodes else node.split(",")
+    )
 
     if resource_command == "reset":
-        if fail_counts_removed == 0:
+        if not failcount_list:
             print("No failcounts needed resetting")
-    if resource_command == "show":
-        output = []
-        for key in sorted(output_dict.keys()):
-            output.append(output_dict[key])
-
+            return
+        try:
+            lib_pacemaker.reset_failcounts(
+                utils.cmd_runner(), failcount_list, not utils.usefile
+            )
+        except LibraryError as e:
+            utils.process_library_reports(e.args)
+        return
 
-        if not output:
-            if all_nodes:
-                print("No failcounts for %s" % resource)
-            else:
-                print("No failcounts for %s on %s" % (resource,node))
+    table = lib_failcount.get_failcount_table(failcount_list)
+    if not table:
+        if all_nodes:
+            print("No failcounts for %s" % resource)
         else:
-            if all_nodes:
-                print("Failcounts for %s" % resource)
-            else:
-                print("Failcounts for %s on %s" % (resource,node))
-            print("\n".join(output))
+            print("No failcounts for %s on %s" % (resource,node))
+        return
 
+    if all_nodes:
+        print("Failcounts for %s" % resource)
+    else:
+        print("Failcounts for %s on %s" % (resource,node))
+    if list(table.keys()) == [resource]:
+        for table_node, value in sorted(table[resource].items()):
+            print(" " + table_node + ": " + value)
+        return
+    node_list = sorted(set(
+        table_node
+        for node_values in table.values()
+            for table_node in node_values
+    ))
+    row_list = [["Resource"] + node_list] + [
+        [table_resource] + [
+            table[table_resource].get(table_node, "-")
+            for table_node in node_list
+        ]
+        for table_resource in sorted(table)
+    ]
+    width_list = [
+        max([len(row[column]) for row in row_list])
+        for column in range(len(node_list) + 1)
+    ]
+    for row in row_list:
+        print(" " + "  ".join([
+            value.ljust(width) for value, width in zip(row, width_list)
+        ]).rstrip())
 
 def show_defaults(def_type, indent=""):
     dom = utils.get_cib_dom()
@@ -2569,30 +2618,84 @@ def resource_cleanup(argv):
         utils.cmd_runner(), resource, node, force
     ))
 
-def resource_history(args):
-    dom = utils.get_cib_dom()
-    resources = {}
-    lrm_res = dom.getElementsByTagName("lrm_resource")
-    for res in lrm_res:
-        res_id = res.getAttribute("id")
-        if res_id not in resources:
-            resources[res_id] = {}
-        for rsc_op in res.getElementsByTagName("lrm_rsc_op"):
-            resources[res_id][rsc_op.getAttribute("call-id")] = [res_id, rsc_op]
-
-    for res in sorted(resources):
-        print("Resource: %s" % res)
-        for cid in sorted(resources[res]):
-            (last_date, dummy_retval) = utils.run(["date","-d", "@" + resources[res][cid][1].getAttribute("last-rc-change")])
-            last_date = last_date.rstrip()
-            rc_code = resources[res][cid][1].getAttribute("rc-code")
-            operation = resources[res][cid][1].getAttribute("operation")
-            if rc_code != "0":
-                print("  Failed on %s" % last_date)
-            elif operation == "stop":
-                print("  Stopped on node xx on %s" % last_date)
-            elif operation == "start":
-                print("  Started on node xx %s" % last_date)
+def resource_history(argv):
+    time_from = _parse_history_time("--from")
+    time_to = _parse_history_time("--to")
+    rc_code_list = None
+    if "--rc-code" in utils.pcs_options:
+        try:
+            rc_code_list = [
+                int(rc_code)
+                for rc_code in utils.pcs_options["--rc-code"].split(",")
+            ]
+        except ValueError:
+            utils.err(
+                "invalid rc code '{0}'".format(utils.pcs_options["--rc-code"])
+            )
+
+    record_list = sorted(
+        lib_history.iter_operation_history(
+            utils.iter_cib_status_node_states(),
+            resource_id_list=argv,
+            node_list=(
+                [utils.pcs_options["--node"]]
+                if "--node" in utils.pcs_options else None
+            ),
+            time_from=time_from,
+            time_to=time_to,
+            rc_code_list=rc_code_list
+        ),
+        key=lib_history.sort_key
+    )
+
+    if "--json" in utils.pcs_options:
+        print(json.dumps(
+            [lib_history.record_to_dict(record) for record in record_list],
+            sort_keys=True
+        ))
+        return
+
+    show_all = "--full" in utils.pcs_options
+    resource_id = None
+    for record in record_list:
+        if record.resource != resource_id:
+            resource_id = record.resource
+            print("Resource: %s" % resource_id)
+        last_date = (
+            lib_history.format_timestamp(record.last_rc_change)
+            or
+            "unknown date"
+        )
+        if show_all:
+            print("  %s (call %s) on %s on %s: rc-code %s" % (
+                record.operation, record.call_id, record.node, last_date,
+                record.rc_code
+            ))
+        elif record.rc_code != 0:
+            print("  Failed %s on %s on %s (rc-code %s)" % (
+                record.operation, record.node, last_date, record.rc_code
+            ))
+        elif record.operation == "stop":
+            print("  Stopped on %s on %s" % (record.node, last_date))
+        elif record.operation == "start":
+            print("  Started on %s on %s" % (record.node, last_date))
+
+def _parse_history_time(option):
+    # the same format as in "cluster report", a number of seconds since the
+    # epoch is accepted as well
+    if option not in utils.pcs_options:
+        return None
+    value = utils.pcs_options[option].strip()
+    if value.isdigit():
+        return int(value)
+    for time_format in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return int(time.mktime(time.strptime(value, time_format)))
+        except ValueError:
+            pass
+    utils.err(
+        "invalid time '{0}' of {1}, use 'YYYY-M-D H:M:S'".format(value, option)
+    )
 
 def resource_relocate(argv):
     if len(argv) < 1:
@@ -2756,7 +2859,7 @@ def resource_relocate_run(cib_dom, resources=None, dry=True):
             new_constraint.setAttribute("role", "Master")
         elif "start_on_node" in location:
             new_constraint.setAttribute("node", location["start_on_node"])
-        constraint_el.appendChild(new_constraint)
+        constraint.add_constraint_element(constraint_el, new_constraint)
     if not anything_changed:
         return
     if not dry:
@@ -2789,7 +2892,7 @@ def resource_relocate_clear(cib_dom):
             location_id = location_el.getAttribute("id")
             if location_id.startswith(RESOURCE_RELOCATE_CONSTRAINT_PREFIX):
                 print("Removing constraint {0}".format(location_id))
-                location_el.parentNode.removeChild(location_el)
+                constraint.remove_constraint_element(location_el)
     return cib_dom
 
 def set_resource_utilization(resource_id, argv):
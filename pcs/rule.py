@@ -955,6 +955,7 @@ class CibBuilder(object):
         dom = parent.ownerDocument
         child = parent.appendChild(dom.createElement(tag_name))
         child.setAttribute("id", utils.find_unique_id(dom, element_id))
+        utils.dom_id_index_add(child)
         return child
 
 
@@ -38,3 +38,28 @@ ocf_resources = os.path.join(ocf_root, "resource.d/")
 nagios_metadata_path = "/usr/share/pacemaker/nagios/plugins-metadata/"
 sbd_watchdog_default = "/dev/watchdog"
 sbd_config = "/etc/sysconfig/sbd"
+# cache of agents and daemons metadata, set to None to disable the cache
+pcs_cache_dir = "/var/cache/pcs/"
+# maximal number of agents asked for their metadata at once
+agent_metadata_max_parallel = 8
+# number of seconds an agent is given to print its metadata when listing agents
+agent_metadata_timeout = 10
+# maximal number of nodes contacted at once by library commands
+node_communication_max_parallel = 16
+# maximal number of idle connections to pcsd kept open for each node
+node_connection_pool_max_per_host = 4
+# number of seconds an idle connection to pcsd is kept open
+node_connection_pool_idle_timeout = 10
+# number of seconds given to connecting to pcsd on a node
+node_connect_timeout = 10
+# number of seconds a node which could not be connected to due to a timeout or
+# an unreachable network is considered unreachable, requests to the node fail
+# right away during that time
+node_unreachable_ttl = 60
+# unix socket of the server running pcs commands for pcsd
+pcs_command_server_socket = "/var/run/pcsd-pcs.socket"
+# maximal number of commands run by the pcs command server at once
+pcs_command_server_max_workers = 8
+# number of seconds after which a command run by the pcs command server is
+# killed
+pcs_command_server_timeout = 600
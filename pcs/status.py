@@ -124,10 +124,8 @@ def nodes_status(argv):
         if argv[0] != "both":
             sys.exit(0)
 
-    info_dom = utils.getClusterState()
-
-    nodes = info_dom.getElementsByTagName("nodes")
-    if nodes.length == 0:
+    nodes = utils.get_cluster_state_section("nodes")
+    if nodes is None:
         utils.err("No nodes section found")
 
     onlinenodes = []
@@ -138,16 +136,16 @@ def nodes_status(argv):
     remote_offlinenodes = []
     remote_standbynodes = []
     remote_maintenancenodes = []
-    for node in nodes[0].getElementsByTagName("node"):
-        node_name = node.getAttribute("name")
-        node_remote = node.getAttribute("type") == "remote"
-        if node.getAttribute("online") == "true":
-            if node.getAttribute("standby") == "true":
+    for node in nodes.iterfind("node"):
+        node_name = node.get("name")
+        node_remote = node.get("type") == "remote"
+        if node.get("online") == "true":
+            if node.get("standby") == "true":
                 if node_remote:
                     remote_standbynodes.append(node_name)
                 else:
                     standbynodes.append(node_name)
-            elif node.getAttribute("maintenance") == "true":
+            elif node.get("maintenance") == "true":
                 if node_remote:
                     remote_maintenancenodes.append(node_name)
                 else:
@@ -98,30 +98,31 @@ def stonith_list_available(argv):
     if not fence_devices_filtered:
         utils.err("No stonith agents matching the filter.")
 
-    for fd in fence_devices_filtered:
+    agent_name_list = [os.path.basename(fd) for fd in fence_devices_filtered]
+    if "--nodesc" in utils.pcs_options:
+        for agent_name in agent_name_list:
+            print(agent_name)
+        return
+
+    # Metadata are gathered in parallel, reports and output are printed
+    # afterwards to keep them in order.
+    for agent_name, shortdesc, error in resource.get_agents_shortdesc(
+        lib_ra.get_fence_agent_metadata, agent_name_list
+    ):
         sd = ""
-        agent_name = os.path.basename(fd)
-        if "--nodesc" not in utils.pcs_options:
-            try:
-                metadata = lib_ra.get_fence_agent_metadata(
-                    utils.cmd_runner(), agent_name
+        if isinstance(error, lib_ra.ResourceAgentLibError):
+            utils.process_library_reports([
+                lib_ra.resource_agent_lib_error_to_report_item(
+                    error, ReportItemSeverity.WARNING
                 )
-                shortdesc = lib_ra.get_agent_desc(metadata)["shortdesc"]
-                if shortdesc:
-                    sd = " - " + resource.format_desc(
-                        len(agent_name) + 3, shortdesc
-                    )
-            except lib_ra.ResourceAgentLibError as e:
-                utils.process_library_reports([
-                    lib_ra.resource_agent_lib_error_to_report_item(
-                        e, ReportItemSeverity.WARNING
-                    )
-                ])
-            except LibraryError as e:
-                utils.err(
-                    e.args[-1].message, False
-                )
-                continue
+            ])
+        elif error is not None:
+            utils.err(
+                error.args[-1].message, False
+            )
+            continue
+        elif shortdesc:
+            sd = " - " + resource.format_desc(len(agent_name) + 3, shortdesc)
         print(agent_name + sd)
 
 def stonith_list_options(stonith_agent):
@@ -247,6 +248,7 @@ def stonith_level_add(level, node, devices):
     new_fl.setAttribute("index", level)
     new_fl.setAttribute("devices", devices)
     new_fl.setAttribute("id", utils.find_unique_id(dom, "fl-" + node +"-" + level))
+    utils.dom_id_index_add(new_fl)
 
     utils.replace_cib_configuration(dom)
 
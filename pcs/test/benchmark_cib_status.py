@@ -0,0 +1,156 @@
+"""
+Measure memory used when reading the status section of a large CIB
+
+The CIB is made of test/resources/cib-large.xml with a status section added
+which holds operation history of all its resources, so the CIB is the
+specified number of times bigger than the fixture.
+
+Usage: python -m pcs.test.benchmark_cib_status [<scale>]
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+from xml.dom.minidom import parseString
+
+from lxml import etree
+
+from pcs.test.tools.misc import get_test_resource as rc
+
+from pcs.lib import pacemaker_history
+from pcs.lib.tools import iterparse_elements
+
+
+OPERATION_TEMPLATE = (
+    '<lrm_rsc_op id="{resource}_{operation}_{interval}" '
+    'operation_key="{resource}_{operation}_{interval}" '
+    'operation="{operation}" crm-debug-origin="do_update_resource" '
+    'crm_feature_set="3.0.10" '
+    'transition-key="1:2:0:6f2f2b3c-0000-0000-0000-000000000000" '
+    'transition-magic="0:0;1:2:0:6f2f2b3c-0000-0000-0000-000000000000" '
+    'call-id="{call_id}" rc-code="{rc_code}" op-status="0" '
+    'interval="{interval}" last-rc-change="1476784800" exec-time="20" '
+    'queue-time="0" op-digest="f2317cad3d54cec5d7d7aa7d0bf35cf8"/>'
+)
+
+
+def fixture_large_cib(scale):
+    with open(rc("cib-large.xml")) as cib_file:
+        cib_xml = cib_file.read()
+    resource_id_list = [
+        primitive.get("id")
+        for primitive in etree.fromstring(cib_xml.encode("utf-8")).iterfind(
+            ".//primitive"
+        )
+    ]
+    target_size = len(cib_xml) * scale
+    node_state_list = []
+    size = len(cib_xml)
+    node_index = 0
+    while size < target_size:
+        node_index += 1
+        node_state = _fixture_node_state(node_index, resource_id_list)
+        node_state_list.append(node_state)
+        size += len(node_state)
+    return cib_xml.replace(
+        "<status/>", "<status>{0}</status>".format("".join(node_state_list))
+    )
+
+
+def _fixture_node_state(node_index, resource_id_list):
+    part_list = [
+        '<node_state id="{0}" uname="node-{0}" in_ccm="true" crmd="online">'
+            '<lrm id="{0}"><lrm_resources>'.format(node_index)
+    ]
+    for resource_index, resource_id in enumerate(resource_id_list):
+        part_list.append(
+            '<lrm_resource id="{0}" type="Dummy" class="ocf" '
+                'provider="heartbeat">'.format(resource_id)
+        )
+        for operation, interval, rc_code in [
+            ("start", 0, 0), ("monitor", 10000, 7), ("stop", 0, 0)
+        ]:
+            part_list.append(OPERATION_TEMPLATE.format(
+                resource=resource_id,
+                operation=operation,
+                interval=interval,
+                call_id=resource_index,
+                rc_code=rc_code,
+            ))
+        part_list.append("</lrm_resource>")
+    part_list.append("</lrm_resources></lrm></node_state>")
+    return "".join(part_list)
+
+
+def _read_minidom(cib_xml):
+    dom = parseString(cib_xml)
+    return len(dom.getElementsByTagName("lrm_rsc_op"))
+
+def _read_tree(cib_xml):
+    status = etree.fromstring(cib_xml.encode("utf-8")).find("status")
+    return len(list(pacemaker_history.iter_operation_history(
+        status.iterfind("node_state")
+    )))
+
+def _read_stream(cib_xml):
+    return len(list(pacemaker_history.iter_operation_history(
+        iterparse_elements(cib_xml, "node_state")
+    )))
+
+def _read_none(cib_xml):
+    return 0
+
+READERS = {
+    "none": _read_none,
+    "minidom": _read_minidom,
+    "tree": _read_tree,
+    "stream": _read_stream,
+}
+
+
+def measure(reader, path):
+    # peak memory of a process never decreases, every reader runs in its own
+    with open(path) as cib_file:
+        cib_xml = cib_file.read()
+    record_count = READERS[reader](cib_xml)
+    print(
+        record_count,
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+    )
+
+
+def main(argv):
+    if argv and argv[0] == "--measure":
+        measure(argv[1], argv[2])
+        return
+    scale = int(argv[0]) if argv else 100
+    fd, path = tempfile.mkstemp(suffix=".xml")
+    try:
+        with os.fdopen(fd, "w") as cib_file:
+            cib_file.write(fixture_large_cib(scale))
+        print("CIB size: {0} MB".format(os.path.getsize(path) // 2**20))
+        print("{0:>8} {1:>10} {2:>16}".format(
+            "reader", "records", "peak memory [MB]"
+        ))
+        for reader in ["none", "minidom", "tree", "stream"]:
+            record_count, peak_memory = subprocess.check_output([
+                sys.executable, "-m", "pcs.test.benchmark_cib_status",
+                "--measure", reader, path
+            ]).decode("utf-8").split()
+            print("{0:>8} {1:>10} {2:>16}".format(
+                reader, record_count, peak_memory
+            ))
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
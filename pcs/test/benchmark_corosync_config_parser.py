@@ -0,0 +1,50 @@
+"""
+Measure parsing and exporting of large corosync.conf files
+
+Usage: python -m pcs.test.benchmark_corosync_config_parser [<node count>...]
+"""
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+import sys
+import timeit
+
+from pcs.test.test_lib_corosync_config_parser import (
+    fixture_large_corosync_conf,
+)
+
+from pcs.lib.corosync import config_parser
+
+
+def benchmark(node_count, repeat=5):
+    conf_text = fixture_large_corosync_conf(node_count)
+    parsed = config_parser.parse_string(conf_text)
+    if parsed.export() != conf_text:
+        raise AssertionError("round trip changed the config")
+    parse_time = min(timeit.repeat(
+        lambda: config_parser.parse_string(conf_text), number=1, repeat=repeat
+    ))
+    export_time = min(timeit.repeat(
+        parsed.export, number=1, repeat=repeat
+    ))
+    return len(conf_text.split("\n")), parse_time, export_time
+
+
+def main(argv):
+    node_count_list = [int(arg) for arg in argv] or [100, 1000, 10000]
+    print("{0:>8} {1:>8} {2:>10} {3:>10}".format(
+        "nodes", "lines", "parse [s]", "export [s]"
+    ))
+    for node_count in node_count_list:
+        line_count, parse_time, export_time = benchmark(node_count)
+        print("{0:>8} {1:>8} {2:>10.4f} {3:>10.4f}".format(
+            node_count, line_count, parse_time, export_time
+        ))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
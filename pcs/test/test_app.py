@@ -0,0 +1,113 @@
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+from unittest import TestCase
+import importlib
+import json
+import os.path
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from pcs import app
+
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)
+)))
+
+
+def get_modules_loaded_by(code, env=None):
+    # a new interpreter is needed, tests load all the modules
+    output = subprocess.check_output(
+        [
+            sys.executable,
+            "-c",
+            "import json, sys\n{0}\nprint(json.dumps(list(sys.modules)))".format(
+                code
+            ),
+        ],
+        cwd=PACKAGE_DIR,
+        env=env
+    )
+    return set(json.loads(output.decode("utf-8").strip().splitlines()[-1]))
+
+
+class StartupImportsTest(TestCase):
+    """
+    Modules loaded at start-up make every pcs run slower, keep them at minimum
+    """
+    lazy_module_list = [
+        "clufter",
+        "pcs.cluster",
+        "pcs.config",
+        "pcs.constraint",
+        "pcs.lib.https_pool",
+        "pcs.resource",
+        "pcs.status",
+        "pcs.stonith",
+    ]
+
+    def assert_not_loaded(self, module_list, loaded):
+        self.assertEqual(
+            [],
+            [module for module in module_list if module in loaded]
+        )
+
+    def test_import_app(self):
+        loaded = get_modules_loaded_by("import pcs.app")
+        self.assert_not_loaded(self.lazy_module_list, loaded)
+        self.assert_not_loaded(["http.client", "httplib", "ssl"], loaded)
+
+    def test_load_only_module_of_run_command(self):
+        loaded = get_modules_loaded_by(
+            "import pcs.app\n"
+            "try:\n"
+            "    pcs.app.main(['pcsd', 'help'])\n"
+            "except SystemExit:\n"
+            "    pass"
+        )
+        self.assertTrue("pcs.pcsd" in loaded)
+        self.assert_not_loaded(self.lazy_module_list, loaded)
+
+    def test_completion(self):
+        # completion may store its tree in the cache, keep it off the system
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        env = dict(os.environ)
+        env.update({
+            "COMP_WORDS": "pcs reso",
+            "COMP_LENGTHS": "3 4",
+            "COMP_CWORD": "1",
+            "PCS_AUTO_COMPLETE": "1",
+        })
+        loaded = get_modules_loaded_by(
+            "import pcs.settings\n"
+            "pcs.settings.pcs_cache_dir = {0}\n"
+            "import pcs.app\n"
+            "try:\n"
+            "    pcs.app.main([])\n"
+            "except SystemExit:\n"
+            "    pass".format(repr(cache_dir)),
+            env
+        )
+        self.assert_not_loaded(
+            self.lazy_module_list + ["pcs.utils", "lxml", "getopt"], loaded
+        )
+
+
+class CommandMapTest(TestCase):
+    def test_all_commands_exist(self):
+        for module_name, function_name in app.COMMAND_MAP.values():
+            self.assertTrue(callable(getattr(
+                importlib.import_module(module_name), function_name
+            )))
+
+    def test_library_commands(self):
+        for command in app.LIBRARY_COMMAND_LIST:
+            self.assertTrue(command in app.COMMAND_MAP)
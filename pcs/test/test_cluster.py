@@ -19,14 +19,18 @@ from pcs.test.tools.pcs_runner import (
     pcs,
     PcsRunner,
 )
+from pcs.test.tools.pcs_mock import mock
 
-from pcs import utils
+from pcs import cluster, utils
+from pcs.common.tools import Deadline, TaskResult
+from pcs.cli.common.errors import CmdLineInputError
 
 empty_cib = rc("cib-empty-withnodes.xml")
 temp_cib = rc("temp-cib.xml")
 cluster_conf_file = rc("cluster.conf")
 cluster_conf_tmp = rc("cluster.conf.tmp")
 corosync_conf_tmp = rc("corosync.conf.tmp")
+batch_tmp = rc("batch.tmp")
 
 class ClusterTest(unittest.TestCase, AssertPcsMixin):
     def setUp(self):
@@ -2669,3 +2673,244 @@ logging {
   </rm>
 </cluster>
 """)
+
+
+@mock.patch("pcs.cluster.print", create=True)
+@mock.patch("pcs.utils.map_parallel")
+class WaitForNodesStartedTest(unittest.TestCase):
+    def test_all_started(self, mock_map, mock_print):
+        mock_map.return_value = [
+            TaskResult(True, (0, "Started"), None),
+            TaskResult(True, (0, "Started\n"), None),
+        ]
+        cluster.wait_for_nodes_started(["node1", "node2"], 30)
+        self.assertEqual(
+            [
+                mock.call("Waiting for node(s) to start..."),
+                mock.call("node1: Started"),
+                mock.call("node2: Started"),
+            ],
+            mock_print.call_args_list
+        )
+
+    def test_nodes_share_deadline(self, mock_map, mock_print):
+        mock_map.return_value = [
+            TaskResult(True, (0, "Started"), None),
+            TaskResult(True, (0, "Started"), None),
+        ]
+        cluster.wait_for_nodes_started(["node1", "node2"], 30)
+        mock_map.assert_called_once_with(
+            cluster.wait_for_remote_node_started,
+            mock.ANY,
+            call_timeout=32
+        )
+        data_list = mock_map.call_args[0][1]
+        self.assertEqual(
+            ["node1", "node2"], [args[0] for args, kwargs in data_list]
+        )
+        self.assertTrue(data_list[0][0][1] is data_list[1][0][1])
+        self.assertTrue(isinstance(data_list[0][0][1], Deadline))
+
+    @mock.patch("pcs.utils.err")
+    def test_timed_out_node_reported_once(self, mock_err, mock_map, mock_print):
+        mock_map.return_value = [
+            TaskResult(True, (0, "Started"), None),
+            TaskResult(False, None, None),
+            TaskResult(True, (1, "Unable to authenticate"), None),
+        ]
+        cluster.wait_for_nodes_started(["node1", "node2", "node3"], 30)
+        self.assertEqual(
+            [
+                mock.call("Waiting for node(s) to start..."),
+                mock.call("node1: Started"),
+                mock.call("node2: Waiting timeout"),
+                mock.call("node3: Unable to authenticate"),
+            ],
+            mock_print.call_args_list
+        )
+        mock_err.assert_called_once_with(
+            "unable to verify all nodes have started"
+        )
+
+
+class ParseBatchTest(unittest.TestCase):
+    def test_success(self):
+        self.assertEqual(
+            [
+                (2, ["resource", "create", "D1", "Dummy"]),
+                (4, ["constraint", "location", "D1", "prefers", "node 1"]),
+            ],
+            cluster.parse_batch([
+                "# comment\n",
+                "resource create D1 Dummy\n",
+                "\n",
+                "pcs constraint location D1 prefers 'node 1' # comment\n",
+            ])
+        )
+
+    def test_unsupported_command(self):
+        self.assertRaises(
+            CmdLineInputError,
+            lambda: cluster.parse_batch(["resource show\n", "cluster stop\n"])
+        )
+
+    def test_unbalanced_quotes(self):
+        self.assertRaises(
+            CmdLineInputError,
+            lambda: cluster.parse_batch(["resource create 'D1 Dummy\n"])
+        )
+
+    def test_command_without_subcommand(self):
+        self.assertEqual(
+            [(1, ["resource"]), (2, ["property", "--all"])],
+            cluster.parse_batch(["resource\n", "property --all\n"])
+        )
+
+    def test_subcommand_after_options(self):
+        self.assertEqual(
+            [(1, ["resource", "--force", "delete", "D1"])],
+            cluster.parse_batch(["resource --force delete D1\n"])
+        )
+
+    def test_live_cluster_subcommands(self):
+        for line in [
+            "resource cleanup D1\n",
+            "resource failcount reset D1\n",
+            "resource restart D1\n",
+            "resource debug-start D1\n",
+            "resource relocate run\n",
+            "resource --force cleanup\n",
+            "stonith fence node1\n",
+            "stonith confirm node1\n",
+            "stonith sbd enable\n",
+        ]:
+            self.assertRaises(
+                CmdLineInputError, lambda: cluster.parse_batch([line])
+            )
+
+
+    def test_wait_rejected(self):
+        for line in [
+            "resource create D1 Dummy --wait\n",
+            "resource disable D1 --wait=10\n",
+        ]:
+            self.assertRaises(
+                CmdLineInputError, lambda: cluster.parse_batch([line])
+            )
+
+
+class RunBatchTest(unittest.TestCase):
+    @mock.patch("pcs.app.main")
+    def test_snapshot_dropped_after_each_command(self, mock_main):
+        snapshot_list = []
+        def main(argv):
+            snapshot_list.append(utils._cib_snapshot["tree"])
+            utils._cib_snapshot["tree"] = "loaded by {0}".format(argv[-1])
+            if argv[-1] == "fail":
+                raise SystemExit(1)
+        mock_main.side_effect = main
+        self.assertEqual(
+            3,
+            cluster._run_batch(
+                [(1, ["first"]), (2, ["second"]), (3, ["fail"])], "cib.xml"
+            )
+        )
+        self.assertEqual([None, None, None], snapshot_list)
+        self.assertEqual(None, utils._cib_snapshot["tree"])
+
+
+@mock.patch("pcs.cluster.print", create=True)
+@mock.patch("pcs.utils.usefile", False)
+@mock.patch("pcs.utils.cmd_runner")
+@mock.patch("pcs.utils.get_cib")
+@mock.patch("pcs.cluster._run_batch")
+@mock.patch("pcs.cluster.lib_pacemaker.push_cib_configuration_xml")
+class ClusterBatchPushTest(unittest.TestCase):
+    def setUp(self):
+        with open(batch_tmp, "w") as batch_file:
+            batch_file.write("resource create D1 Dummy\n")
+
+    def tearDown(self):
+        os.unlink(batch_tmp)
+
+    def test_push_changes_against_original(
+        self, mock_push, mock_run_batch, mock_get_cib, mock_runner, mock_print
+    ):
+        mock_get_cib.return_value = "<cib original/>"
+        def run_batch(command_list, cib_file_name):
+            with open(cib_file_name, "w") as cib_file:
+                cib_file.write("<cib batch/>")
+        mock_run_batch.side_effect = run_batch
+        cluster.cluster_batch([batch_tmp])
+        mock_push.assert_called_once_with(
+            mock_runner.return_value, "<cib batch/>", "<cib original/>"
+        )
+        mock_print.assert_called_once_with("CIB updated")
+
+    @mock.patch("pcs.utils.err", side_effect=SystemExit(1))
+    def test_failure_not_pushed(
+        self, mock_err, mock_push, mock_run_batch, mock_get_cib, mock_runner,
+        mock_print
+    ):
+        mock_get_cib.return_value = "<cib original/>"
+        mock_run_batch.return_value = 1
+        self.assertRaises(SystemExit, cluster.cluster_batch, [batch_tmp])
+        mock_err.assert_called_once_with(
+            "Command on line 1 failed, CIB not updated"
+        )
+        mock_push.assert_not_called()
+
+
+class ClusterBatchTest(unittest.TestCase, AssertPcsMixin):
+    def setUp(self):
+        shutil.copy(empty_cib, temp_cib)
+        self.pcs_runner = PcsRunner(temp_cib)
+
+    def tearDown(self):
+        if os.path.exists(batch_tmp):
+            os.unlink(batch_tmp)
+
+    def write_batch(self, content):
+        with open(batch_tmp, "w") as batch_file:
+            batch_file.write(content)
+
+    def test_success(self):
+        self.write_batch(
+            "resource create D1 Dummy --no-default-ops\n"
+            "pcs resource create D2 Dummy --no-default-ops\n"
+        )
+        self.assert_pcs_success(
+            "cluster batch {0}".format(batch_tmp),
+            "CIB updated\n"
+        )
+        self.assert_pcs_success(
+            "resource show",
+            " D1\t(ocf::heartbeat:Dummy):\tStopped\n"
+            " D2\t(ocf::heartbeat:Dummy):\tStopped\n"
+        )
+
+    def test_failure(self):
+        self.write_batch(
+            "resource create D1 Dummy --no-default-ops\n"
+            "resource create D1 Dummy --no-default-ops\n"
+        )
+        self.assert_pcs_fail(
+            "cluster batch {0}".format(batch_tmp),
+            "Error: unable to create resource/fence device 'D1', 'D1' "
+                "already exists on this system\n"
+            "Error: Command on line 2 failed, CIB not updated\n"
+        )
+        self.assert_pcs_success("resource show", "NO resources configured\n")
+
+    def test_delete_does_not_stop_resource(self):
+        self.assert_pcs_success(
+            "resource create D1 Dummy --no-default-ops"
+        )
+        self.write_batch("resource delete D1\n")
+        # no attempt to stop the resource as in a live cluster
+        self.assert_pcs_success(
+            "cluster batch {0}".format(batch_tmp),
+            "Deleting Resource - D1\n"
+            "CIB updated\n"
+        )
+        self.assert_pcs_success("resource show", "NO resources configured\n")
@@ -0,0 +1,115 @@
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+from unittest import TestCase
+import json
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+
+from pcs.test.tools.pcs_mock import mock
+
+from pcs import command_server
+
+
+def fake_main(argv):
+    if argv == ["sleep"]:
+        time.sleep(10)
+    if argv == ["fail"]:
+        raise SystemExit("Error: failed")
+    print("argv: {0}".format(" ".join(argv)))
+    print("user: {0}".format(os.environ.get("CIB_user")))
+    print("stdin: {0}".format(sys.stdin.read().strip()))
+    sys.stderr.write("to stderr\n")
+    sys.exit(len(argv))
+
+
+class CommandServerTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.socket_path = os.path.join(self.tmp_dir, "pcs.socket")
+        self.server_pid = os.fork()
+        if self.server_pid == 0:
+            try:
+                with mock.patch("pcs.app.main", fake_main):
+                    command_server.serve(self.socket_path, 2, 1)
+            finally:
+                os._exit(0)
+        self.addCleanup(self.stop_server)
+        for dummy in range(50):
+            if os.path.exists(self.socket_path):
+                break
+            time.sleep(0.1)
+
+    def stop_server(self):
+        os.kill(self.server_pid, signal.SIGTERM)
+        os.waitpid(self.server_pid, 0)
+
+    def call(self, request):
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            client.connect(self.socket_path)
+            client.sendall(request + b"\n")
+            return json.loads(client.makefile("rb").read().decode("utf-8"))
+        finally:
+            client.close()
+
+    def call_command(self, argv, **kwargs):
+        request = dict(argv=argv, **kwargs)
+        return self.call(json.dumps(request).encode("utf-8"))
+
+    def test_socket_permissions(self):
+        self.assertEqual(0, os.stat(self.socket_path).st_mode & 0o077)
+
+    def test_run_command(self):
+        self.assertEqual(
+            {
+                "stdout": "argv: resource show\nuser: hacluster\nstdin: data\n",
+                "stderr": "to stderr\n",
+                "exit_code": 2,
+            },
+            self.call_command(
+                ["resource", "show"],
+                env={"CIB_user": "hacluster"},
+                stdin="data\n"
+            )
+        )
+
+    def test_environment_is_not_shared(self):
+        self.call_command(["a"], env={"CIB_user": "hacluster"})
+        response = self.call_command(["a"])
+        self.assertEqual(
+            "argv: a\nuser: None\nstdin: \n",
+            response["stdout"]
+        )
+
+    def test_exit_with_message(self):
+        self.assertEqual(
+            {"stdout": "", "stderr": "Error: failed\n", "exit_code": 1},
+            self.call_command(["fail"])
+        )
+
+    def test_invalid_request(self):
+        self.assertEqual(
+            {"stdout": "", "stderr": "Error: invalid request\n", "exit_code": 1},
+            self.call(b"[]")
+        )
+
+    def test_timeout(self):
+        self.assertEqual(
+            {
+                "stdout": "",
+                "stderr": "Error: command timed out after 1 seconds\n",
+                "exit_code": 1,
+            },
+            self.call_command(["sleep"])
+        )
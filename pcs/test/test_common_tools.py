@@ -6,8 +6,11 @@ from __future__ import (
 )
 
 from unittest import TestCase
+import threading
 import time
 
+from pcs.test.tools.pcs_mock import mock
+
 from pcs.common import tools
 
 
@@ -50,7 +53,7 @@ class RunParallelTestCase(TestCase):
     def test_run_all(self):
         data_list = [([i], {}) for i in range(5)]
         out_list = []
-        tools.run_parallel(out_list.append, data_list)
+        tools.run_parallel(out_list.append, data_list, 5)
         self.assertEqual(sorted(out_list), [i for i in range(5)])
 
     def test_parallelism(self):
@@ -58,8 +61,225 @@ class RunParallelTestCase(TestCase):
         data_list = [[[i + 1], {}] for i in range(x)]
         start_time = time.time()
         # this should last for least x seconds, but less than sum of all times
-        tools.run_parallel(time.sleep, data_list)
+        tools.run_parallel(time.sleep, data_list, x)
         finish_time = time.time()
         elapsed_time = finish_time - start_time
         self.assertTrue(elapsed_time > x)
         self.assertTrue(elapsed_time < sum([i + 1 for i in range(x)]))
+
+    def test_max_workers(self):
+        running = []
+        max_running = []
+        lock = threading.Lock()
+        def worker(i):
+            with lock:
+                running.append(i)
+                max_running.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(i)
+        tools.run_parallel(worker, [([i], {}) for i in range(6)], 2)
+        self.assertEqual(6, len(max_running))
+        self.assertEqual(2, max(max_running))
+
+
+class ParallelExecutorTest(TestCase):
+    def test_ordered_results(self):
+        def worker(i):
+            time.sleep(0.01 * (5 - i))
+            return i * 10
+        result_list = tools.ParallelExecutor(3).map(
+            worker, [([i], {}) for i in range(5)]
+        )
+        self.assertEqual(
+            [tools.TaskResult(True, i * 10, None) for i in range(5)],
+            result_list
+        )
+
+    def test_empty(self):
+        self.assertEqual([], tools.ParallelExecutor(3).map(time.sleep, []))
+
+    def test_errors_are_collected(self):
+        error = TestException()
+        def worker(i):
+            if i == 1:
+                raise error
+            return i
+        result_list = tools.ParallelExecutor(3).map(
+            worker, [([i], {}) for i in range(3)]
+        )
+        self.assertEqual(
+            [
+                tools.TaskResult(True, 0, None),
+                tools.TaskResult(True, None, error),
+                tools.TaskResult(True, 2, None),
+            ],
+            result_list
+        )
+
+    def test_call_timeout(self):
+        release = threading.Event()
+        def worker(i):
+            if i == 1:
+                release.wait(5)
+            return i
+        start_time = time.time()
+        result_list = tools.ParallelExecutor(3).map(
+            worker, [([i], {}) for i in range(3)], 0.1
+        )
+        release.set()
+        self.assertTrue(time.time() - start_time < 2)
+        self.assertEqual(
+            [
+                tools.TaskResult(True, 0, None),
+                tools.TaskResult(False, None, None),
+                tools.TaskResult(True, 2, None),
+            ],
+            result_list
+        )
+
+    def test_call_timeout_starts_with_call(self):
+        def worker(i):
+            time.sleep(0.2)
+            return i
+        # each call fits its own timeout, all of them would not fit one
+        result_list = tools.ParallelExecutor(1).map(
+            worker, [([i], {}) for i in range(3)], 0.5
+        )
+        self.assertEqual(
+            [tools.TaskResult(True, i, None) for i in range(3)],
+            result_list
+        )
+
+    def test_timed_out_call_keeps_its_thread(self):
+        log = []
+        def worker(i):
+            log.append(("start", i))
+            if i == 0:
+                time.sleep(0.3)
+            log.append(("end", i))
+            return i
+        result_list = tools.ParallelExecutor(1).map(
+            worker, [([i], {}) for i in range(3)], 0.1
+        )
+        self.assertEqual(
+            [
+                tools.TaskResult(False, None, None),
+                tools.TaskResult(True, 1, None),
+                tools.TaskResult(True, 2, None),
+            ],
+            result_list
+        )
+        # the next call waits for the thread of the timed out call to exit
+        self.assertEqual(
+            [
+                ("start", 0), ("end", 0),
+                ("start", 1), ("end", 1),
+                ("start", 2), ("end", 2),
+            ],
+            log
+        )
+
+    def test_threads_bounded_with_timeouts(self):
+        running = []
+        max_running = []
+        lock = threading.Lock()
+        def worker(i):
+            with lock:
+                running.append(i)
+                max_running.append(len(running))
+            time.sleep(0.1)
+            with lock:
+                running.remove(i)
+        tools.ParallelExecutor(2).map(
+            worker, [([i], {}) for i in range(6)], 0.01
+        )
+        self.assertEqual(6, len(max_running))
+        self.assertEqual(2, max(max_running))
+
+    def test_do_not_wait_for_last_timed_out_call(self):
+        release = threading.Event()
+        def worker(i):
+            release.wait(5)
+        start_time = time.time()
+        result_list = tools.ParallelExecutor(2).map(
+            worker, [([i], {}) for i in range(2)], 0.1
+        )
+        release.set()
+        self.assertTrue(time.time() - start_time < 2)
+        self.assertEqual([tools.TaskResult(False, None, None)] * 2, result_list)
+
+    def test_cancel(self):
+        executor = tools.ParallelExecutor(1)
+        def worker(i):
+            if i == 1:
+                executor.cancel()
+            return i
+        self.assertFalse(executor.cancelled)
+        result_list = executor.map(worker, [([i], {}) for i in range(4)])
+        self.assertTrue(executor.cancelled)
+        self.assertEqual(
+            [
+                tools.TaskResult(True, 0, None),
+                tools.TaskResult(True, 1, None),
+                tools.TaskResult(False, None, None),
+                tools.TaskResult(False, None, None),
+            ],
+            result_list
+        )
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class WaitForTest(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch("pcs.common.tools.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_done_immediately(self):
+        self.assertEqual(
+            "done",
+            tools.wait_for(lambda: "done", tools.Deadline(10), 2)
+        )
+        self.assertEqual([], self.clock.sleeps)
+
+    def test_fixed_interval(self):
+        results = [None] * 6 + ["done"]
+        self.assertEqual(
+            "done",
+            tools.wait_for(lambda: results.pop(0), tools.Deadline(None), 2)
+        )
+        self.assertEqual([2] * 6, self.clock.sleeps)
+
+    def test_timeout(self):
+        calls = []
+        def condition():
+            calls.append(self.clock.now)
+            return False
+        self.assertEqual(
+            False, tools.wait_for(condition, tools.Deadline(5), 2)
+        )
+        # the condition is checked once more when the deadline is reached
+        self.assertEqual([2, 2, 1], self.clock.sleeps)
+        self.assertEqual([1000.0, 1002.0, 1004.0, 1005.0], calls)
+
+    def test_shared_deadline(self):
+        deadline = tools.Deadline(3)
+        tools.wait_for(lambda: False, deadline, 1)
+        self.assertTrue(deadline.expired())
+        self.assertEqual(0, deadline.remaining())
+        self.assertEqual(False, tools.wait_for(lambda: False, deadline, 1))
+        self.assertEqual(1003.0, self.clock.now)
@@ -8,6 +8,7 @@ from __future__ import (
 import os
 import shutil
 import unittest
+from xml.dom.minidom import parseString
 
 from pcs.test.tools.assertions import AssertPcsMixin, console_report
 from pcs.test.tools.misc import (
@@ -15,8 +16,11 @@ from pcs.test.tools.misc import (
     get_test_resource as rc,
     is_minimum_pacemaker_version,
 )
+from pcs.test.tools.pcs_mock import mock
 from pcs.test.tools.pcs_runner import pcs, PcsRunner
 
+from pcs import constraint
+
 
 empty_cib = rc("cib-empty.xml")
 empty_cib_1_2 = rc("cib-empty-1.2.xml")
@@ -2701,3 +2705,297 @@ class TicketShow(ConstraintBaseTest):
                 "    set A B setoptions ticket=T",
             ]
         )
+
+class FindConstraintsContainingTest(unittest.TestCase):
+    cib_xml = """
+        <cib><configuration>
+            <resources>
+                <primitive id="A"/>
+                <clone id="B-clone"><primitive id="B"/></clone>
+                <primitive id="C"/>
+            </resources>
+            <constraints>
+                <rsc_location id="loc-A" rsc="A" node="n1" score="1"/>
+                <rsc_colocation id="col-A-A" rsc="A" with-rsc="A" score="1"/>
+                <rsc_order id="ord-C-A" first="C" then="A"/>
+                <rsc_location id="loc-B-clone" rsc="B-clone" node="n1"
+                    score="1"
+                />
+                <rsc_ticket id="tck-B" rsc="B" ticket="T"/>
+                <rsc_order id="ord-set">
+                    <resource_set id="set-1">
+                        <resource_ref id="A"/>
+                        <resource_ref id="C"/>
+                    </resource_set>
+                    <resource_set id="set-2">
+                        <resource_ref id="A"/>
+                    </resource_set>
+                </rsc_order>
+            </constraints>
+        </configuration></cib>
+    """
+
+    def setUp(self):
+        self.dom = parseString(self.cib_xml)
+
+    def test_find(self):
+        self.assertEqual(
+            (["col-A-A", "loc-A", "ord-C-A"], ["ord-set"]),
+            constraint.find_constraints_containing("A", self.dom)
+        )
+
+    def test_find_including_clone(self):
+        self.assertEqual(
+            (["loc-B-clone", "tck-B"], []),
+            constraint.find_constraints_containing("B", self.dom)
+        )
+
+    def test_find_nothing(self):
+        self.assertEqual(
+            ([], []),
+            constraint.find_constraints_containing("D", self.dom)
+        )
+
+    def test_no_constraints_section(self):
+        self.assertEqual(
+            ([], []),
+            constraint.find_constraints_containing(
+                "A", parseString("<cib><configuration/></cib>")
+            )
+        )
+
+    def test_remove(self):
+        constraint.remove_constraints_containing("A", passed_dom=self.dom)
+        self.assertEqual(
+            ["loc-B-clone", "tck-B", "ord-set", "set-1", "C"],
+            [
+                element.getAttribute("id")
+                for element in self.dom.getElementsByTagName(
+                    "constraints"
+                )[0].getElementsByTagName("*")
+            ]
+        )
+        self.assertEqual(
+            ([], []),
+            constraint.find_constraints_containing("A", self.dom)
+        )
+        self.assertEqual(
+            ([], ["ord-set"]),
+            constraint.find_constraints_containing("C", self.dom)
+        )
+
+    def test_index_reused_after_remove(self):
+        constraint.remove_constraints_containing("A", passed_dom=self.dom)
+        with mock.patch.object(
+            self.dom, "getElementsByTagName", side_effect=AssertionError
+        ):
+            self.assertEqual(
+                ([], ["ord-set"]),
+                constraint.find_constraints_containing("C", self.dom)
+            )
+
+    def fixture_location(self, constraint_id, resource_id):
+        new_constraint = self.dom.createElement("rsc_location")
+        new_constraint.setAttribute("id", constraint_id)
+        new_constraint.setAttribute("rsc", resource_id)
+        return new_constraint
+
+    def test_index_updated_when_constraint_added(self):
+        constraint.find_constraints_containing("C", self.dom)
+        constraint.add_constraint_element(
+            self.dom.getElementsByTagName("constraints")[0],
+            self.fixture_location("loc-C", "C")
+        )
+        with mock.patch.object(
+            self.dom, "getElementsByTagName", side_effect=AssertionError
+        ):
+            self.assertEqual(
+                (["ord-C-A", "loc-C"], ["ord-set"]),
+                constraint.find_constraints_containing("C", self.dom)
+            )
+
+    def test_index_updated_when_constraint_added_and_removed(self):
+        constraints_el = self.dom.getElementsByTagName("constraints")[0]
+        constraint.find_constraints_containing("C", self.dom)
+        new_constraint = self.fixture_location("loc-C", "C")
+        constraint.add_constraint_element(constraints_el, new_constraint)
+        constraint.remove_constraint_element(
+            constraints_el.getElementsByTagName("rsc_location")[0]
+        )
+        constraint.remove_constraint_element(new_constraint)
+        self.assertEqual(
+            (["ord-C-A"], ["ord-set"]),
+            constraint.find_constraints_containing("C", self.dom)
+        )
+        self.assertEqual(
+            (["col-A-A", "ord-C-A"], ["ord-set"]),
+            constraint.find_constraints_containing("A", self.dom)
+        )
+
+    def test_index_dropped(self):
+        constraint.find_constraints_containing("C", self.dom)
+        self.dom.getElementsByTagName("constraints")[0].appendChild(
+            self.fixture_location("loc-C", "C")
+        )
+        constraint.drop_constraint_index(self.dom)
+        self.assertEqual(
+            (["loc-C", "ord-C-A"], ["ord-set"]),
+            constraint.find_constraints_containing("C", self.dom)
+        )
+
+    def test_indexes_of_more_doms(self):
+        other_dom = parseString(self.cib_xml)
+        constraint.find_constraints_containing("C", self.dom)
+        constraint.add_constraint_element(
+            self.dom.getElementsByTagName("constraints")[0],
+            self.fixture_location("loc-C", "C")
+        )
+        self.assertEqual(
+            (["ord-C-A"], ["ord-set"]),
+            constraint.find_constraints_containing("C", other_dom)
+        )
+        self.assertEqual(
+            (["ord-C-A", "loc-C"], ["ord-set"]),
+            constraint.find_constraints_containing("C", self.dom)
+        )
+
+class FindDuplicatesTest(unittest.TestCase):
+    constraints_xml = """
+        <constraints>
+            <rsc_colocation id="col-1" rsc="A" with-rsc="B" score="1"/>
+            <rsc_colocation id="col-2" rsc="A" with-rsc="B" score="5"
+                rsc-role="started"
+            />
+            <rsc_colocation id="col-3" rsc="A" with-rsc="B" score="1"
+                rsc-role="Master"
+            />
+            <rsc_colocation id="col-set">
+                <resource_set id="set-1">
+                    <resource_ref id="A"/>
+                    <resource_ref id="B"/>
+                </resource_set>
+            </rsc_colocation>
+            <rsc_order id="ord-1" first="A" then="B"/>
+            <rsc_order id="ord-2" first="A" then="B" first-action="Start"/>
+            <rsc_order id="ord-3" first="A" then="B" then-action="stop"/>
+            <rsc_location id="loc-1" rsc="A">
+                <rule id="loc-1-rule" score="INFINITY">
+                    <expression id="loc-1-expr" attribute="#uname"
+                        operation="eq" value="node1"
+                    />
+                </rule>
+            </rsc_location>
+            <rsc_location id="loc-2" rsc="A" node="node1" score="INFINITY"/>
+        </constraints>
+    """
+
+    def setUp(self):
+        self.dom = parseString(self.constraints_xml)
+
+    def get_ids(self, element_list):
+        return [element.getAttribute("id") for element in element_list]
+
+    def fixture_element(self, tag, **attributes):
+        element = self.dom.createElement(tag)
+        for name, value in attributes.items():
+            element.setAttribute(name.replace("_", "-"), value)
+        return element
+
+    def test_colocation(self):
+        self.assertEqual(
+            ["col-1", "col-2"],
+            self.get_ids(constraint.colocation_find_duplicates(
+                self.dom,
+                self.fixture_element("rsc_colocation", rsc="A", with_rsc="B")
+            ))
+        )
+
+    def test_colocation_not_found(self):
+        self.assertEqual(
+            [],
+            self.get_ids(constraint.colocation_find_duplicates(
+                self.dom,
+                self.fixture_element("rsc_colocation", rsc="B", with_rsc="A")
+            ))
+        )
+
+    def test_order(self):
+        self.assertEqual(
+            ["ord-1", "ord-2"],
+            self.get_ids(constraint.order_find_duplicates(
+                self.dom,
+                self.fixture_element(
+                    "rsc_order", first="A", then="B", then_action="start"
+                )
+            ))
+        )
+
+    def test_existing_constraint_is_not_its_own_duplicate(self):
+        self.assertEqual(
+            ["ord-2"],
+            self.get_ids(constraint.order_find_duplicates(
+                self.dom, self.dom.getElementsByTagName("rsc_order")[0]
+            ))
+        )
+
+    def test_location_rule(self):
+        self.assertEqual(
+            ["loc-1"],
+            self.get_ids(constraint.location_rule_find_duplicates(
+                self.dom,
+                parseString("""
+                    <rsc_location id="new" rsc="A">
+                        <rule id="new-rule" score="INFINITY">
+                            <expression id="new-expr" attribute="#uname"
+                                operation="eq" value="node1"
+                            />
+                        </rule>
+                    </rsc_location>
+                """).documentElement
+            ))
+        )
+
+    def test_signatures_computed_once(self):
+        constraint.colocation_find_duplicates(
+            self.dom,
+            self.fixture_element("rsc_colocation", rsc="A", with_rsc="B")
+        )
+        with mock.patch.object(
+            self.dom, "getElementsByTagName", side_effect=AssertionError
+        ):
+            self.assertEqual(
+                ["col-3"],
+                self.get_ids(constraint.colocation_find_duplicates(
+                    self.dom,
+                    self.fixture_element(
+                        "rsc_colocation", rsc="A", with_rsc="B",
+                        rsc_role="master"
+                    )
+                ))
+            )
+
+    def test_added_constraint_found(self):
+        constraint.order_find_duplicates(
+            self.dom, self.fixture_element("rsc_order", first="B", then="A")
+        )
+        new_constraint = self.fixture_element(
+            "rsc_order", id="ord-new", first="B", then="A"
+        )
+        constraint.add_constraint_element(
+            self.dom.documentElement, new_constraint
+        )
+        self.assertEqual(
+            ["ord-new"],
+            self.get_ids(constraint.order_find_duplicates(
+                self.dom,
+                self.fixture_element("rsc_order", first="B", then="A")
+            ))
+        )
+        constraint.remove_constraint_element(new_constraint)
+        self.assertEqual(
+            [],
+            self.get_ids(constraint.order_find_duplicates(
+                self.dom,
+                self.fixture_element("rsc_order", first="B", then="A")
+            ))
+        )
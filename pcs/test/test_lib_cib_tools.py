@@ -28,6 +28,10 @@ class CibToolsTest(TestCase):
             '<primitive id="{0}" class="ocf" provider="heartbeat" type="Dummy"/>'
                 .format(element_id)
         )
+        lib.get_id_index(self.cib.tree).add(self.fixture_find(element_id))
+
+    def fixture_find(self, element_id):
+        return self.cib.tree.find(".//*[@id='{0}']".format(element_id))
 
 class DoesIdExistTest(CibToolsTest):
     def test_existing_id(self):
@@ -42,6 +46,76 @@ class DoesIdExistTest(CibToolsTest):
         self.assertFalse(lib.does_id_exist(self.cib.tree, "myId "))
         self.assertFalse(lib.does_id_exist(self.cib.tree, "my Id"))
 
+class IdIndexTest(CibToolsTest):
+    def fixture_add_primitive(self, element_id):
+        self.cib.append_to_first_tag_name(
+            "resources",
+            '<primitive id="{0}"><meta_attributes id="{0}-meta"/></primitive>'
+                .format(element_id)
+        )
+        return self.fixture_find(element_id)
+
+    def test_find_existing(self):
+        self.fixture_add_primitive("myId")
+        index = lib.IdIndex(self.cib.tree)
+        self.assertEqual("myId", index.get("myId").get("id"))
+        self.assertEqual("myId-meta", index.get("myId-meta").get("id"))
+        self.assertEqual(None, index.get("otherId"))
+
+    def test_find_added(self):
+        index = lib.IdIndex(self.cib.tree)
+        element = self.fixture_add_primitive("myId")
+        self.assertEqual(None, index.get("myId"))
+        index.add(element)
+        self.assertEqual("myId", index.get("myId").get("id"))
+        self.assertEqual("myId-meta", index.get("myId-meta").get("id"))
+
+    def test_add_keeps_existing(self):
+        element = self.fixture_add_primitive("myId")
+        index = lib.IdIndex(self.cib.tree)
+        self.cib.append_to_first_tag_name(
+            "constraints", '<rsc_location id="myId"/>'
+        )
+        index.add(self.cib.tree.find(".//rsc_location"))
+        self.assertTrue(index.get("myId") is element)
+
+    def test_do_not_find_removed(self):
+        element = self.fixture_add_primitive("myId")
+        index = lib.IdIndex(self.cib.tree)
+        index.remove(element)
+        self.assertEqual(None, index.get("myId"))
+        self.assertEqual(None, index.get("myId-meta"))
+
+    def test_do_not_find_removed_without_index(self):
+        element = self.fixture_add_primitive("myId")
+        index = lib.IdIndex(self.cib.tree)
+        element.getparent().remove(element)
+        self.assertEqual(None, index.get("myId"))
+        self.assertEqual(None, index.get("myId-meta"))
+
+    def test_do_not_find_changed_id(self):
+        self.fixture_add_primitive("myId")
+        index = lib.IdIndex(self.cib.tree)
+        self.fixture_find("myId").set("id", "otherId")
+        self.assertEqual(None, index.get("myId"))
+
+    def test_get_id_index_reuses_index(self):
+        self.assertTrue(
+            lib.get_id_index(self.cib.tree) is lib.get_id_index(self.cib.tree)
+        )
+        self.assertFalse(
+            lib.get_id_index(self.cib.tree)
+            is
+            lib.get_id_index(self.create_cib().tree)
+        )
+
+    def test_get_id_index_of_whole_cib(self):
+        self.fixture_add_primitive("myId")
+        index = lib.get_id_index(self.cib.tree.find(".//constraints"))
+        self.assertTrue(index is lib.get_id_index(self.cib.tree))
+        self.assertTrue(index is lib.get_id_index(self.cib.tree.getroottree()))
+        self.assertEqual("myId", index.get("myId").get("id"))
+
 class FindUniqueIdTest(CibToolsTest):
     def test_already_unique(self):
         self.fixture_add_primitive_with_id("myId")
@@ -1193,3 +1193,69 @@ quorum {
 }
 """
         ac(str(config_parser.parse_string(string)), parsed)
+
+    def test_deeply_nested(self):
+        depth = 2000
+        string = "".join(
+            ["section{0} {{\n".format(i) for i in range(depth)]
+            +
+            ["}\n"] * depth
+        )
+        section = config_parser.parse_string(string)
+        for i in range(depth):
+            self.assertEqual(1, len(section.get_sections()))
+            section = section.get_sections()[0]
+            self.assertEqual("section{0}".format(i), section.name)
+        self.assertTrue(section.empty)
+
+    def test_large_config_round_trip(self):
+        conf_text = fixture_large_corosync_conf(500)
+        self.assertEqual(
+            conf_text, config_parser.parse_string(conf_text).export()
+        )
+
+    def test_parent_is_set(self):
+        root = config_parser.parse_string("a {\nb {\n}\n}\n")
+        section_a = root.get_sections()[0]
+        section_b = section_a.get_sections()[0]
+        self.assertEqual(root, section_a.parent)
+        self.assertEqual(section_a, section_b.parent)
+        self.assertEqual(root, section_b.get_root())
+
+
+def fixture_large_corosync_conf(node_count):
+    lines = [
+        "totem {",
+        "    version: 2",
+        "    cluster_name: large",
+        "    transport: udpu",
+        "",
+    ]
+    for ring in range(2):
+        lines.extend([
+            "    interface {",
+            "        ringnumber: {0}".format(ring),
+            "        bindnetaddr: 10.{0}.0.0".format(ring),
+            "        mcastport: 5405",
+            "    }",
+            "",
+        ])
+    lines[-1] = "}"
+    lines.extend(["", "nodelist {"])
+    for node in range(1, node_count + 1):
+        lines.extend([
+            "    node {",
+            "        ring0_addr: node{0}-0".format(node),
+            "        ring1_addr: node{0}-1".format(node),
+            "        nodeid: {0}".format(node),
+            "    }",
+            "",
+        ])
+    lines[-1] = "}"
+    lines.extend([
+        "",
+        "quorum {",
+        "    provider: corosync_votequorum",
+        "}",
+    ])
+    return "\n".join(lines) + "\n"
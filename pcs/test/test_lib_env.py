@@ -69,7 +69,7 @@ class LibraryEnvironmentTest(TestCase):
         self.assertTrue(env.is_cman_cluster)
         self.assertEqual(1, mock_is_cman.call_count)
 
-    @mock.patch("pcs.lib.env.replace_cib_configuration_xml")
+    @mock.patch("pcs.lib.env.push_cib_configuration_xml")
     @mock.patch("pcs.lib.env.get_cib_xml")
     def test_cib_set(self, mock_get_cib, mock_push_cib):
         cib_data = "test cib data"
@@ -91,7 +91,7 @@ class LibraryEnvironmentTest(TestCase):
         self.assertEqual(new_cib_data, env.get_cib_xml())
         self.assertEqual(0, mock_get_cib.call_count)
 
-    @mock.patch("pcs.lib.env.replace_cib_configuration_xml")
+    @mock.patch("pcs.lib.env.push_cib_configuration_xml")
     @mock.patch("pcs.lib.env.get_cib_xml")
     def test_cib_not_set(self, mock_get_cib, mock_push_cib):
         cib_data = "test cib data"
@@ -105,7 +105,33 @@ class LibraryEnvironmentTest(TestCase):
         self.assertEqual(1, mock_get_cib.call_count)
 
         env.push_cib_xml(new_cib_data)
-        self.assertEqual(1, mock_push_cib.call_count)
+        mock_push_cib.assert_called_once_with(
+            mock.ANY, new_cib_data, cib_data
+        )
+
+        # the live cib has changed, the next push cannot be a diff to cib_data
+        env.push_cib_xml(new_cib_data)
+        mock_push_cib.assert_called_with(mock.ANY, new_cib_data, None)
+
+    @mock.patch("pcs.lib.env.get_cib_sections")
+    def test_cib_sections_live(self, mock_get_sections):
+        env = LibraryEnvironment(self.mock_logger, self.mock_reporter)
+        self.assertEqual(
+            mock_get_sections.return_value,
+            env.get_cib_sections(["constraints"])
+        )
+        mock_get_sections.assert_called_once_with(mock.ANY, ["constraints"])
+
+    @mock.patch("pcs.lib.env.get_cib_sections")
+    def test_cib_sections_not_live(self, mock_get_sections):
+        env = LibraryEnvironment(
+            self.mock_logger,
+            self.mock_reporter,
+            cib_data="<cib><configuration><constraints/></configuration></cib>"
+        )
+        cib = env.get_cib_sections(["constraints"])
+        self.assertEqual(1, len(cib.findall("configuration/constraints")))
+        mock_get_sections.assert_not_called()
 
     @mock.patch("pcs.lib.env.check_corosync_offline_on_nodes")
     @mock.patch("pcs.lib.env.reload_corosync_config")
@@ -325,6 +325,34 @@ Return value: {1}
         )
 
 
+class CommandRunnerTimeoutTest(TestCase):
+    def setUp(self):
+        self.runner = lib.CommandRunner(
+            mock.MagicMock(logging.Logger), MockLibraryReportProcessor()
+        )
+
+    def test_finished_in_time(self):
+        output, retval = self.runner.run(["echo", "done"], timeout=10)
+        self.assertEqual("done\n", output)
+        self.assertEqual(0, retval)
+
+    def test_killed(self):
+        # the command would keep its stdout open for 10 seconds even if sh
+        # alone was killed
+        command = ["sh", "-c", "sleep 10; echo done"]
+        assert_raise_library_error(
+            lambda: self.runner.run(command, timeout=0.2),
+            (
+                severity.ERROR,
+                report_codes.RUN_EXTERNAL_PROCESS_TIMEOUT,
+                {
+                    "command": "sh -c 'sleep 10; echo done'",
+                    "timeout": 0.2,
+                }
+            )
+        )
+
+
 @mock.patch(
     "pcs.lib.external.NodeCommunicator._NodeCommunicator__get_opener",
     autospec=True
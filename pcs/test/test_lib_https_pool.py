@@ -0,0 +1,247 @@
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+from unittest import TestCase
+import errno
+import socket
+import ssl
+try:
+    # python2
+    import httplib as http_client
+except ImportError:
+    # python3
+    import http.client as http_client
+
+from pcs.test.tools.pcs_mock import mock
+
+from pcs.lib import https_pool
+
+
+def fixture_connection(will_close=False, error=None, connect_error=None):
+    connection = mock.MagicMock(spec_set=[
+        "connect", "request", "getresponse", "close", "sock", "host_key"
+    ])
+    response = mock.MagicMock()
+    response.will_close = will_close
+    response.read.return_value = b"data"
+    connection.getresponse.return_value = response
+    if error:
+        connection.request.side_effect = error
+    if connect_error:
+        connection.connect.side_effect = connect_error
+    return connection
+
+
+@mock.patch("pcs.lib.https_pool._is_connection_dropped", lambda conn: False)
+@mock.patch("pcs.lib.https_pool.time.time")
+class HTTPSConnectionPoolTest(TestCase):
+    def setUp(self):
+        self.pool = https_pool.HTTPSConnectionPool(2, 10, 5, 60)
+        self.connection_list = []
+        patcher = mock.patch.object(
+            self.pool, "_new_connection", side_effect=self.new_connection
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def new_connection(self, host, timeout):
+        connection = self.connection_list.pop(0)
+        connection.host_key = host
+        return connection
+
+    def request(self, host="node1", method="GET"):
+        return self.pool.request(host, method, "/", None, {}, 5)
+
+    def test_reuse_connection(self, mock_time):
+        mock_time.return_value = 0
+        connection = fixture_connection()
+        self.connection_list = [connection]
+        self.assertEqual(b"data", self.request()[1])
+        self.assertEqual(b"data", self.request()[1])
+        self.assertEqual(2, connection.request.call_count)
+        connection.close.assert_not_called()
+
+    def test_connections_per_host(self, mock_time):
+        mock_time.return_value = 0
+        connection1 = fixture_connection()
+        connection2 = fixture_connection()
+        self.connection_list = [connection1, connection2]
+        self.request("node1")
+        self.request("node2")
+        self.request("node1")
+        self.assertEqual(2, connection1.request.call_count)
+        self.assertEqual(1, connection2.request.call_count)
+
+    def test_close_when_server_closes(self, mock_time):
+        mock_time.return_value = 0
+        connection1 = fixture_connection(will_close=True)
+        connection2 = fixture_connection()
+        self.connection_list = [connection1, connection2]
+        self.request()
+        self.request()
+        connection1.close.assert_called_once_with()
+        self.assertEqual(1, connection2.request.call_count)
+
+    def test_evict_idle_connection(self, mock_time):
+        connection1 = fixture_connection()
+        connection2 = fixture_connection()
+        self.connection_list = [connection1, connection2]
+        mock_time.return_value = 0
+        self.request()
+        mock_time.return_value = 11
+        self.request()
+        connection1.close.assert_called_once_with()
+        self.assertEqual(1, connection1.request.call_count)
+        self.assertEqual(1, connection2.request.call_count)
+
+    def test_max_idle_connections_per_host(self, mock_time):
+        mock_time.return_value = 0
+        connection_list = [fixture_connection() for dummy in range(3)]
+        self.connection_list = list(connection_list)
+        for dummy in range(3):
+            self.pool._release(self.new_connection("node1", 5))
+        connection_list[0].close.assert_not_called()
+        connection_list[1].close.assert_not_called()
+        connection_list[2].close.assert_called_once_with()
+
+    def fixture_reused_connection_error(self, error):
+        connection1 = fixture_connection()
+        connection2 = fixture_connection()
+        self.connection_list = [connection1, connection2]
+        self.request()
+        connection1.getresponse.side_effect = error
+        return connection1, connection2
+
+    def test_retry_stale_connection(self, mock_time):
+        mock_time.return_value = 0
+        connection1, connection2 = self.fixture_reused_connection_error(
+            http_client.BadStatusLine("")
+        )
+        self.assertEqual(b"data", self.request()[1])
+        connection1.close.assert_called_once_with()
+        self.assertEqual(1, connection2.request.call_count)
+
+    def test_do_not_retry_post(self, mock_time):
+        mock_time.return_value = 0
+        connection1, connection2 = self.fixture_reused_connection_error(
+            http_client.BadStatusLine("")
+        )
+        self.assertRaises(
+            http_client.BadStatusLine, lambda: self.request(method="POST")
+        )
+        connection1.close.assert_called_once_with()
+        connection2.request.assert_not_called()
+
+    def test_do_not_retry_reset_after_sending(self, mock_time):
+        mock_time.return_value = 0
+        connection1, connection2 = self.fixture_reused_connection_error(
+            socket.error("reset")
+        )
+        self.assertRaises(socket.error, self.request)
+        connection2.request.assert_not_called()
+
+    def test_do_not_retry_timeout(self, mock_time):
+        mock_time.return_value = 0
+        connection1, connection2 = self.fixture_reused_connection_error(
+            socket.timeout("timed out")
+        )
+        self.assertRaises(socket.timeout, self.request)
+        connection2.request.assert_not_called()
+
+    def test_do_not_retry_partial_response(self, mock_time):
+        mock_time.return_value = 0
+        connection1, connection2 = self.fixture_reused_connection_error(
+            http_client.BadStatusLine("garbage")
+        )
+        self.assertRaises(http_client.BadStatusLine, self.request)
+        connection2.request.assert_not_called()
+
+    def test_do_not_retry_new_connection(self, mock_time):
+        mock_time.return_value = 0
+        connection = fixture_connection(error=socket.error("refused"))
+        self.connection_list = [connection]
+        self.assertRaises(socket.error, self.request)
+        connection.close.assert_called_once_with()
+
+    def test_clear(self, mock_time):
+        mock_time.return_value = 0
+        connection1 = fixture_connection()
+        connection2 = fixture_connection()
+        self.connection_list = [connection1, connection2]
+        self.request()
+        self.pool.clear()
+        connection1.close.assert_called_once_with()
+        self.request()
+        self.assertEqual(1, connection2.request.call_count)
+
+    def test_fail_fast_for_unreachable_host(self, mock_time):
+        mock_time.return_value = 0
+        error = socket.error(errno.EHOSTUNREACH, "No route to host")
+        connection = fixture_connection(connect_error=error)
+        self.connection_list = [connection]
+        self.assertRaises(socket.error, self.request)
+        mock_time.return_value = 59
+        self.assertRaises(socket.error, self.request)
+        connection.connect.assert_called_once_with()
+        connection.request.assert_not_called()
+
+    def test_unreachable_host_does_not_affect_others(self, mock_time):
+        mock_time.return_value = 0
+        self.connection_list = [
+            fixture_connection(connect_error=socket.timeout("timed out")),
+            fixture_connection(),
+        ]
+        self.assertRaises(socket.error, self.request, "node1")
+        self.assertEqual(b"data", self.request("node2")[1])
+
+    def test_retry_unreachable_host_after_ttl(self, mock_time):
+        mock_time.return_value = 0
+        connection = fixture_connection()
+        self.connection_list = [
+            fixture_connection(connect_error=socket.timeout("timed out")),
+            connection,
+        ]
+        self.assertRaises(socket.error, self.request)
+        mock_time.return_value = 61
+        self.assertEqual(b"data", self.request()[1])
+        connection.connect.assert_called_once_with()
+
+    def test_no_unreachable_cache_without_ttl(self, mock_time):
+        self.pool = https_pool.HTTPSConnectionPool(2, 10)
+        patcher = mock.patch.object(
+            self.pool, "_new_connection", side_effect=self.new_connection
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        mock_time.return_value = 0
+        connection = fixture_connection()
+        self.connection_list = [
+            fixture_connection(connect_error=socket.timeout("timed out")),
+            connection,
+        ]
+        self.assertRaises(socket.error, self.request)
+        self.assertEqual(b"data", self.request()[1])
+
+    def assert_host_tried_again(self, mock_time, connect_error):
+        mock_time.return_value = 0
+        connection = fixture_connection()
+        self.connection_list = [
+            fixture_connection(connect_error=connect_error),
+            connection,
+        ]
+        self.assertRaises(socket.error, self.request)
+        self.assertEqual(b"data", self.request()[1])
+        connection.connect.assert_called_once_with()
+
+    def test_refused_host_is_tried_again(self, mock_time):
+        self.assert_host_tried_again(
+            mock_time,
+            socket.error(errno.ECONNREFUSED, "Connection refused")
+        )
+
+    def test_ssl_error_host_is_tried_again(self, mock_time):
+        self.assert_host_tried_again(mock_time, ssl.SSLError("handshake"))
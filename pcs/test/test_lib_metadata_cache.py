@@ -0,0 +1,89 @@
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+
+from pcs.test.tools.pcs_mock import mock
+
+from pcs import settings
+from pcs.lib import metadata_cache
+
+
+class MetadataCacheTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.cache_dir = os.path.join(self.tmp_dir, "cache")
+        patcher = mock.patch.object(settings, "pcs_cache_dir", self.cache_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.source = os.path.join(self.tmp_dir, "source")
+        self.write_source("source data")
+
+    def write_source(self, data):
+        with open(self.source, "w") as source_file:
+            source_file.write(data)
+
+    def test_store_and_get(self):
+        metadata_cache.store("test", "key", [self.source], "value")
+        self.assertEqual(
+            "value",
+            metadata_cache.get("test", "key", [self.source])
+        )
+        self.assertEqual(
+            None,
+            metadata_cache.get("test", "other key", [self.source])
+        )
+        self.assertEqual(
+            None,
+            metadata_cache.get("other test", "key", [self.source])
+        )
+
+    def test_not_stored(self):
+        self.assertEqual(None, metadata_cache.get("test", "key", [self.source]))
+
+    def test_source_changed(self):
+        metadata_cache.store("test", "key", [self.source], "value")
+        self.write_source("source data changed")
+        self.assertEqual(None, metadata_cache.get("test", "key", [self.source]))
+
+    def test_source_missing(self):
+        missing = os.path.join(self.tmp_dir, "missing")
+        metadata_cache.store("test", "key", [missing], "value")
+        self.assertEqual(None, metadata_cache.get("test", "key", [missing]))
+
+    def test_refresh(self):
+        metadata_cache.store("test", "key", [self.source], "value")
+        with mock.patch.object(metadata_cache, "refresh", True):
+            self.assertEqual(
+                None,
+                metadata_cache.get("test", "key", [self.source])
+            )
+            metadata_cache.store("test", "key", [self.source], "new value")
+        self.assertEqual(
+            "new value",
+            metadata_cache.get("test", "key", [self.source])
+        )
+
+    def test_disabled(self):
+        with mock.patch.object(settings, "pcs_cache_dir", None):
+            metadata_cache.store("test", "key", [self.source], "value")
+            self.assertEqual(
+                None,
+                metadata_cache.get("test", "key", [self.source])
+            )
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+    def test_corrupted_cache_file(self):
+        metadata_cache.store("test", "key", [self.source], "value")
+        cache_file_path = metadata_cache._get_cache_file_path("test", "key")
+        with open(cache_file_path, "w") as cache_file:
+            cache_file.write("{not json")
+        self.assertEqual(None, metadata_cache.get("test", "key", [self.source]))
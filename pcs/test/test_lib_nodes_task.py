@@ -6,6 +6,8 @@ from __future__ import (
 )
 
 from unittest import TestCase
+import threading
+import time
 
 from pcs.test.tools.assertions import (
     assert_raise_library_error,
@@ -27,6 +29,13 @@ class DistributeCorosyncConfTest(TestCase):
         self.mock_reporter = MockLibraryReportProcessor()
         self.mock_communicator = "mock node communicator"
 
+    def sorted_calls(self, mock_corosync_live):
+        # nodes are called in parallel, the order of calls is not defined
+        return sorted(
+            mock_corosync_live.mock_calls,
+            key=lambda a_call: a_call[1][1].ring0
+        )
+
     def assert_set_remote_corosync_conf_call(self, a_call, node_ring0, config):
         self.assertEqual("set_remote_corosync_conf", a_call[0])
         self.assertEqual(3, len(a_call[1]))
@@ -64,10 +73,10 @@ class DistributeCorosyncConfTest(TestCase):
             len(mock_corosync_live.mock_calls)
         )
         self.assert_set_remote_corosync_conf_call(
-            mock_corosync_live.mock_calls[0], nodes[0], conf_text
+            self.sorted_calls(mock_corosync_live)[0], nodes[0], conf_text
         )
         self.assert_set_remote_corosync_conf_call(
-            mock_corosync_live.mock_calls[1], nodes[1], conf_text
+            self.sorted_calls(mock_corosync_live)[1], nodes[1], conf_text
         )
 
         assert_report_item_list_equal(
@@ -146,10 +155,10 @@ class DistributeCorosyncConfTest(TestCase):
             len(mock_corosync_live.mock_calls)
         )
         self.assert_set_remote_corosync_conf_call(
-            mock_corosync_live.mock_calls[0], nodes[0], conf_text
+            self.sorted_calls(mock_corosync_live)[0], nodes[0], conf_text
         )
         self.assert_set_remote_corosync_conf_call(
-            mock_corosync_live.mock_calls[1], nodes[1], conf_text
+            self.sorted_calls(mock_corosync_live)[1], nodes[1], conf_text
         )
 
         assert_report_item_list_equal(
@@ -222,10 +231,10 @@ class DistributeCorosyncConfTest(TestCase):
             len(mock_corosync_live.mock_calls)
         )
         self.assert_set_remote_corosync_conf_call(
-            mock_corosync_live.mock_calls[0], nodes[0], conf_text
+            self.sorted_calls(mock_corosync_live)[0], nodes[0], conf_text
         )
         self.assert_set_remote_corosync_conf_call(
-            mock_corosync_live.mock_calls[1], nodes[1], conf_text
+            self.sorted_calls(mock_corosync_live)[1], nodes[1], conf_text
         )
 
         assert_report_item_list_equal(
@@ -304,10 +313,11 @@ class CheckCorosyncOfflineTest(TestCase):
         node_addrs_list = NodeAddressesList(
             [NodeAddresses(addr) for addr in nodes]
         )
-        self.mock_communicator.call_node.side_effect = [
-            '{"corosync": false}',
-            '{"corosync": true}',
-        ]
+        def side_effect(node, request, data):
+            if node.ring0 == nodes[1]:
+                return '{"corosync": true}'
+            return '{"corosync": false}'
+        self.mock_communicator.call_node.side_effect = side_effect
 
         assert_raise_library_error(
             lambda: lib.check_corosync_offline_on_nodes(
@@ -329,10 +339,11 @@ class CheckCorosyncOfflineTest(TestCase):
         node_addrs_list = NodeAddressesList(
             [NodeAddresses(addr) for addr in nodes]
         )
-        self.mock_communicator.call_node.side_effect = [
-            '{}', # missing key
-            '{', # not valid json
-        ]
+        def side_effect(node, request, data):
+            if node.ring0 == nodes[1]:
+                return '{' # not valid json
+            return '{}' # missing key
+        self.mock_communicator.call_node.side_effect = side_effect
 
         assert_raise_library_error(
             lambda: lib.check_corosync_offline_on_nodes(
@@ -451,6 +462,53 @@ class CheckCorosyncOfflineTest(TestCase):
             ]
         )
 
+    def test_reports_in_nodes_order(self):
+        nodes = ["node{0}".format(i) for i in range(6)]
+        node_addrs_list = NodeAddressesList(
+            [NodeAddresses(addr) for addr in nodes]
+        )
+        running = []
+        max_running = []
+        lock = threading.Lock()
+        def side_effect(node, request, data):
+            with lock:
+                running.append(node)
+                max_running.append(len(running))
+            # the first nodes answer last
+            time.sleep(0.01 * (len(nodes) - nodes.index(node.ring0)))
+            with lock:
+                running.remove(node)
+            return '{"corosync": false}'
+        self.mock_communicator.call_node.side_effect = side_effect
+
+        lib.check_corosync_offline_on_nodes(
+            self.mock_communicator,
+            self.mock_reporter,
+            node_addrs_list,
+            max_parallel=3
+        )
+
+        self.assertEqual(3, max(max_running))
+        assert_report_item_list_equal(
+            self.mock_reporter.report_item_list,
+            [
+                (
+                    severity.INFO,
+                    report_codes.COROSYNC_NOT_RUNNING_CHECK_STARTED,
+                    {}
+                ),
+            ]
+            +
+            [
+                (
+                    severity.INFO,
+                    report_codes.COROSYNC_NOT_RUNNING_ON_NODE,
+                    {"node": node}
+                )
+                for node in nodes
+            ]
+        )
+
 
 class NodeCheckAuthTest(TestCase):
     def test_success(self):
@@ -8,6 +8,8 @@ from __future__ import (
 from unittest import TestCase
 import os.path
 
+from lxml import etree
+
 from pcs.test.tools.assertions import (
     assert_raise_library_error,
     assert_xml_equal,
@@ -20,6 +22,7 @@ from pcs import settings
 from pcs.common import report_codes
 from pcs.lib import pacemaker as lib
 from pcs.lib.errors import ReportItemSeverity as Severity
+from pcs.lib.pacemaker_failcount import Failcount
 from pcs.lib.external import CommandRunner
 
 
@@ -174,6 +177,247 @@ class GetCibXmlTest(LibraryPacemakerTest):
             ]
         )
 
+class GetCibSectionsTest(LibraryPacemakerTest):
+    def scope_cmd(self, scope):
+        return [
+            self.path("cibadmin"), "--local", "--query",
+            "--scope={0}".format(scope)
+        ]
+
+    def test_success(self):
+        mock_runner = mock.MagicMock(spec_set=CommandRunner)
+        mock_runner.run.side_effect = [
+            ("<constraints><rsc_order id='o'/></constraints>", 0),
+            ("<crm_config/>", 0),
+        ]
+
+        cib = lib.get_cib_sections(mock_runner, ["constraints", "crm_config"])
+
+        assert_xml_equal(
+            """
+                <cib><configuration>
+                    <constraints><rsc_order id="o"/></constraints>
+                    <crm_config/>
+                </configuration></cib>
+            """,
+            etree.tostring(cib).decode()
+        )
+        self.assertEqual(
+            [
+                mock.call(self.scope_cmd("constraints")),
+                mock.call(self.scope_cmd("crm_config")),
+            ],
+            mock_runner.run.mock_calls
+        )
+
+    def test_missing_section(self):
+        mock_runner = mock.MagicMock(spec_set=CommandRunner)
+        mock_runner.run.side_effect = [
+            ("", 6),
+            ("<constraints/>", 0),
+        ]
+
+        cib = lib.get_cib_sections(mock_runner, ["acls", "constraints"])
+
+        assert_xml_equal(
+            "<cib><configuration><constraints/></configuration></cib>",
+            etree.tostring(cib).decode()
+        )
+
+    def test_error(self):
+        mock_runner = mock.MagicMock(spec_set=CommandRunner)
+        mock_runner.run.return_value = ("some error", 1)
+
+        assert_raise_library_error(
+            lambda: lib.get_cib_sections(mock_runner, ["constraints"]),
+            (
+                Severity.ERROR,
+                report_codes.CIB_LOAD_ERROR,
+                {
+                    "return_value": 1,
+                    "stdout": "some error",
+                }
+            )
+        )
+
+class IterCibStatusNodeStatesTest(LibraryPacemakerTest):
+    def iter_ids(self, mock_runner):
+        return [
+            node_state.get("id")
+            for node_state in lib.iter_cib_status_node_states(mock_runner)
+        ]
+
+    def test_success(self):
+        mock_runner = mock.MagicMock(spec_set=CommandRunner)
+        mock_runner.run.return_value = (
+            "<status><node_state id='1'/><node_state id='2'/></status>", 0
+        )
+        self.assertEqual(["1", "2"], self.iter_ids(mock_runner))
+        mock_runner.run.assert_called_once_with([
+            self.path("cibadmin"), "--local", "--query", "--scope=status"
+        ])
+
+    def test_missing_section(self):
+        mock_runner = mock.MagicMock(spec_set=CommandRunner)
+        mock_runner.run.return_value = ("", 6)
+        self.assertEqual([], self.iter_ids(mock_runner))
+
+    def test_error(self):
+        mock_runner = mock.MagicMock(spec_set=CommandRunner)
+        mock_runner.run.return_value = ("some error", 1)
+        assert_raise_library_error(
+            lambda: self.iter_ids(mock_runner),
+            (
+                Severity.ERROR,
+                report_codes.CIB_LOAD_ERROR,
+                {
+                    "return_value": 1,
+                    "stdout": "some error",
+                }
+            )
+        )
+
+    def test_invalid_xml(self):
+        mock_runner = mock.MagicMock(spec_set=CommandRunner)
+        mock_runner.run.return_value = ("<status><node_state id='1'/>", 0)
+        assert_raise_library_error(
+            lambda: self.iter_ids(mock_runner),
+            (
+                Severity.ERROR,
+                report_codes.CIB_LOAD_ERROR_BAD_FORMAT,
+                {}
+            )
+        )
+
+class BuildCibFromSectionsTest(TestCase):
+    def assert_built(self, expected_xml, section_xml_list):
+        assert_xml_equal(
+            expected_xml,
+            etree.tostring(lib.build_cib_from_sections(
+                [etree.fromstring(xml) for xml in section_xml_list]
+            )).decode()
+        )
+
+    def test_no_sections(self):
+        self.assert_built("<cib/>", [])
+
+    def test_top_level_sections(self):
+        self.assert_built(
+            """
+                <cib>
+                    <configuration><resources/></configuration>
+                    <status/>
+                </cib>
+            """,
+            ["<status/>", "<resources/>"]
+        )
+
+    def test_section_already_in_configuration(self):
+        self.assert_built(
+            """
+                <cib><configuration>
+                    <resources><primitive id="R"/></resources>
+                    <nodes/>
+                </configuration></cib>
+            """,
+            [
+                "<resources/>",
+                "<configuration><resources><primitive id='R'/></resources>"
+                    "</configuration>"
+                ,
+                "<nodes/>",
+            ]
+        )
+
+class ResetFailcountsTest(LibraryPacemakerTest):
+    failcount_list = [
+        Failcount("node1", "A", "fail-count-A", "1"),
+        Failcount("node2", "B.1", "fail-count-B.1#start_0", "1"),
+        Failcount("node1", "B.1", "fail-count-B.1#start_0", "2"),
+    ]
+
+    def test_attrd_pattern(self):
+        mock_runner = mock.MagicMock(spec_set=CommandRunner)
+        mock_runner.run.side_effect = [
+            ("usage: attrd_updater --pattern", 1),
+            ("", 0),
+            ("", 0),
+        ]
+        lib.reset_failcounts(mock_runner, self.failcount_list)
+        self.assertEqual(
+            [
+                mock.call([self.path("attrd_updater"), "-?"]),
+                mock.call([
+                    self.path("attrd_updater"), "--delete", "--pattern",
+                    r"^(fail-count-A|fail-count-B\.1#start_0)$",
+                    "--node", "node1",
+                ]),
+                mock.call([
+                    self.path("attrd_updater"), "--delete", "--pattern",
+                    r"^(fail-count-B\.1#start_0)$", "--node", "node2",
+                ]),
+            ],
+            mock_runner.run.mock_calls
+        )
+
+    def test_attrd_pattern_not_supported(self):
+        mock_runner = mock.MagicMock(spec_set=CommandRunner)
+        mock_runner.run.side_effect = [("usage: attrd_updater", 1)] + [
+            ("", 0)
+        ] * 3
+        lib.reset_failcounts(mock_runner, self.failcount_list)
+        self.assertEqual(
+            [
+                mock.call([self.path("attrd_updater"), "-?"]),
+                mock.call([
+                    self.path("crm_attribute"), "-N", "node1",
+                    "-n", "fail-count-A", "-t", "status", "-D"
+                ]),
+                mock.call([
+                    self.path("crm_attribute"), "-N", "node1",
+                    "-n", "fail-count-B.1#start_0", "-t", "status", "-D"
+                ]),
+                mock.call([
+                    self.path("crm_attribute"), "-N", "node2",
+                    "-n", "fail-count-B.1#start_0", "-t", "status", "-D"
+                ]),
+            ],
+            mock_runner.run.mock_calls
+        )
+
+    def test_without_attrd(self):
+        mock_runner = mock.MagicMock(spec_set=CommandRunner)
+        mock_runner.run.return_value = ("", 0)
+        lib.reset_failcounts(mock_runner, self.failcount_list[:1], False)
+        mock_runner.run.assert_called_once_with([
+            self.path("crm_attribute"), "-N", "node1",
+            "-n", "fail-count-A", "-t", "status", "-D"
+        ])
+
+    def test_nothing_to_reset(self):
+        mock_runner = mock.MagicMock(spec_set=CommandRunner)
+        lib.reset_failcounts(mock_runner, [])
+        mock_runner.run.assert_not_called()
+
+    def test_error(self):
+        mock_runner = mock.MagicMock(spec_set=CommandRunner)
+        mock_runner.run.side_effect = [
+            ("--pattern", 1),
+            ("some error", 1),
+        ]
+        assert_raise_library_error(
+            lambda: lib.reset_failcounts(mock_runner, self.failcount_list),
+            (
+                Severity.ERROR,
+                report_codes.FAILCOUNT_RESET_ERROR,
+                {
+                    "return_value": 1,
+                    "stdout": "some error",
+                    "node": "node1",
+                }
+            )
+        )
+
 class GetCibTest(LibraryPacemakerTest):
     def test_success(self):
         xml = "<xml />"
@@ -243,6 +487,145 @@ class ReplaceCibConfigurationTest(LibraryPacemakerTest):
             stdin_string=xml
         )
 
+class PushCibConfigurationXmlTest(LibraryPacemakerTest):
+    def setUp(self):
+        self.cib_old = "<cib><configuration/></cib>"
+        self.cib_new = "<cib><configuration><resources/></configuration></cib>"
+        self.diff = '<diff format="2"><change operation="create"/></diff>'
+        self.mock_runner = mock.MagicMock(spec_set=CommandRunner)
+
+    def diff_call(self):
+        return mock.call(
+            [
+                self.path("crm_diff"),
+                "--original", mock.ANY,
+                "--new", mock.ANY,
+                "--no-version"
+            ],
+            ignore_stderr=True
+        )
+
+    def patch_call(self):
+        return mock.call(
+            [self.path("cibadmin"), "--patch", "--verbose", "--xml-pipe"],
+            stdin_string=self.diff
+        )
+
+    def replace_call(self):
+        return mock.call(
+            [
+                self.path("cibadmin"), "--replace", "--scope", "configuration",
+                "--verbose", "--xml-pipe"
+            ],
+            stdin_string=self.cib_new
+        )
+
+    def test_diff_pushed(self):
+        self.mock_runner.run.side_effect = [(self.diff, 1), ("", 0)]
+        lib.push_cib_configuration_xml(
+            self.mock_runner, self.cib_new, self.cib_old
+        )
+        self.assertEqual(
+            [self.diff_call(), self.patch_call()],
+            self.mock_runner.run.mock_calls
+        )
+
+    def test_diff_compares_files(self):
+        def run(args, **kwargs):
+            if args[0] == self.path("crm_diff"):
+                with open(args[2]) as cib_old_file:
+                    self.assertEqual(self.cib_old, cib_old_file.read())
+                with open(args[4]) as cib_new_file:
+                    self.assertEqual(self.cib_new, cib_new_file.read())
+                return (self.diff, 1)
+            return ("", 0)
+        self.mock_runner.run.side_effect = run
+        lib.push_cib_configuration_xml(
+            self.mock_runner, self.cib_new, self.cib_old
+        )
+        self.assertEqual(2, self.mock_runner.run.call_count)
+
+    def test_no_changes(self):
+        self.mock_runner.run.return_value = ("", 0)
+        lib.push_cib_configuration_xml(
+            self.mock_runner, self.cib_new, self.cib_old
+        )
+        self.assertEqual([self.diff_call()], self.mock_runner.run.mock_calls)
+
+    def test_diff_error_fallback(self):
+        self.mock_runner.run.side_effect = [("", 1), ("", 0)]
+        lib.push_cib_configuration_xml(
+            self.mock_runner, self.cib_new, self.cib_old
+        )
+        self.assertEqual(
+            [self.diff_call(), self.replace_call()],
+            self.mock_runner.run.mock_calls
+        )
+
+    def test_patch_unsupported_fallback(self):
+        self.mock_runner.run.side_effect = [
+            (self.diff, 1),
+            ("cibadmin: unrecognized option '--patch'", 64),
+            ("", 0),
+        ]
+        lib.push_cib_configuration_xml(
+            self.mock_runner, self.cib_new, self.cib_old
+        )
+        self.assertEqual(
+            [self.diff_call(), self.patch_call(), self.replace_call()],
+            self.mock_runner.run.mock_calls
+        )
+
+    def test_patch_error_not_pushed_again(self):
+        self.mock_runner.run.side_effect = [
+            (self.diff, 1), ("Update does not conform to the schema", 203),
+        ]
+        assert_raise_library_error(
+            lambda: lib.push_cib_configuration_xml(
+                self.mock_runner, self.cib_new, self.cib_old
+            ),
+            (
+                Severity.ERROR,
+                report_codes.CIB_PUSH_ERROR,
+                {
+                    "return_value": 203,
+                    "stdout": "Update does not conform to the schema",
+                }
+            )
+        )
+        self.assertEqual(
+            [self.diff_call(), self.patch_call()],
+            self.mock_runner.run.mock_calls
+        )
+
+    def test_no_old_cib(self):
+        self.mock_runner.run.return_value = ("", 0)
+        lib.push_cib_configuration_xml(self.mock_runner, self.cib_new)
+        self.assertEqual(
+            [self.replace_call()],
+            self.mock_runner.run.mock_calls
+        )
+
+    def test_replace_error(self):
+        self.mock_runner.run.side_effect = [
+            (self.diff, 1),
+            ("cibadmin: unrecognized option '--patch'", 64),
+            ("replace error", 1),
+        ]
+        assert_raise_library_error(
+            lambda: lib.push_cib_configuration_xml(
+                self.mock_runner, self.cib_new, self.cib_old
+            ),
+            (
+                Severity.ERROR,
+                report_codes.CIB_PUSH_ERROR,
+                {
+                    "return_value": 1,
+                    "stdout": "replace error",
+                }
+            )
+        )
+
 class GetLocalNodeStatusTest(LibraryPacemakerNodeStatusTest):
     def test_offline(self):
         expected_error = "some error"
@@ -0,0 +1,118 @@
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+from unittest import TestCase
+
+from lxml import etree
+
+from pcs.lib.pacemaker_failcount import (
+    Failcount,
+    get_failcount_table,
+    get_failcounts,
+)
+
+
+def fixture_node_states():
+    return etree.fromstring("""
+        <status>
+            <node_state id="1" uname="node1">
+                <transient_attributes id="1"><instance_attributes id="i1">
+                    <nvpair id="n1-1" name="fail-count-A" value="3"/>
+                    <nvpair id="n1-2" name="last-failure-A" value="100"/>
+                    <nvpair id="n1-3" name="fail-count-db-1#start_0"
+                        value="1"
+                    />
+                    <nvpair id="n1-4" name="fail-count-db-1#monitor_10000"
+                        value="2"
+                    />
+                </instance_attributes></transient_attributes>
+            </node_state>
+            <node_state id="2" uname="node2">
+                <transient_attributes id="2"><instance_attributes id="i2">
+                    <nvpair id="n2-1" name="fail-count-db-2#start_0"
+                        value="INFINITY"
+                    />
+                    <nvpair id="n2-2" name="fail-count-A" value="1"/>
+                </instance_attributes></transient_attributes>
+            </node_state>
+            <node_state id="3" uname="node3"/>
+        </status>
+    """).iterfind("node_state")
+
+
+class GetFailcountsTest(TestCase):
+    def test_all(self):
+        self.assertEqual(
+            [
+                Failcount("node1", "A", "fail-count-A", "3"),
+                Failcount("node1", "db-1", "fail-count-db-1#start_0", "1"),
+                Failcount(
+                    "node1", "db-1", "fail-count-db-1#monitor_10000", "2"
+                ),
+                Failcount(
+                    "node2", "db-2", "fail-count-db-2#start_0", "INFINITY"
+                ),
+                Failcount("node2", "A", "fail-count-A", "1"),
+            ],
+            get_failcounts(fixture_node_states())
+        )
+
+    def test_resources(self):
+        self.assertEqual(
+            [
+                ("node1", "A"),
+                ("node2", "db-2"),
+                ("node2", "A"),
+            ],
+            [
+                (failcount.node, failcount.resource)
+                for failcount in get_failcounts(
+                    fixture_node_states(), resource_pattern_list=["A", "db-2"]
+                )
+            ]
+        )
+
+    def test_patterns(self):
+        self.assertEqual(
+            [("node2", "db-2")],
+            [
+                (failcount.node, failcount.resource)
+                for failcount in get_failcounts(
+                    fixture_node_states(),
+                    resource_pattern_list=["db-*"],
+                    node_pattern_list=["node[23]"]
+                )
+            ]
+        )
+
+    def test_resource_id_is_not_a_prefix(self):
+        self.assertEqual(
+            [],
+            get_failcounts(fixture_node_states(), resource_pattern_list=["db"])
+        )
+
+
+class GetFailcountTableTest(TestCase):
+    def test_table(self):
+        self.assertEqual(
+            {
+                "A": {"node1": "3", "node2": "1"},
+                "db-1": {"node1": "3"},
+                "db-2": {"node2": "INFINITY"},
+            },
+            get_failcount_table(get_failcounts(fixture_node_states()))
+        )
+
+    def test_infinity(self):
+        self.assertEqual(
+            {"A": {"node1": "INFINITY"}},
+            get_failcount_table([
+                Failcount("node1", "A", "fail-count-A#start_0", "1"),
+                Failcount("node1", "A", "fail-count-A#stop_0", "INFINITY"),
+                Failcount("node1", "A", "fail-count-A#monitor_0", "2"),
+            ])
+        )
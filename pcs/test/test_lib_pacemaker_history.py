@@ -0,0 +1,182 @@
+from __future__ import (
+    absolute_import,
+    division,
+    print_function,
+    unicode_literals,
+)
+
+from unittest import TestCase
+import time
+
+from lxml import etree
+
+from pcs.test.tools.pcs_mock import mock
+
+from pcs.lib import pacemaker_history as history
+
+
+def fixture_node_states():
+    return etree.fromstring("""
+        <status>
+            <node_state id="1" uname="node1">
+                <lrm id="1"><lrm_resources>
+                    <lrm_resource id="A">
+                        <lrm_rsc_op id="A_last_0" operation="start"
+                            call-id="10" rc-code="0" op-status="0"
+                            interval="0" last-rc-change="1000"
+                            exec-time="20"
+                        />
+                        <lrm_rsc_op id="A_monitor_10000" operation="monitor"
+                            call-id="11" rc-code="7" op-status="0"
+                            interval="10000" last-rc-change="3000"
+                            exec-time="5"
+                        />
+                    </lrm_resource>
+                    <lrm_resource id="C:0">
+                        <lrm_rsc_op id="C_last_0" operation="stop"
+                            call-id="5" rc-code="0" last-rc-change="2000"
+                        />
+                    </lrm_resource>
+                </lrm_resources></lrm>
+            </node_state>
+            <node_state id="2" uname="node2">
+                <lrm id="2"><lrm_resources>
+                    <lrm_resource id="A">
+                        <lrm_rsc_op id="A_last_0" operation="start"
+                            call-id="10" rc-code="0" last-rc-change="4000"
+                        />
+                    </lrm_resource>
+                    <lrm_resource id="B">
+                        <lrm_rsc_op id="B_last_0" operation="start"
+                            call-id="-1" rc-code="193"
+                        />
+                    </lrm_resource>
+                </lrm_resources></lrm>
+            </node_state>
+        </status>
+    """).iterfind("node_state")
+
+
+class IterOperationHistoryTest(TestCase):
+    def get_ids(self, **kwargs):
+        return [
+            (record.resource, record.node, record.call_id)
+            for record in history.iter_operation_history(
+                fixture_node_states(), **kwargs
+            )
+        ]
+
+    def test_all(self):
+        self.assertEqual(
+            [
+                ("A", "node1", 10),
+                ("A", "node1", 11),
+                ("C:0", "node1", 5),
+                ("A", "node2", 10),
+                ("B", "node2", -1),
+            ],
+            self.get_ids()
+        )
+
+    def test_record(self):
+        self.assertEqual(
+            history.OperationRecord(
+                resource="A",
+                node="node1",
+                operation="monitor",
+                call_id=11,
+                rc_code=7,
+                op_status=0,
+                interval=10000,
+                last_rc_change=3000,
+                exec_time=5,
+            ),
+            list(history.iter_operation_history(fixture_node_states()))[1]
+        )
+
+    def test_missing_values(self):
+        record = list(history.iter_operation_history(fixture_node_states()))[-1]
+        self.assertEqual(None, record.last_rc_change)
+        self.assertEqual(None, record.exec_time)
+
+    def test_filter_resources(self):
+        self.assertEqual(
+            [("C:0", "node1", 5), ("B", "node2", -1)],
+            self.get_ids(resource_id_list=["B", "C"])
+        )
+
+    def test_filter_nodes(self):
+        self.assertEqual(
+            [("A", "node2", 10), ("B", "node2", -1)],
+            self.get_ids(node_list=["node2"])
+        )
+
+    def test_filter_time(self):
+        self.assertEqual(
+            [("A", "node1", 11), ("C:0", "node1", 5)],
+            self.get_ids(time_from=2000, time_to=3000)
+        )
+        self.assertEqual(
+            [("A", "node1", 10)],
+            self.get_ids(time_to=1000)
+        )
+
+    def test_filter_rc_code(self):
+        self.assertEqual(
+            [("A", "node1", 11), ("B", "node2", -1)],
+            self.get_ids(rc_code_list=[7, 193])
+        )
+
+    def test_is_lazy(self):
+        records = history.iter_operation_history(fixture_node_states())
+        self.assertEqual("A", next(records).resource)
+
+
+class SortKeyTest(TestCase):
+    def test_sort_by_resource_and_time(self):
+        self.assertEqual(
+            [
+                ("A", "node1", 1000),
+                ("A", "node1", 3000),
+                ("A", "node2", 4000),
+                ("B", "node2", None),
+                ("C:0", "node1", 2000),
+            ],
+            [
+                (record.resource, record.node, record.last_rc_change)
+                for record in sorted(
+                    history.iter_operation_history(fixture_node_states()),
+                    key=history.sort_key
+                )
+            ]
+        )
+
+
+@mock.patch("pcs.lib.pacemaker_history.time.localtime", time.gmtime)
+class FormatTimestampTest(TestCase):
+    def test_format(self):
+        # the time zone name depends on the platform
+        formatted = history.format_timestamp(1476784800)
+        self.assertTrue(formatted.startswith("Tue Oct 18 10:00:00 "))
+        self.assertTrue(formatted.endswith(" 2016"))
+
+    def test_none(self):
+        self.assertEqual(None, history.format_timestamp(None))
+
+    def test_record_to_dict(self):
+        record = list(history.iter_operation_history(fixture_node_states()))[0]
+        self.assertEqual(
+            {
+                "resource": "A",
+                "node": "node1",
+                "operation": "start",
+                "call_id": 10,
+                "rc_code": 0,
+                "op_status": 0,
+                "interval": 0,
+                "last_rc_change": 1000,
+                "last_rc_change_date": history.format_timestamp(1000),
+                "exec_time": 20,
+            },
+            history.record_to_dict(record)
+        )
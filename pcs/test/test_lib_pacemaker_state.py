@@ -14,6 +14,8 @@ from pcs.test.tools.xml import get_xml_manipulation_creator_from_file
 
 from pcs.lib.pacemaker_state import (
     ClusterState,
+    ResourceInstance,
+    ResourcesState,
     _Attrs,
     _Children,
 )
@@ -152,3 +154,126 @@ class WorkWithClusterStatusSummaryTest(TestBase):
     def test_resources_count(self):
         xml = str(self.covered_status)
         self.assertEqual(0, ClusterState(xml).summary.resources.attrs.count)
+
+
+class ResourcesStateTest(TestCase):
+    def setUp(self):
+        self.state = ResourcesState(etree.fromstring("""
+            <crm_mon>
+                <resources>
+                    <resource id="R" role="Started" managed="false">
+                        <node name="node1" />
+                    </resource>
+                    <resource id="RFailed" role="Started" failed="true">
+                        <node name="node2" />
+                    </resource>
+                    <clone id="RClone">
+                        <resource id="RCloned:0" role="Started">
+                            <node name="node1" />
+                        </resource>
+                        <resource id="RCloned:1" role="Started">
+                            <node name="node2" />
+                        </resource>
+                    </clone>
+                    <clone id="RMaster">
+                        <resource id="RMastered" role="Master">
+                            <node name="node2" />
+                        </resource>
+                        <resource id="RMastered" role="Slave">
+                            <node name="node1" />
+                        </resource>
+                    </clone>
+                    <group id="G">
+                        <resource id="G1" role="Started">
+                            <node name="node1" />
+                        </resource>
+                        <resource id="G2" role="Stopped" />
+                    </group>
+                    <clone id="GClone">
+                        <group id="GCloned:0">
+                            <resource id="GCloned1" role="Started">
+                                <node name="node1" />
+                            </resource>
+                        </group>
+                        <group id="GCloned:1">
+                            <resource id="GCloned1" role="Started">
+                                <node name="node2" />
+                            </resource>
+                        </group>
+                    </clone>
+                </resources>
+            </crm_mon>
+        """))
+
+    def test_instances(self):
+        self.assertEqual(
+            [
+                ResourceInstance("R", "Started", False, False, ["node1"]),
+            ],
+            self.state.get_instances("R")
+        )
+        self.assertEqual(
+            [
+                ResourceInstance("RCloned:0", "Started", False, True, ["node1"]),
+                ResourceInstance("RCloned:1", "Started", False, True, ["node2"]),
+            ],
+            self.state.get_instances("RCloned")
+        )
+        self.assertEqual([], self.state.get_instances("RClone"))
+        self.assertEqual([], self.state.get_instances("nonexistent"))
+
+    def test_node_resources(self):
+        self.assertEqual(
+            ["R", "RCloned", "RMastered", "G1", "GCloned1"],
+            self.state.get_node_resources("node1")
+        )
+        self.assertEqual(
+            ["RFailed", "RCloned", "RMastered", "GCloned1"],
+            self.state.get_node_resources("node2")
+        )
+        self.assertEqual([], self.state.get_node_resources("node3"))
+
+    def test_membership(self):
+        self.assertEqual(["G1", "G2"], self.state.get_group_members("G"))
+        self.assertEqual(["GCloned1"], self.state.get_group_members("GCloned"))
+        self.assertEqual("RCloned", self.state.get_clone_member("RClone"))
+        self.assertEqual("GCloned", self.state.get_clone_member("GClone"))
+        self.assertEqual("G", self.state.get_parent("G1"))
+        self.assertEqual("GCloned", self.state.get_parent("GCloned1"))
+        self.assertEqual("GClone", self.state.get_parent("GCloned"))
+        self.assertEqual(None, self.state.get_parent("R"))
+
+    def test_resource_for_running_check(self):
+        get = self.state.get_resource_for_running_check
+        self.assertEqual("R", get("R"))
+        self.assertEqual("RCloned", get("RClone"))
+        self.assertEqual("G2", get("G"))
+        self.assertEqual("G1", get("G", stopped=True))
+        self.assertEqual("GCloned1", get("GClone"))
+
+    def test_running_nodes(self):
+        self.assertEqual(
+            {"Started": ["node1", "node2"], "Master": [], "Slave": []},
+            self.state.get_running_nodes("RCloned")
+        )
+        self.assertEqual(
+            {"Started": [], "Master": ["node2"], "Slave": ["node1"]},
+            self.state.get_running_nodes("RMastered")
+        )
+        self.assertEqual(
+            {"Started": [], "Master": [], "Slave": []},
+            self.state.get_running_nodes("RFailed")
+        )
+        self.assertEqual(
+            {"Started": [], "Master": [], "Slave": []},
+            self.state.get_running_nodes("G2")
+        )
+
+    def test_from_cluster_state(self):
+        cluster_state = ClusterState(
+            open(rc("crm_mon.minimal.xml")).read()
+        )
+        self.assertTrue(
+            cluster_state.resources_state is cluster_state.resources_state
+        )
+        self.assertEqual([], cluster_state.resources_state.get_instances("R"))
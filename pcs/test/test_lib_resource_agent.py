@@ -7,6 +7,8 @@ from __future__ import (
 
 from unittest import TestCase
 import os.path
+import shutil
+import tempfile
 
 from lxml import etree
 
@@ -24,7 +26,11 @@ from pcs.lib.external import CommandRunner
 
 
 class LibraryResourceTest(TestCase, ExtendedAssertionsMixin):
-    pass
+    def setUp(self):
+        # do not let tests read or write the system wide metadata cache
+        patcher = mock.patch.object(settings, "pcs_cache_dir", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
 
 
 class GetParameterTest(LibraryResourceTest):
@@ -564,7 +570,9 @@ class GetResourceAgentMetadata(LibraryResourceTest):
 
         lib_ra.get_resource_agent_metadata(mock_runner, agent)
 
-        mock_obj.assert_called_once_with(mock_runner, "provider", "agent")
+        mock_obj.assert_called_once_with(
+            mock_runner, "provider", "agent", timeout=None
+        )
 
     @mock.patch("pcs.lib.resource_agent._get_nagios_resource_agent_metadata")
     def test_nagios_ok(self, mock_obj):
@@ -894,3 +902,35 @@ class ValidateInstanceAttributesTest(LibraryResourceTest):
         valid_mock.assert_called_once_with(self.attrs, self.instance_attrs)
         res_met_mock.assert_not_called()
         res_par_mock.assert_not_called()
+
+
+class RunMetadataCommandTest(LibraryResourceTest):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        patcher = mock.patch.object(settings, "pcs_cache_dir", self.cache_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.agent_path = os.path.join(self.cache_dir, "agent")
+        with open(self.agent_path, "w") as agent_file:
+            agent_file.write("#!/bin/sh\n")
+        self.runner = mock.MagicMock(spec_set=CommandRunner)
+
+    def run_command(self):
+        return lib_ra._run_metadata_command(
+            self.runner, [self.agent_path, "meta-data"], ignore_stderr=True
+        )
+
+    def test_cached(self):
+        self.runner.run.return_value = ("<xml />", 0)
+        self.assertEqual("<xml />", self.run_command())
+        self.assertEqual("<xml />", self.run_command())
+        self.runner.run.assert_called_once_with(
+            [self.agent_path, "meta-data"], ignore_stderr=True
+        )
+
+    def test_invalid_output_not_cached(self):
+        self.runner.run.return_value = ("error", 1)
+        self.assertEqual("error", self.run_command())
+        self.assertEqual("error", self.run_command())
+        self.assertEqual(2, self.runner.run.call_count)
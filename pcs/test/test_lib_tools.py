@@ -7,6 +7,8 @@ from __future__ import (
 
 from unittest import TestCase
 
+from lxml import etree
+
 from pcs.lib import tools
 
 
@@ -42,3 +44,55 @@ ANOTHER ONE="complex value"
 OPTION=value
 """
         self.assertEqual(expected, tools.dict_to_environment_file(cfg_dict))
+
+
+class IterparseElementsTest(TestCase):
+    xml = """
+        <status>
+            <node_state id="1"><lrm/></node_state>
+            <other/>
+            <node_state id="2"><lrm/></node_state>
+        </status>
+    """
+
+    def test_yield_elements(self):
+        self.assertEqual(
+            [("1", 1), ("2", 1)],
+            [
+                (element.get("id"), len(element))
+                for element in tools.iterparse_elements(self.xml, "node_state")
+            ]
+        )
+
+    def test_bytes(self):
+        self.assertEqual(
+            ["1", "2"],
+            [
+                element.get("id")
+                for element in tools.iterparse_elements(
+                    self.xml.encode("utf-8"), "node_state"
+                )
+            ]
+        )
+
+    def test_processed_elements_are_dropped(self):
+        element_iterator = tools.iterparse_elements(self.xml, "node_state")
+        first = next(element_iterator)
+        second = next(element_iterator)
+        self.assertEqual(0, len(first))
+        root = second.getparent()
+        self.assertEqual([], list(element_iterator))
+        self.assertEqual([second], list(root))
+        self.assertEqual(0, len(second))
+
+    def test_rest_of_document_not_parsed(self):
+        element_iterator = tools.iterparse_elements(
+            "<status><node_state id='1'/></broken>", "node_state"
+        )
+        self.assertEqual("1", next(element_iterator).get("id"))
+
+    def test_invalid_xml(self):
+        self.assertRaises(
+            etree.XMLSyntaxError,
+            lambda: list(tools.iterparse_elements("<status>", "node_state"))
+        )
@@ -5,12 +5,19 @@ from __future__ import (
     unicode_literals,
 )
 
+import json
+import os
+import shutil
 import sys
+import tempfile
+import threading
 import unittest
 import xml.dom.minidom
 import xml.etree.cElementTree as ET
 from time import sleep
 
+from lxml import etree
+
 try:
     from cStringIO import StringIO
 except ImportError:
@@ -19,8 +26,10 @@ except ImportError:
 
 from pcs.test.tools.xml import dom_get_child_elements
 from pcs.test.tools.misc import get_test_resource as rc
+from pcs.test.tools.pcs_mock import mock
 
 from pcs import utils
+from pcs.lib.errors import LibraryError
 
 cib_with_nodes = rc("cib-empty-withnodes.xml")
 empty_cib = rc("cib-empty.xml")
@@ -2256,8 +2265,7 @@ class RunParallelTest(unittest.TestCase):
             [
                 self.fixture_create_worker(log, 'first'),
                 self.fixture_create_worker(log, 'second'),
-            ],
-            wait_seconds=.1
+            ]
         )
 
         self.assertEqual(log, ['first', 'second'])
@@ -2268,12 +2276,81 @@ class RunParallelTest(unittest.TestCase):
             [
                 self.fixture_create_worker(log, 'first', .03),
                 self.fixture_create_worker(log, 'second'),
-            ],
-            wait_seconds=.01
+            ]
         )
 
         self.assertEqual(log, ['second', 'first'])
 
+    def test_raise_error_after_all_finished(self):
+        log = []
+        second_started = threading.Event()
+        def failing_worker():
+            # fail once the other worker is running
+            second_started.wait(1)
+            raise SystemExit(1)
+        def second_worker():
+            second_started.set()
+            sleep(.03)
+            log.append('second')
+        self.assertRaises(
+            SystemExit, utils.run_parallel, [failing_worker, second_worker]
+        )
+        self.assertEqual(log, ['second'])
+
+    def test_skip_workers_after_error(self):
+        log = []
+        def failing_worker():
+            raise SystemExit(1)
+        self.assertRaises(
+            SystemExit,
+            utils.run_parallel,
+            [failing_worker, self.fixture_create_worker(log, 'second')],
+            max_workers=1
+        )
+        self.assertEqual(log, [])
+
+    def test_call_timeout(self):
+        log = []
+        result_list = utils.run_parallel(
+            [
+                self.fixture_create_worker(log, 'first', 1),
+                self.fixture_create_worker(log, 'second'),
+            ],
+            call_timeout=.1
+        )
+        self.assertEqual(log, ['second'])
+        self.assertEqual(
+            [False, True], [result.done for result in result_list]
+        )
+
+class CallForNodesTest(unittest.TestCase):
+    def test_results_in_node_order(self):
+        def action(node, suffix, separator=":"):
+            sleep(.03 if node == "node1" else 0)
+            return node + separator + suffix
+        self.assertEqual(
+            ["node1-a", "node2-a"],
+            utils.call_for_nodes(
+                action, ["node1", "node2"], "a", separator="-"
+            )
+        )
+
+    def test_raise_error_after_all_finished(self):
+        log = []
+        node2_started = threading.Event()
+        def action(node):
+            if node == "node1":
+                # fail once the other action is running
+                node2_started.wait(1)
+                raise SystemExit(1)
+            node2_started.set()
+            sleep(.03)
+            log.append(node)
+        self.assertRaises(
+            SystemExit, utils.call_for_nodes, action, ["node1", "node2"]
+        )
+        self.assertEqual(["node2"], log)
+
 class PrepareNodeNamesTest(unittest.TestCase):
     def test_return_original_when_is_in_pacemaker_nodes(self):
         node = 'test'
@@ -2323,3 +2400,497 @@ class NodeActionTaskTest(unittest.TestCase):
         task()
 
         self.assertEqual(['node|0|node:arg:kwarg'], report_list)
+
+@mock.patch("pcs.utils.run")
+class CibSnapshotTest(unittest.TestCase):
+    def setUp(self):
+        utils.invalidate_cib_snapshot()
+        with open(cib_with_nodes) as cib_file:
+            self.cib_xml = cib_file.read().replace(
+                '<?xml version="1.0" encoding="UTF-8"?>', ""
+            )
+
+    def tearDown(self):
+        utils.invalidate_cib_snapshot()
+
+    def test_cib_loaded_once(self, mock_run):
+        mock_run.return_value = (self.cib_xml, 0)
+        utils.get_cib()
+        utils.get_cib_dom()
+        utils.get_cib_etree()
+        utils.get_cib_snapshot()
+        mock_run.assert_called_once_with(["cibadmin", "-l", "-Q"])
+
+    def test_scoped_cib_not_cached(self, mock_run):
+        mock_run.return_value = ("<resources/>", 0)
+        utils.get_cib("resources")
+        utils.get_cib("resources")
+        self.assertEqual(2, mock_run.call_count)
+
+    def test_snapshot_is_shared(self, mock_run):
+        mock_run.return_value = (self.cib_xml, 0)
+        self.assertTrue(utils.get_cib_snapshot() is utils.get_cib_snapshot())
+
+    def test_dom_copies_are_independent(self, mock_run):
+        mock_run.return_value = (self.cib_xml, 0)
+        dom = utils.get_cib_dom()
+        dom.getElementsByTagName("nodes")[0].appendChild(
+            dom.createElement("node")
+        )
+        self.assertEqual(
+            len(dom.getElementsByTagName("node")) - 1,
+            len(utils.get_cib_dom().getElementsByTagName("node"))
+        )
+
+    def test_replace_invalidates_snapshot(self, mock_run):
+        mock_run.return_value = (self.cib_xml, 0)
+        utils.get_cib_snapshot()
+        utils.replace_cib_configuration(self.cib_xml)
+        utils.get_cib_snapshot()
+        self.assertEqual(
+            [
+                mock.call(["cibadmin", "-l", "-Q"]),
+                mock.call(
+                    [
+                        "cibadmin", "--replace", "-o", "configuration", "-V",
+                        "--xml-pipe"
+                    ],
+                    False,
+                    self.cib_xml
+                ),
+                mock.call(["cibadmin", "-l", "-Q"]),
+            ],
+            mock_run.mock_calls
+        )
+
+    @mock.patch("pcs.utils.usefile", False)
+    @mock.patch("pcs.utils.push_cib_configuration_xml")
+    def test_replace_pushes_diff(self, mock_push, mock_run):
+        mock_run.return_value = (self.cib_xml, 0)
+        dom = utils.get_cib_dom()
+        utils.replace_cib_configuration(dom)
+        mock_push.assert_called_once_with(mock.ANY, dom.toxml(), self.cib_xml)
+        utils.get_cib_snapshot()
+        self.assertEqual(2, mock_run.call_count)
+
+    @mock.patch("pcs.utils.usefile", False)
+    @mock.patch("pcs.utils.push_cib_configuration_xml")
+    def test_replace_section_not_diffed(self, mock_push, mock_run):
+        mock_run.return_value = (self.cib_xml, 0)
+        resources = utils.get_cib_dom().getElementsByTagName("resources")[0]
+        utils.replace_cib_configuration(resources)
+        mock_push.assert_not_called()
+        self.assertEqual(
+            mock.call(
+                [
+                    "cibadmin", "--replace", "-o", "configuration", "-V",
+                    "--xml-pipe"
+                ],
+                False,
+                resources.toxml()
+            ),
+            mock_run.call_args
+        )
+
+@mock.patch("pcs.utils.lib_get_cib_sections")
+class CibSectionsTest(unittest.TestCase):
+    def setUp(self):
+        utils.invalidate_cib_snapshot()
+
+    def tearDown(self):
+        utils.invalidate_cib_snapshot()
+
+    def test_sections_loaded_once(self, mock_get_sections):
+        mock_get_sections.return_value = etree.fromstring(
+            "<cib><configuration><constraints/></configuration></cib>"
+        )
+        utils.get_cib_sections(["constraints"])
+        self.assertEqual(
+            "<constraints/>", utils.get_cib_section_xml("constraints")
+        )
+        mock_get_sections.assert_called_once_with(mock.ANY, ["constraints"])
+
+    def test_missing_section(self, mock_get_sections):
+        mock_get_sections.return_value = etree.fromstring("<cib/>")
+        self.assertEqual("", utils.get_cib_section_xml("acls"))
+
+    @mock.patch("pcs.utils.run")
+    def test_snapshot_used_when_loaded(self, mock_run, mock_get_sections):
+        mock_run.return_value = (
+            "<cib><configuration><nodes><node id='1'/></nodes></configuration>"
+                "</cib>"
+            ,
+            0
+        )
+        utils.get_cib_snapshot()
+        self.assertEqual(
+            '<nodes><node id="1"/></nodes>',
+            utils.get_cib_section_xml("nodes")
+        )
+        mock_get_sections.assert_not_called()
+
+    def test_invalidated_with_snapshot(self, mock_get_sections):
+        mock_get_sections.return_value = etree.fromstring("<cib/>")
+        utils.get_cib_sections(["constraints"])
+        utils.invalidate_cib_snapshot()
+        utils.get_cib_sections(["constraints"])
+        self.assertEqual(2, mock_get_sections.call_count)
+
+class IterCibStatusNodeStatesTest(unittest.TestCase):
+    def setUp(self):
+        utils.invalidate_cib_snapshot()
+
+    def tearDown(self):
+        utils.invalidate_cib_snapshot()
+
+    @mock.patch("pcs.utils.lib_iter_cib_status_node_states")
+    def test_streamed(self, mock_iter):
+        mock_iter.return_value = iter(["node_state"])
+        self.assertEqual(
+            ["node_state"], list(utils.iter_cib_status_node_states())
+        )
+
+    @mock.patch("pcs.utils.run")
+    @mock.patch("pcs.utils.lib_iter_cib_status_node_states")
+    def test_snapshot_used_when_loaded(self, mock_iter, mock_run):
+        mock_run.return_value = (
+            "<cib><status><node_state id='1'/></status></cib>", 0
+        )
+        utils.get_cib_snapshot()
+        self.assertEqual(
+            ["1"],
+            [
+                node_state.get("id")
+                for node_state in utils.iter_cib_status_node_states()
+            ]
+        )
+        mock_iter.assert_not_called()
+
+    @mock.patch("pcs.utils.process_library_reports")
+    @mock.patch("pcs.utils.lib_iter_cib_status_node_states")
+    def test_error(self, mock_iter, mock_process):
+        def iter_error(runner):
+            yield "node_state"
+            raise LibraryError("report")
+        mock_iter.side_effect = iter_error
+        self.assertEqual(
+            ["node_state"], list(utils.iter_cib_status_node_states())
+        )
+        mock_process.assert_called_once_with(("report", ))
+
+@mock.patch("pcs.utils.getClusterStateXml")
+class GetClusterStateSectionTest(unittest.TestCase):
+    def test_section(self, mock_state):
+        mock_state.return_value = """
+            <crm_mon>
+                <summary/>
+                <nodes><node name="node1"/><node name="node2"/></nodes>
+                <resources/>
+            </crm_mon>
+        """
+        nodes = utils.get_cluster_state_section("nodes")
+        self.assertEqual(
+            ["node1", "node2"], [node.get("name") for node in nodes]
+        )
+
+    def test_missing_section(self, mock_state):
+        mock_state.return_value = "<crm_mon><summary/></crm_mon>"
+        self.assertEqual(None, utils.get_cluster_state_section("nodes"))
+
+    @mock.patch("pcs.utils.err")
+    def test_invalid_xml(self, mock_err, mock_state):
+        mock_state.return_value = "<crm_mon><summary/>"
+        utils.get_cluster_state_section("nodes")
+        mock_err.assert_called_once_with(
+            "error running crm_mon, is pacemaker running?"
+        )
+
+def fixture_daemon_metadata(name):
+    return """
+        <resource-agent name="{0}">
+          <parameters>
+            <parameter name="{0}-option">
+              <shortdesc>short</shortdesc>
+              <longdesc>long</longdesc>
+              <content type="integer" default="1"/>
+            </parameter>
+            <parameter name="dc-version">
+              <shortdesc/><longdesc/>
+              <content type="string" default="none"/>
+            </parameter>
+          </parameters>
+        </resource-agent>
+    """.format(name)
+
+@mock.patch("pcs.utils.run")
+class ClusterPropertiesDefinitionTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        patched = {"pcs_cache_dir": os.path.join(self.tmp_dir, "cache")}
+        for daemon in ["pengine", "crmd", "cib"]:
+            binary = os.path.join(self.tmp_dir, daemon)
+            with open(binary, "w") as binary_file:
+                binary_file.write(daemon)
+            patched["{0}_binary".format(daemon)] = binary
+        patcher = mock.patch.multiple(utils.settings, **patched)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fixture_run(self, mock_run):
+        mock_run.side_effect = lambda args: (
+            fixture_daemon_metadata(os.path.basename(args[0])), 0
+        )
+
+    def test_definition(self, mock_run):
+        self.fixture_run(mock_run)
+        definition = utils.get_cluster_properties_definition()
+        self.assertEqual(
+            ["cib-option", "crmd-option", "pengine-option"],
+            sorted(definition.keys())
+        )
+        self.assertEqual(
+            {
+                "name": "crmd-option",
+                "shortdesc": "short",
+                "longdesc": "long",
+                "type": "integer",
+                "default": "1",
+                "source": "crmd",
+                "advanced": True,
+                "readable_name": "crmd-option",
+            },
+            definition["crmd-option"]
+        )
+        self.assertEqual(3, mock_run.call_count)
+
+    def test_cached(self, mock_run):
+        self.fixture_run(mock_run)
+        definition = utils.get_cluster_properties_definition()
+        mock_run.reset_mock()
+        self.assertEqual(definition, utils.get_cluster_properties_definition())
+        mock_run.assert_not_called()
+
+    def test_reloaded_after_upgrade(self, mock_run):
+        self.fixture_run(mock_run)
+        utils.get_cluster_properties_definition()
+        with open(utils.settings.crmd_binary, "w") as binary_file:
+            binary_file.write("upgraded crmd")
+        mock_run.reset_mock()
+        utils.get_cluster_properties_definition()
+        self.assertEqual(3, mock_run.call_count)
+
+class IsCibReadOnlyCommandTest(unittest.TestCase):
+    def test_query_commands(self):
+        self.assertTrue(utils.is_cib_read_only_command("crm_mon", ["-1"]))
+        self.assertTrue(utils.is_cib_read_only_command("cibadmin", ["-l", "-Q"]))
+        self.assertTrue(utils.is_cib_read_only_command("crm_node", ["-l"]))
+
+    def test_modifying_commands(self):
+        self.assertFalse(
+            utils.is_cib_read_only_command("cibadmin", ["--replace"])
+        )
+        self.assertFalse(
+            utils.is_cib_read_only_command("crm_node", ["--force", "-R", "n"])
+        )
+        self.assertFalse(
+            utils.is_cib_read_only_command("crm_resource", ["--cleanup"])
+        )
+
+@mock.patch("pcs.utils.run")
+class CibXpathTest(unittest.TestCase):
+    cib_xml = """
+        <cib>
+            <configuration>
+                <resources>
+                    <primitive id="R1" class="ocf" type="Dummy"/>
+                    <group id="G">
+                        <primitive id="R2" class="ocf" type="Dummy"/>
+                    </group>
+                    <primitive id="S1" class="stonith" type="fence_xvm"/>
+                </resources>
+            </configuration>
+        </cib>
+    """
+
+    def setUp(self):
+        utils.invalidate_cib_snapshot()
+
+    def tearDown(self):
+        utils.invalidate_cib_snapshot()
+
+    def test_does_exist(self, mock_run):
+        mock_run.return_value = (self.cib_xml, 0)
+        self.assertTrue(utils.does_exist("//group[@id='G']"))
+        self.assertFalse(utils.does_exist("//group[@id='R1']"))
+        self.assertFalse(utils.does_exist("//group[@id='G'"))
+        self.assertTrue(utils.is_stonith_resource("S1"))
+        self.assertFalse(utils.is_stonith_resource("R1"))
+        mock_run.assert_called_once_with(["cibadmin", "-l", "-Q"])
+
+    def test_no_match(self, mock_run):
+        mock_run.return_value = (self.cib_xml, 0)
+        self.assertEqual("", utils.get_cib_xpath("//clone"))
+
+    def test_one_match(self, mock_run):
+        mock_run.return_value = (self.cib_xml, 0)
+        group = xml.dom.minidom.parseString(
+            utils.get_cib_xpath("//group/primitive[@id='R2']/..")
+        ).documentElement
+        self.assertEqual("group", group.tagName)
+        self.assertEqual("G", group.getAttribute("id"))
+        self.assertEqual(1, len(group.getElementsByTagName("primitive")))
+
+    def test_more_matches(self, mock_run):
+        mock_run.return_value = (self.cib_xml, 0)
+        result = xml.dom.minidom.parseString(
+            utils.get_cib_xpath("//primitive[@class='ocf']")
+        ).documentElement
+        self.assertEqual("xpath-query", result.tagName)
+        self.assertEqual(
+            ["R1", "R2"],
+            [
+                el.getAttribute("id")
+                for el in result.getElementsByTagName("primitive")
+            ]
+        )
+
+    def test_attribute_match_returns_element(self, mock_run):
+        mock_run.return_value = (self.cib_xml, 0)
+        self.assertEqual(
+            ["S1"],
+            [
+                el.get("id") for el in utils.get_cib_xpath_elements(
+                    "//primitive[@class='stonith']/@type"
+                )
+            ]
+        )
+
+class DomIdIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.dom = xml.dom.minidom.parse(empty_cib)
+        self.resources = self.dom.getElementsByTagName("resources")[0]
+
+    def fixture_primitive(self, element_id):
+        primitive = self.dom.createElement("primitive")
+        primitive.setAttribute("id", element_id)
+        meta_attributes = self.dom.createElement("meta_attributes")
+        meta_attributes.setAttribute("id", element_id + "-meta")
+        primitive.appendChild(meta_attributes)
+        return primitive
+
+    def fixture_add_primitive_with_id(self, element_id):
+        primitive = self.fixture_primitive(element_id)
+        self.resources.appendChild(primitive)
+        utils.dom_id_index_add(primitive)
+        return primitive
+
+    def test_find_existing(self):
+        self.resources.appendChild(self.fixture_primitive("myId"))
+        self.assertTrue(utils.does_id_exist(self.dom, "myId"))
+        self.assertTrue(utils.does_id_exist(self.dom, "myId-meta"))
+        self.assertFalse(utils.does_id_exist(self.dom, "otherId"))
+
+    def test_find_added_and_removed(self):
+        self.assertFalse(utils.does_id_exist(self.dom, "myId"))
+        primitive = self.fixture_add_primitive_with_id("myId")
+        self.assertTrue(utils.does_id_exist(self.dom, "myId"))
+        self.assertTrue(utils.does_id_exist(self.dom, "myId-meta"))
+        self.resources.removeChild(primitive)
+        self.assertFalse(utils.does_id_exist(self.dom, "myId"))
+        self.assertFalse(utils.does_id_exist(self.dom, "myId-meta"))
+
+    def test_do_not_search_dom_again(self):
+        self.assertFalse(utils.does_id_exist(self.dom, "myId"))
+        self.resources.appendChild(self.fixture_primitive("myId"))
+        with mock.patch.object(
+            self.dom, "getElementsByTagName", side_effect=AssertionError
+        ):
+            self.assertFalse(utils.does_id_exist(self.dom, "myId"))
+
+    def test_do_not_find_changed_id(self):
+        primitive = self.fixture_add_primitive_with_id("myId")
+        self.assertTrue(utils.does_id_exist(self.dom, "myId"))
+        primitive.setAttribute("id", "otherId")
+        self.assertFalse(utils.does_id_exist(self.dom, "myId"))
+
+    def test_search_only_subtree(self):
+        self.fixture_add_primitive_with_id("myId")
+        constraints = self.dom.getElementsByTagName("constraints")[0]
+        self.assertFalse(utils.does_id_exist(constraints, "myId"))
+        self.assertTrue(utils.does_id_exist(self.resources, "myId"))
+
+    def test_find_unique_id(self):
+        self.fixture_add_primitive_with_id("myId")
+        self.fixture_add_primitive_with_id("myId-1")
+        self.fixture_add_primitive_with_id("myId-3")
+        self.assertEqual("myId-2", utils.find_unique_id(self.dom, "myId"))
+        self.fixture_add_primitive_with_id("myId-2")
+        self.assertEqual("myId-4", utils.find_unique_id(self.dom, "myId"))
+        self.assertEqual("other", utils.find_unique_id(self.dom, "other"))
+
+    def test_find_unique_id_etree(self):
+        cib = ET.parse(empty_cib).getroot()
+        resources = cib.find(str(".//resources"))
+        ET.SubElement(resources, str("primitive"), id=str("myId"))
+        self.assertEqual("myId-1", utils.find_unique_id(cib, "myId"))
+
+class ParseTokensTest(unittest.TestCase):
+    def test_format_2(self):
+        self.assertEqual(
+            {"node1": "token1", "node2": "token2"},
+            utils.parse_tokens(json.dumps({
+                "format_version": 2,
+                "data_version": 5,
+                "tokens": {"node1": "token1", "node2": "token2"},
+            }))
+        )
+
+    def test_format_1(self):
+        self.assertEqual(
+            {"node1": "token1"},
+            utils.parse_tokens(json.dumps({"node1": "token1"}))
+        )
+
+    def test_empty_or_invalid(self):
+        self.assertEqual({}, utils.parse_tokens(""))
+        self.assertEqual({}, utils.parse_tokens("  \n"))
+        self.assertEqual({}, utils.parse_tokens("not json"))
+        self.assertEqual({}, utils.parse_tokens("[]"))
+
+class ReadTokensTest(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        self.tokens_file = os.path.join(tmp_dir, "tokens")
+        patcher = mock.patch.dict(
+            os.environ, {"PCS_TOKEN_FILE": self.tokens_file}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        utils.invalidate_tokens_cache()
+        self.addCleanup(utils.invalidate_tokens_cache)
+
+    def write_tokens(self, tokens):
+        with open(self.tokens_file, "w") as tokens_file:
+            tokens_file.write(json.dumps({
+                "format_version": 2,
+                "data_version": 1,
+                "tokens": tokens,
+            }))
+
+    def test_missing_file(self):
+        self.assertEqual({}, utils.readTokens())
+
+    def test_read_once(self):
+        self.write_tokens({"node1": "token1"})
+        self.assertEqual({"node1": "token1"}, utils.readTokens())
+        self.write_tokens({"node1": "token2"})
+        self.assertEqual({"node1": "token1"}, utils.readTokens())
+        utils.invalidate_tokens_cache()
+        self.assertEqual({"node1": "token2"}, utils.readTokens())
+
+    def test_cache_not_modified_by_caller(self):
+        self.write_tokens({"node1": "token1"})
+        utils.readTokens()["node2"] = "token2"
+        self.assertEqual({"node1": "token1"}, utils.readTokens())
@@ -191,13 +191,15 @@ Commands:
         specified, only show groups (and their resources).
 
 
-    list [<standard|provider|type>] [--nodesc]
+    list [<standard|provider|type>] [--nodesc] [--refresh]
         Show list of all available resources, optionally filtered by specified
         type, standard or provider.  If --nodesc is used then descriptions
-        of resources are not printed.
+        of resources are not printed.  If --refresh is used then cached
+        metadata of resource agents are not used and get reloaded.
 
-    describe <standard:provider:type|type>
-        Show options for the specified resource.
+    describe <standard:provider:type|type> [--refresh]
+        Show options for the specified resource.  If --refresh is used then
+        cached metadata of the resource agent are not used and get reloaded.
 
     create <resource id> <standard:provider:type|type> [resource options]
            [op <operation action> <operation options> [<operation action>
@@ -439,13 +441,27 @@ Commands:
 
     failcount show <resource id> [node]
         Show current failcount for specified resource from all nodes or
-        only on specified node.
+        only on specified node.  Several resources and nodes may be specified
+        as comma separated lists, shell-style wildcards may be used (e.g.
+        'db-*').  Failcounts of several resources are shown as a table.
 
     failcount reset <resource id> [node]
         Reset failcount for specified resource on all nodes or only on
         specified node.  This tells the cluster to forget how many times
         a resource has failed in the past.  This may allow the resource to
-        be started or moved to a more preferred location.
+        be started or moved to a more preferred location.  Several resources
+        and nodes may be specified as comma separated lists, shell-style
+        wildcards may be used (e.g. 'db-*').
+
+    history [<resource id>...] [--node=<node>] [--from "YYYY-M-D H:M:S"]
+            [--to "YYYY-M-D H:M:S"] [--rc-code=<code>[,<code>...]] [--full]
+            [--json]
+        Show starts, stops and failures of resources recorded in the cluster
+        status, optionally only those of the specified resources, run on the
+        specified node, finished in the specified time window or finished
+        with one of the specified return codes.  If --full is specified, show
+        all recorded operations.  If --json is specified, print all matching
+        operations in json format.
 
     relocate dry-run [resource1] [resource2] ...
         The same as 'relocate run' but has no effect on the cluster.
@@ -664,6 +680,22 @@ Commands:
         WARNING: the selected scope of the CIB will be overwritten by the
         current content of the specified file.
 
+    batch [<filename>]
+        Run pcs commands read from <filename> (or from stdin if no filename is
+        specified or it is '-'), one command per line, on a copy of the CIB
+        and push the resulting CIB once all of them succeed.  If any command
+        fails, the CIB is not updated.  Only acl, constraint, property,
+        resource and stonith commands which change or show the CIB are
+        supported, commands acting on the running cluster (e.g. resource
+        cleanup, resource restart, stonith fence) are not.  --wait cannot be
+        used.  Commands behave as if run with -f, so resource delete and
+        stonith delete do not stop the resource and wait for it to stop before
+        deleting it; the cluster stops it once the CIB is pushed.  Only the
+        changes made by the batch are pushed to a running cluster, changes
+        made by others meanwhile are kept.
+        Lines may be prefixed by 'pcs', empty lines and lines starting with
+        '#' are ignored.
+
     cib-upgrade
         Upgrade the CIB to conform to the latest version of the document schema.
 
@@ -744,13 +776,16 @@ Commands:
         specified show the options for the configured stonith device.  If
         --full is specified all configured stonith options will be displayed.
 
-    list [filter] [--nodesc]
+    list [filter] [--nodesc] [--refresh]
         Show list of all available stonith agents (if filter is provided then
         only stonith agents matching the filter will be shown). If --nodesc is
-        used then descriptions of stonith agents are not printed.
+        used then descriptions of stonith agents are not printed.  If
+        --refresh is used then cached metadata of stonith agents are not used
+        and get reloaded.
 
-    describe <stonith agent>
-        Show options for specified stonith agent.
+    describe <stonith agent> [--refresh]
+        Show options for specified stonith agent.  If --refresh is used then
+        cached metadata of the stonith agent are not used and get reloaded.
 
     create <stonith id> <stonith device type> [stonith device options]
            [op <operation action> <operation options> [<operation action>
@@ -852,10 +887,13 @@ Configure pacemaker properties
 
 Commands:
     [list|show [<property> | --all | --defaults]] | [--all | --defaults]
+            [--refresh]
         List property settings (default: lists configured properties).
         If --defaults is specified will show all property defaults, if --all
         is specified, current configured properties will be shown with unset
-        properties and their defaults.
+        properties and their defaults.  If --refresh is used then cached
+        definitions of properties are not used and get reloaded from
+        pacemaker.
         Run 'man pengine' and 'man crmd' to get a description of the properties.
 
     set [--force | --node <nodename>] <property>=[<value>]
@@ -1211,6 +1249,12 @@ Commands:
        used by local pcs (and pcsd if root) to connect to other pcsd instances,
        using --remote clears authentication tokens used by remote systems to
        connect to the local pcsd instance.
+
+    command-server [<socket path>]
+        Run a server executing pcs commands received on a unix socket
+        (/var/run/pcsd-pcs.socket by default).  It is started by pcsd when
+        PCSD_PCS_COMMAND_SERVER is set to true in pcsd configuration, so pcsd
+        does not need to start a new pcs process for each command.
 """
     if pout:
         print(sub_usage(args, output))
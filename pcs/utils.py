@@ -8,8 +8,7 @@ from __future__ import (
 import os
 import sys
 import subprocess
-import ssl
-import inspect
+import copy
 import xml.dom.minidom
 from xml.dom.minidom import parseString, parse
 import xml.etree.ElementTree as ET
@@ -22,8 +21,12 @@ from io import BytesIO
 import tarfile
 import getpass
 import base64
+import fcntl
 import threading
 import logging
+import weakref
+
+from lxml import etree
 
 try:
     # python2
@@ -34,21 +37,11 @@ except ImportError:
 try:
     # python2
     from urllib2 import (
-        build_opener as urllib_build_opener,
-        install_opener as urllib_install_opener,
-        HTTPCookieProcessor as urllib_HTTPCookieProcessor,
-        HTTPSHandler as urllib_HTTPSHandler,
         HTTPError as urllib_HTTPError,
         URLError as urllib_URLError
     )
 except ImportError:
     # python3
-    from urllib.request import (
-        build_opener as urllib_build_opener,
-        install_opener as urllib_install_opener,
-        HTTPCookieProcessor as urllib_HTTPCookieProcessor,
-        HTTPSHandler as urllib_HTTPSHandler
-    )
     from urllib.error import (
         HTTPError as urllib_HTTPError,
         URLError as urllib_URLError
@@ -61,10 +54,11 @@ from pcs.cli.common.reports import (
     process_library_reports,
     LibraryReportProcessorToConsole as LibraryReportProcessorToConsole,
 )
-from pcs.common.tools import simple_cache
-from pcs.lib import reports
+from pcs.common.tools import ParallelExecutor, simple_cache
+from pcs.lib import metadata_cache, reports
 from pcs.lib.env import LibraryEnvironment
 from pcs.lib.errors import LibraryError, ReportItemSeverity
+from pcs.lib.tools import iterparse_elements
 import pcs.lib.corosync.config_parser as corosync_conf_parser
 from pcs.lib.external import (
     is_cman_cluster,
@@ -76,8 +70,13 @@ from pcs.lib.external import (
 import pcs.lib.resource_agent as lib_ra
 from pcs.lib.corosync.config_facade import ConfigFacade as corosync_conf_facade
 from pcs.lib.nodes_task import check_corosync_offline_on_nodes
-from pcs.lib.pacemaker import has_resource_wait_support
-from pcs.lib.pacemaker_state import ClusterState
+from pcs.lib.pacemaker import (
+    get_cib_sections as lib_get_cib_sections,
+    has_resource_wait_support,
+    iter_cib_status_node_states as lib_iter_cib_status_node_states,
+    push_cib_configuration_xml,
+)
+from pcs.lib.pacemaker_state import ClusterState, ResourcesState
 from pcs.lib.pacemaker_values import(
     validate_id,
     is_boolean,
@@ -97,18 +96,33 @@ filename = ""
 pcs_options = {}
 fence_bin = settings.fence_agent_binaries
 
+# Snapshot of the CIB shared by all readers during one pcs invocation. It is
+# loaded lazily by get_cib and dropped by invalidate_cib_snapshot whenever the
+# CIB gets changed.
+_cib_snapshot = {
+    "xml": None,
+    "tree": None,
+    "sections": {},
+}
+# Commands which never change the CIB, running them keeps the snapshot valid.
+_cib_read_only_commands = ("crm_mon", "crm_simulate", "crm_verify", "iso8601")
+
+# pcsd tokens shared by all threads, loaded once by readTokens and dropped
+# whenever pcsd may have changed them
+_tokens_cache = {
+    "tokens": None,
+}
+_tokens_cache_lock = threading.Lock()
+
 
 class UnknownPropertyException(Exception):
     pass
 
-def getValidateWithVersion(dom):
-    cib = dom.getElementsByTagName("cib")
-    if len(cib) != 1:
+def getValidateWithVersion(cib):
+    if cib.tag != "cib":
         err("Bad cib")
 
-    cib = cib[0]
-
-    version = cib.getAttribute("validate-with")
+    version = cib.get("validate-with", "")
     r = re.compile(r"pacemaker-(\d+)\.(\d+)\.?(\d+)?")
     m = r.match(version)
     major = int(m.group(1))
@@ -119,7 +133,7 @@ def getValidateWithVersion(dom):
 # Check the current pacemaker version in cib and upgrade it if necessary
 # Returns False if not upgraded and True if upgraded
 def checkAndUpgradeCIB(major,minor,rev):
-    cmajor, cminor, crev = getValidateWithVersion(get_cib_dom())
+    cmajor, cminor, crev = getValidateWithVersion(get_cib_snapshot())
     if cmajor > major or (cmajor == major and cminor > minor) or (cmajor == major and cminor == minor and crev >= rev):
         return False
     else:
@@ -214,13 +228,56 @@ def remove_uid_gid_file(uid,gid):
         file_removed = True
 
     return file_removed
+def get_tokens_file_path():
+    # keep in sync with token_file_path in pcsd/cfgsync.rb
+    if os.environ.get("PCS_TOKEN_FILE"):
+        return os.environ["PCS_TOKEN_FILE"]
+    if os.geteuid() == 0:
+        return settings.pcsd_tokens_location
+    return os.path.expanduser("~/.pcs/tokens")
+
+def parse_tokens(tokens_text):
+    """
+    Return a dictionary {'nodeA':'tokenA'} from pcsd tokens file content
+    """
+    # keep in sync with PCSTokens in pcsd/config.rb
+    if not tokens_text or not tokens_text.strip():
+        return {}
+    try:
+        data = json.loads(tokens_text)
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    if "format_version" in data and "tokens" in data:
+        version = data["format_version"]
+        tokens = data["tokens"] if isinstance(version, int) and version >= 2 else {}
+    else:
+        # format version 1 is a plain node: token dictionary
+        tokens = data
+    return tokens if isinstance(tokens, dict) else {}
+
 # Returns a dictionary {'nodeA':'tokenA'}
 def readTokens():
-    tokens = {}
-    output, retval = run_pcsdcli("read_tokens")
-    if retval == 0 and output['status'] == 'ok' and output['data']:
-        tokens = output['data']
-    return tokens
+    with _tokens_cache_lock:
+        if _tokens_cache["tokens"] is None:
+            tokens_text = ""
+            try:
+                with open(get_tokens_file_path()) as tokens_file:
+                    # pcsd holds an exclusive lock while writing the file
+                    fcntl.flock(tokens_file.fileno(), fcntl.LOCK_SH)
+                    try:
+                        tokens_text = tokens_file.read()
+                    finally:
+                        fcntl.flock(tokens_file.fileno(), fcntl.LOCK_UN)
+            except EnvironmentError:
+                pass
+            _tokens_cache["tokens"] = parse_tokens(tokens_text)
+        return dict(_tokens_cache["tokens"])
+
+def invalidate_tokens_cache():
+    with _tokens_cache_lock:
+        _tokens_cache["tokens"] = None
 
 # Set the corosync.conf file on the specified node
 def getCorosyncConfig(node):
@@ -345,20 +402,9 @@ def removeLocalNode(node, node_to_remove, pacemaker_remove=False):
 # 4 = Permission denied
 def sendHTTPRequest(host, request, data = None, printResult = True, printSuccess = True):
     url = 'https://' + host + ':2224/' + request
-    # enable self-signed certificates
-    # https://www.python.org/dev/peps/pep-0476/
-    # http://bugs.python.org/issue21308
-    if (
-        hasattr(ssl, "_create_unverified_context")
-        and
-        "context" in inspect.getargspec(urllib_HTTPSHandler.__init__).args
-    ):
-        opener = urllib_build_opener(
-            urllib_HTTPSHandler(context=ssl._create_unverified_context()),
-            urllib_HTTPCookieProcessor()
-        )
-    else:
-        opener = urllib_build_opener(urllib_HTTPCookieProcessor())
+    # the network stack takes long to load, load it only when it is needed
+    from pcs.lib import https_pool
+    opener = https_pool.build_opener()
 
     tokens = readTokens()
     if "--debug" in pcs_options:
@@ -388,7 +434,6 @@ def sendHTTPRequest(host, request, data = None, printResult = True, printSuccess
         opener.addheaders.append(('Cookie', ";".join(cookies)))
 
     # send the request
-    urllib_install_opener(opener)
     try:
         result = opener.open(url,data)
         # python3 returns bytes not str
@@ -874,8 +919,19 @@ def run(
         print(e.strerror)
         err("unable to locate command: " + args[0])
 
+    if not is_cib_read_only_command(os.path.basename(command), args[1:]):
+        invalidate_cib_snapshot()
     return output, returnVal
 
+def is_cib_read_only_command(command, args):
+    if command in _cib_read_only_commands:
+        return True
+    if command == "cibadmin":
+        return "-Q" in args or "--query" in args
+    if command == "crm_node":
+        return "-R" not in args and "--remove" not in args
+    return False
+
 @simple_cache
 def cmd_runner():
     env_vars = dict()
@@ -907,6 +963,8 @@ def run_pcsdcli(command, data=None):
         string_for_stdin=json.dumps(data),
         env_extend=env_var
     )
+    # pcsd-cli commands may save new tokens, e.g. auth or config sync
+    invalidate_tokens_cache()
     try:
         output_json = json.loads(output)
         for key in ['status', 'text', 'data']:
@@ -1037,19 +1095,55 @@ def map_for_error_list(callab, iterab):
             error_list.append(err)
     return error_list
 
-def run_parallel(worker_list, wait_seconds=1):
-    thread_list = []
-    for worker in worker_list:
-        thread = threading.Thread(target=worker)
-        thread.daemon = True
-        thread.start()
-        thread_list.append(thread)
+def map_parallel(worker, data_list, max_workers=None, call_timeout=None):
+    """
+    Run worker for each item of data_list in parallel, return TaskResults in
+    the order of data_list
+    Once a call raises an exception (e.g. SystemExit raised by err), calls
+    which have not been started yet are skipped. The exception is raised again
+    once all the started calls are finished.
+    max_workers maximal number of calls running at once, the limit for node
+        communication if None
+    call_timeout number of seconds each call is given, None = no limit
+    """
+    if max_workers is None:
+        max_workers = settings.node_communication_max_parallel
+    executor = ParallelExecutor(max_workers)
+    def _worker(*args, **kwargs):
+        try:
+            return worker(*args, **kwargs)
+        except BaseException:
+            # the exception is going to be raised, there is no point in
+            # starting any other calls
+            executor.cancel()
+            raise
+    result_list = executor.map(_worker, data_list, call_timeout)
+    for result in result_list:
+        if result.error is not None:
+            raise result.error
+    return result_list
+
+def run_parallel(worker_list, max_workers=None, call_timeout=None):
+    """
+    Run workers in parallel, return their TaskResults in the order of workers
+    See map_parallel for handling of exceptions and arguments.
+    """
+    return map_parallel(
+        lambda worker: worker(),
+        [([worker], {}) for worker in worker_list],
+        max_workers,
+        call_timeout
+    )
 
-    while thread_list:
-        for thread in thread_list:
-            thread.join(wait_seconds)
-            if not thread.is_alive():
-                thread_list.remove(thread)
+def call_for_nodes(action, node_list, *args, **kwargs):
+    """
+    Run action for each node in parallel, return its results in node order
+    See map_parallel for handling of exceptions.
+    """
+    result_list = map_parallel(
+        action, [([node] + list(args), kwargs) for node in node_list]
+    )
+    return [result.value for result in result_list]
 
 def create_task(report, action, node, *args, **kwargs):
     def worker():
@@ -1095,11 +1189,7 @@ def prepare_node_name(node, pm_nodes, cs_nodes):
 # Check is something exists in the CIB, if it does return it, if not, return
 #  an empty string
 def does_exist(xpath_query):
-    args = ["cibadmin", "-Q", "--xpath", xpath_query]
-    dummy_output,retval = run(args)
-    if (retval != 0):
-        return False
-    return True
+    return len(get_cib_xpath_elements(xpath_query)) > 0
 
 def is_pacemaker_node(node):
     p_nodes = getNodesFromPacemaker()
@@ -1115,15 +1205,10 @@ def is_corosync_node(node):
 
 def get_group_children(group_id):
     child_resources = []
-    dom = get_cib_dom()
-    groups = dom.getElementsByTagName("group")
-    for g in groups:
-        if g.getAttribute("id") == group_id:
-            for child in g.childNodes:
-                if (child.nodeType != xml.dom.minidom.Node.ELEMENT_NODE):
-                    continue
-                if child.tagName == "primitive":
-                    child_resources.append(child.getAttribute("id"))
+    for group in get_cib_snapshot().iter("group"):
+        if group.get("id") == group_id:
+            for child in group.iterchildren("primitive"):
+                child_resources.append(child.get("id"))
     return child_resources
 
 def dom_get_clone_ms_resource(dom, clone_ms_id):
@@ -1339,65 +1424,22 @@ def dom_attrs_to_list(dom_el, with_id=False):
     return attributes
 
 def get_resource_for_running_check(cluster_state, resource_id, stopped=False):
-    for clone in cluster_state.getElementsByTagName("clone"):
-        if clone.getAttribute("id") == resource_id:
-            for child in clone.childNodes:
-                if (
-                    child.nodeType == child.ELEMENT_NODE
-                    and
-                    child.tagName in ["resource", "group"]
-                ):
-                    resource_id = child.getAttribute("id")
-                    # in a clone a resource can have an id of '<name>:N'
-                    if ":" in resource_id:
-                        parts = resource_id.rsplit(":", 1)
-                        if parts[1].isdigit():
-                            resource_id = parts[0]
-                    break
-    for group in cluster_state.getElementsByTagName("group"):
-        # If resource is a clone it can have an id of '<resource name>:N'
-        if (
-            group.getAttribute("id") == resource_id
-            or
-            group.getAttribute("id").startswith(resource_id + ":")
-        ):
-            if stopped:
-                elem = group.getElementsByTagName("resource")[0]
-            else:
-                elem = group.getElementsByTagName("resource")[-1]
-            resource_id = elem.getAttribute("id")
-    return resource_id
+    return _get_resources_state(cluster_state).get_resource_for_running_check(
+        resource_id, stopped
+    )
 
 def resource_running_on(resource, passed_state=None, stopped=False):
-    nodes_started = []
-    nodes_master = []
-    nodes_slave = []
-    state = passed_state if passed_state else getClusterState()
-    resource_original = resource
-    resource = get_resource_for_running_check(state, resource, stopped)
-    resources = state.getElementsByTagName("resource")
-    for res in resources:
-        # If resource is a clone it can have an id of '<resource name>:N'
-        # If resource is a clone it will be found more than once - cannot break
-        if (
-            (
-                res.getAttribute("id") == resource
-                or
-                res.getAttribute("id").startswith(resource+":")
-            )
-            and
-            res.getAttribute("failed") != "true"
-        ):
-            for node in res.getElementsByTagName("node"):
-                node_name = node.getAttribute("name")
-                if res.getAttribute("role") == "Started":
-                    nodes_started.append(node_name)
-                elif res.getAttribute("role") == "Master":
-                    nodes_master.append(node_name)
-                elif res.getAttribute("role") == "Slave":
-                    nodes_slave.append(node_name)
+    state = _get_resources_state(
+        passed_state if passed_state else get_resources_state()
+    )
+    running_nodes = state.get_running_nodes(
+        state.get_resource_for_running_check(resource, stopped)
+    )
+    nodes_started = running_nodes["Started"]
+    nodes_master = running_nodes["Master"]
+    nodes_slave = running_nodes["Slave"]
     if not nodes_started and not nodes_master and not nodes_slave:
-        message = "Resource '%s' is not running on any node" % resource_original
+        message = "Resource '%s' is not running on any node" % resource
     else:
         message_parts = []
         for alist, label in (
@@ -1416,7 +1458,7 @@ def resource_running_on(resource, passed_state=None, stopped=False):
                     )
                 )
         message = "Resource '%s' is %s."\
-            % (resource_original, "; ".join(message_parts))
+            % (resource, "; ".join(message_parts))
     return {
         "message": message,
         "is_running": bool(nodes_started or nodes_master or nodes_slave),
@@ -1425,6 +1467,12 @@ def resource_running_on(resource, passed_state=None, stopped=False):
         "nodes_slave": nodes_slave,
     }
 
+def _get_resources_state(cluster_state):
+    # cluster state used to be passed as a minidom element
+    if isinstance(cluster_state, ResourcesState):
+        return cluster_state
+    return ResourcesState(etree.fromstring(cluster_state.toxml()))
+
 def does_resource_have_options(ra_type):
     if ra_type.startswith("ocf:") or ra_type.startswith("stonith:") or ra_type.find(':') == -1:
         return True
@@ -1546,14 +1594,45 @@ def is_valid_resource(resource, caseInsensitiveCheck=False):
 
 
 # Return matches from the CIB with the xpath_query
+# The output is the same as the one of 'cibadmin -Q --xpath': the matching
+# element or all the matching elements wrapped in an xpath-query element.
 def get_cib_xpath(xpath_query):
-    args = ["cibadmin", "-Q", "--xpath", xpath_query]
-    output,retval = run(args)
-    if (retval != 0):
+    elements = get_cib_xpath_elements(xpath_query)
+    if not elements:
         return ""
-    return output
+    if len(elements) == 1:
+        return etree.tostring(elements[0], with_tail=False).decode()
+    wrapper = etree.Element("xpath-query")
+    for element in elements:
+        element_copy = copy.deepcopy(element)
+        element_copy.tail = None
+        wrapper.append(element_copy)
+    return etree.tostring(wrapper).decode()
+
+# Return elements of the CIB snapshot matching the xpath_query. Like cibadmin,
+# a matching attribute or text stands for its parent element. Elements are
+# shared with the snapshot so they must not be modified.
+def get_cib_xpath_elements(xpath_query):
+    try:
+        result = get_cib_snapshot().xpath(xpath_query)
+    except etree.XPathError:
+        return []
+    if not isinstance(result, list):
+        # number, string or boolean result does not select anything
+        return []
+    elements = []
+    found = set()
+    for match in result:
+        if not isinstance(match, etree._Element):
+            match = match.getparent() if hasattr(match, "getparent") else None
+        if match is not None and match not in found:
+            found.add(match)
+            elements.append(match)
+    return elements
 
 def get_cib(scope=None):
+    if not scope and _cib_snapshot["xml"] is not None:
+        return _cib_snapshot["xml"]
     command = ["cibadmin", "-l", "-Q"]
     if scope:
         command.append("--scope=%s" % scope)
@@ -1563,8 +1642,88 @@ def get_cib(scope=None):
             err("unable to get cib, scope '%s' not present in cib" % scope)
         else:
             err("unable to get cib")
+    if not scope:
+        _cib_snapshot["xml"] = output
     return output
 
+def get_cib_snapshot():
+    """
+    Return the CIB of this pcs invocation as an lxml tree
+
+    The tree is loaded once and shared by all callers, so it must not be
+    modified. Use get_cib_dom or get_cib_etree to get a private copy which can
+    be changed and pushed back.
+    """
+    if _cib_snapshot["tree"] is None:
+        try:
+            _cib_snapshot["tree"] = etree.fromstring(get_cib())
+        except (etree.XMLSyntaxError, ValueError):
+            err("unable to get cib")
+    return _cib_snapshot["tree"]
+
+def invalidate_cib_snapshot():
+    """
+    Drop the CIB snapshot, the next read loads the CIB again
+    """
+    _cib_snapshot["xml"] = None
+    _cib_snapshot["tree"] = None
+    _cib_snapshot["sections"] = {}
+
+def get_cib_sections(scope_list):
+    """
+    Return an lxml tree of the CIB holding only the specified sections
+
+    Commands which read only a part of the CIB use this so the rest of the
+    CIB, notably its large status section, is neither transferred nor parsed.
+    Sections are placed the same way as in the full CIB, missing sections are
+    left out. Like the snapshot, the tree is shared and must not be modified.
+
+    scope_list -- names of CIB sections, see cibadmin --scope
+    """
+    if _cib_snapshot["tree"] is not None:
+        return _cib_snapshot["tree"]
+    key = tuple(scope_list)
+    if key not in _cib_snapshot["sections"]:
+        try:
+            _cib_snapshot["sections"][key] = lib_get_cib_sections(
+                cmd_runner(), scope_list
+            )
+        except LibraryError as e:
+            process_library_reports(e.args)
+    return _cib_snapshot["sections"][key]
+
+def get_cib_section_xml(scope):
+    """
+    Return xml string of a CIB section, empty string if the section is missing
+
+    scope -- name of a CIB section, see cibadmin --scope
+    """
+    section = get_cib_sections([scope]).find(".//{0}".format(scope))
+    if section is None:
+        return ""
+    return etree.tostring(section, with_tail=False).decode()
+
+def iter_cib_status_node_states():
+    """
+    Yield node_state elements of the CIB status section one by one
+
+    Reporting commands use this so the status section, which may be huge, is
+    never loaded into memory as a whole. Each element is valid only until the
+    next one is requested.
+    """
+    if _cib_snapshot["tree"] is not None:
+        return _cib_snapshot["tree"].iterfind("status/node_state")
+    return _iter_library_elements(
+        lib_iter_cib_status_node_states(cmd_runner())
+    )
+
+def _iter_library_elements(element_iterator):
+    try:
+        for element in element_iterator:
+            yield element
+    except LibraryError as e:
+        process_library_reports(e.args)
+
 def get_cib_dom():
     try:
         dom = parseString(get_cib())
@@ -1593,17 +1752,36 @@ def is_etree(var):
 
 # Replace only configuration section of cib with dom passed
 def replace_cib_configuration(dom):
+    root_tag = None
     if is_etree(dom):
         #etree returns string in bytes: b'xml'
         #python 3 removed .encode() from byte strings
         #run(...) calls subprocess.Popen.communicate which calls encode...
         #so there is bytes to str conversion
         new_dom = ET.tostring(dom).decode()
+        root_tag = dom.tag
     elif hasattr(dom, "toxml"):
         new_dom = dom.toxml()
+        if hasattr(dom, "documentElement"):
+            root_tag = dom.documentElement.tagName
+        else:
+            root_tag = getattr(dom, "tagName", None)
     else:
         new_dom = dom
+
+    # Push only changes against the loaded CIB to a live cluster if the whole
+    # modified CIB is available.
+    loaded_cib = _cib_snapshot["xml"]
+    if not usefile and root_tag == "cib" and loaded_cib is not None:
+        invalidate_cib_snapshot()
+        try:
+            push_cib_configuration_xml(cmd_runner(), new_dom, loaded_cib)
+        except LibraryError as e:
+            process_library_reports(e.args)
+        return
+
     output, retval = run(["cibadmin", "--replace", "-o", "configuration", "-V", "--xml-pipe"],False,new_dom)
+    invalidate_cib_snapshot()
     if retval != 0:
         err("Unable to update cib\n"+output)
 
@@ -1613,6 +1791,69 @@ def is_valid_cib_scope(scope):
         "rsc_defaults", "op_defaults", "status",
     ]
 
+# Indexes of ids of documents passed to does_id_exist or find_unique_id, one
+# for each document. An index is built by one pass through its document, the
+# document is never searched again. Elements with an id added to the document
+# later must be added to the index using dom_id_index_add. A found element is
+# checked to still have the id and to still be in the document, so removed
+# elements do not need to be removed from the index.
+_dom_id_indexes = weakref.WeakKeyDictionary()
+
+def _dom_get_document(dom):
+    return dom if dom.ownerDocument is None else dom.ownerDocument
+
+def _dom_get_id_index(document):
+    index = _dom_id_indexes.get(document)
+    if index is None:
+        index = {}
+        _dom_id_indexes[document] = index
+        _dom_id_index_elements(index, document, document)
+    return index
+
+def _dom_id_index_elements(index, document, dom):
+    for elem in dom.getElementsByTagName("*"):
+        elem_id = elem.getAttribute("id")
+        if elem_id and _dom_id_index_get(index, document, elem_id) is None:
+            index[elem_id] = elem
+
+def _dom_id_index_get(index, document, check_id):
+    elem = index.get(check_id)
+    if elem is None:
+        return None
+    if elem.getAttribute("id") == check_id and _dom_is_in(elem, document):
+        return elem
+    del index[check_id]
+    return None
+
+def _dom_is_in(elem, dom):
+    parent = elem.parentNode
+    while parent is not None and parent is not dom:
+        parent = parent.parentNode
+    return parent is dom
+
+def dom_id_index_add(element):
+    """
+    Add element and its descendants with an id to the id index of its document
+
+    Call it for each element added to a document after checking ids in it.
+    """
+    document = element.ownerDocument
+    index = _dom_id_indexes.get(document)
+    if index is None:
+        # the element will be indexed when the index is built
+        return
+    elem_id = element.getAttribute("id")
+    if elem_id and _dom_id_index_get(index, document, elem_id) is None:
+        index[elem_id] = element
+    _dom_id_index_elements(index, document, element)
+
+def _dom_get_element_by_id(dom, check_id):
+    document = _dom_get_document(dom)
+    elem = _dom_id_index_get(_dom_get_id_index(document), document, check_id)
+    if elem is None or dom is document or _dom_is_in(elem, dom):
+        return elem
+    return None
+
 # Checks to see if id exists in the xml dom passed
 # DEPRECATED use lxml version available in pcs.lib.cib.tools
 def does_id_exist(dom, check_id):
@@ -1620,20 +1861,21 @@ def does_id_exist(dom, check_id):
         for elem in dom.findall(str(".//*")):
             if elem.get("id") == check_id:
                 return True
-    else:
-        all_elem = dom.getElementsByTagName("*")
-        for elem in all_elem:
-            if elem.getAttribute("id") == check_id:
-                return True
-    return False
+        return False
+    return _dom_get_element_by_id(dom, check_id) is not None
 
 # Returns check_id if it doesn't exist in the dom, otherwise it adds an integer
 # to the end of the id and increments it until a unique id is found
 # DEPRECATED use lxml version available in pcs.lib.cib.tools
 def find_unique_id(dom, check_id):
+    if is_etree(dom):
+        id_set = set([elem.get("id") for elem in dom.findall(str(".//*"))])
+        id_exists = lambda an_id: an_id in id_set
+    else:
+        id_exists = lambda an_id: does_id_exist(dom, an_id)
     counter = 1
     temp_id = check_id
-    while does_id_exist(dom,temp_id):
+    while id_exists(temp_id):
         temp_id = check_id + "-" + str(counter)
         counter += 1
     return temp_id
@@ -1687,7 +1929,7 @@ def set_unmanaged(resource):
     return run(args)
 
 def get_node_attributes():
-    node_config = get_cib_xpath("//nodes")
+    node_config = get_cib_section_xml("nodes")
     nas = {}
     if (node_config == ""):
         err("unable to get crm_config, is pacemaker running?")
@@ -1804,6 +2046,32 @@ def get_terminal_password(message="Password: "):
 def getClusterState():
     return parseString(getClusterStateXml())
 
+def get_cluster_state_section(tag):
+    """
+    Return the first element with the specified tag from crm_mon xml output
+    or None if there is no such element
+
+    The output is parsed only up to the end of the element, elements preceding
+    it are dropped right after they are parsed.
+
+    tag -- name of a section of crm_mon xml output, e.g. nodes
+    """
+    try:
+        for element in iterparse_elements(getClusterStateXml(), tag):
+            return element
+    except etree.XMLSyntaxError:
+        err("error running crm_mon, is pacemaker running?")
+    return None
+
+def get_resources_state():
+    """
+    Return ResourcesState of the current cluster status
+    """
+    try:
+        return ResourcesState(etree.fromstring(getClusterStateXml()))
+    except (etree.XMLSyntaxError, ValueError):
+        err("error running crm_mon, is pacemaker running?")
+
 # DEPRECATED, please use lib.pacemaker.get_cluster_status_xml in new code
 def getClusterStateXml():
     xml, returncode = run(["crm_mon", "--one-shot", "--as-xml", "--inactive"])
@@ -1814,7 +2082,7 @@ def getClusterStateXml():
 # Returns true if stonith-enabled is not false/off & no stonith devices exist
 # So if the cluster can't start due to missing stonith devices return true
 def stonithCheck():
-    et = get_cib_etree()
+    et = get_cib_snapshot()
     cps = et.find("configuration/crm_config/cluster_property_set")
     if cps != None:
         for prop in cps.findall(str("nvpair")):
@@ -2348,6 +2616,7 @@ def dom_prepare_child_element(dom_element, tag_name, id):
         child_element = dom.createElement(tag_name)
         child_element.setAttribute("id", find_unique_id(dom, id))
         dom_element.appendChild(child_element)
+        dom_id_index_add(child_element)
     else:
         child_element = child_elements[0]
     return child_element
@@ -2369,6 +2638,7 @@ def dom_update_nv_pair(dom_element, name, value, id_prefix=""):
         el.setAttribute("name", name)
         el.setAttribute("value", value)
         dom_element.appendChild(el)
+        dom_id_index_add(el)
     return dom_element
 
 # Passed an array of strings ["a=b","c=d"], return array of tuples
@@ -2475,7 +2745,27 @@ def get_cluster_property_default(prop_def_dict, prop):
     return prop_def_dict[prop]["default"]
 
 
+CLUSTER_PROPERTIES_CACHE = "cluster-properties"
+
 def get_cluster_properties_definition():
+    # The definition is put together from metadata of three daemons. It is
+    # cached as a whole and reloaded once any of the daemons gets upgraded.
+    source_file_list = [
+        settings.pengine_binary, settings.crmd_binary, settings.cib_binary
+    ]
+    cache_key = json.dumps(source_file_list)
+    definition = metadata_cache.get(
+        CLUSTER_PROPERTIES_CACHE, cache_key, source_file_list
+    )
+    if definition is not None:
+        return definition
+    definition = _load_cluster_properties_definition()
+    metadata_cache.store(
+        CLUSTER_PROPERTIES_CACHE, cache_key, source_file_list, definition
+    )
+    return definition
+
+def _load_cluster_properties_definition():
     # we don't want to change these properties
     banned_props = ["dc-version", "cluster-infrastructure"]
     basic_props = [
@@ -7,6 +7,7 @@ require 'net/http'
 require 'net/https'
 require 'json'
 require 'fileutils'
+require 'socket'
 require 'backports'
 
 require 'config.rb'
@@ -950,6 +951,23 @@ def run_cmd_options(auth_user, options, *args)
   out = ""
   errout = ""
 
+  if $pcs_command_server and args[0] == PCS
+    begin
+      out, errout, retval = run_pcs_command_server(
+        auth_user, options, args[1..-1]
+      )
+      $logger.debug(out)
+      $logger.debug(errout)
+      $logger.debug("Duration: " + (Time.now - start).to_s + "s")
+      $logger.info("Return Value: " + retval.to_s)
+      return out, errout, retval
+    rescue Errno::ENOENT, Errno::ECONNREFUSED => e
+      $logger.warn(
+        "Unable to connect to pcs command server (#{e}), running pcs directly"
+      )
+    end
+  end
+
   proc_block = proc { |pid, stdin, stdout, stderr|
     if options and options.key?('stdin')
       stdin.puts(options['stdin'])
@@ -981,6 +999,47 @@ def run_cmd_options(auth_user, options, *args)
   return out, errout, retval
 end
 
+def start_pcs_command_server()
+  pid = Process.spawn(PCS, 'pcsd', 'command-server', PCS_COMMAND_SERVER_SOCKET)
+  Process.detach(pid)
+  at_exit {
+    begin
+      Process.kill('TERM', pid)
+    rescue Errno::ESRCH
+    end
+  }
+  $logger.info("Started pcs command server, pid #{pid}")
+  return true
+end
+
+def run_pcs_command_server(auth_user, options, argv)
+  request = {
+    'argv' => argv,
+    'env' => {
+      'CIB_user' => auth_user[:username],
+      # when running 'id -Gn' to get the groups they are not defined yet
+      'CIB_user_groups' => (auth_user[:usergroups] || []).join(' '),
+    },
+  }
+  if options and options.key?('stdin')
+    # the same as stdin.puts does when running pcs directly
+    stdin = options['stdin'].to_s
+    request['stdin'] = stdin.end_with?("\n") ? stdin : stdin + "\n"
+  end
+  response_text = UNIXSocket.open(PCS_COMMAND_SERVER_SOCKET) { |sock|
+    sock.write(JSON.generate(request) + "\n")
+    sock.read()
+  }
+  begin
+    response = JSON.parse(response_text)
+    out = response['stdout'].lines.to_a
+    errout = response['stderr'].lines.to_a
+    return out, errout, response['exit_code']
+  rescue JSON::ParserError, NoMethodError
+    return [], ['Error: invalid response from pcs command server'], 1
+  end
+end
+
 def is_score(score)
   return !!/^[+-]?((INFINITY)|(\d+))$/.match(score)
 end
@@ -101,6 +101,11 @@ configure do
   STDERR.sync = true
   $logger = configure_logger('/var/log/pcsd/pcsd.log')
   $semaphore_cfgsync = Mutex.new
+  $pcs_command_server = (
+    ENV['PCSD_PCS_COMMAND_SERVER'] and
+    ENV['PCSD_PCS_COMMAND_SERVER'].downcase == 'true' and
+    start_pcs_command_server()
+  )
 end
 
 set :logging, true
@@ -20,6 +20,7 @@ PACEMAKERD = "/usr/sbin/pacemakerd"
 CIBADMIN = "/usr/sbin/cibadmin"
 SBD_CONFIG = '/etc/sysconfig/sbd'
 CIB_PATH='/var/lib/pacemaker/cib/cib.xml'
+PCS_COMMAND_SERVER_SOCKET = '/var/run/pcsd-pcs.socket'
 
 SUPERUSER = 'hacluster'
 ADMIN_GROUP = 'haclient'
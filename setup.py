@@ -3,6 +3,7 @@
 import os
 
 from setuptools import setup, Command, find_packages
+from setuptools.command.build_py import build_py
 
 class CleanCommand(Command):
     user_options = []
@@ -14,6 +15,26 @@ class CleanCommand(Command):
         assert os.getcwd() == self.cwd, 'Must be in package root: %s' % self.cwd
         os.system('rm -rf ./build ./dist ./*.pyc ./*.egg-info')
 
+class BuildPyCommand(build_py):
+    """
+    Build python modules and generate the tree of commands for bash completion
+    """
+    def run(self):
+        build_py.run(self)
+        if not self.dry_run:
+            from pcs.cli.common import completion
+            completion.write_suggestion_tree(self.get_suggestion_tree_path())
+
+    def get_outputs(self, include_bytecode=1):
+        return (
+            build_py.get_outputs(self, include_bytecode)
+            +
+            [self.get_suggestion_tree_path()]
+        )
+
+    def get_suggestion_tree_path(self):
+        return os.path.join(self.build_lib, 'pcs', 'completion_tree.json')
+
 setup(
     name='pcs',
     version='0.9.151',
@@ -29,6 +50,7 @@ setup(
         ],
     },
     cmdclass={
+        'build_py': BuildPyCommand,
         'clean': CleanCommand,
     }
 )